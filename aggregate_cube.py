@@ -0,0 +1,213 @@
+# Pre-aggregated year x income group x state cube
+#
+# Every chart is a slice of the same weighted sums: income, taxes and return
+# counts by year, position in the income distribution and state. The cube
+# stores those sums once for fine percentile bins (1% bins, with the top
+# percentile split at 99.9) and every state. Queries roll states up to the
+# nation and bins up to any percentile range (quintiles, Top 1%, 80-99th, ...)
+# with cumulative sums along the bin axis, so each group costs two array
+# lookups and a subtraction. Rates are ratios of sums, not averages of rates.
+#
+#   python aggregate_cube.py microdata/returns microdata/cube.npz
+#
+#   cube = AggregateCube.load('microdata/cube.npz')
+#   df = cube.series('federal_income_tax', groups=QUINTILES + TOP_GROUPS)
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from microdata_schema import STATES
+from microdata_tax import adjusted_gross_income, column, federal_income_tax
+
+# Percentile bin edges: 0-1, 1-2, ..., 98-99, 99-99.9, 99.9-100
+BIN_EDGES = np.concatenate([np.arange(100), [99.9, 100.0]])
+
+# Percentile ranges of the groups plotted in the charts
+GROUPS = {
+    'Lowest Quintile': (0, 20),
+    'Second Quintile': (20, 40),
+    'Middle Quintile': (40, 60),
+    'Fourth Quintile': (60, 80),
+    'Highest Quintile': (80, 100),
+    'Highest Quintile (80-99th percentile)': (80, 99),
+    'Top 1%': (99, 100),
+    'Top 0.1%': (99.9, 100),
+}
+QUINTILES = ['Lowest Quintile', 'Second Quintile', 'Middle Quintile', 'Fourth Quintile', 'Highest Quintile']
+TOP_GROUPS = ['Top 1%', 'Top 0.1%']
+
+# States in microdata_schema order, plus a slot for returns without a state
+STATE_LABELS = STATES + ('Unknown',)
+
+
+def percentile_bins(years, income, weight, edges=BIN_EDGES):
+    """Bin of each return in its year's weighted income distribution.
+
+    A single sort by (year, income) ranks every year at once; each return's
+    position is the midpoint of its weight within the year's cumulative
+    weight.
+    """
+    order = np.lexsort((income, years))
+    sorted_years = years[order]
+    sorted_weight = weight[order].astype(np.float64)
+    cumulative = np.cumsum(sorted_weight)
+    # Cumulative weight before each year starts, and each year's total
+    starts = np.flatnonzero(np.r_[True, sorted_years[1:] != sorted_years[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    before = np.r_[0.0, cumulative[ends[:-1] - 1]]
+    totals = cumulative[ends - 1] - before
+    year_of_row = np.repeat(np.arange(len(starts)), ends - starts)
+    position = 100 * (cumulative - sorted_weight / 2 - before[year_of_row]) / totals[year_of_row]
+    bins = np.empty(len(order), dtype=np.int16)
+    bins[order] = np.clip(np.searchsorted(edges, position, side='right') - 1, 0, len(edges) - 2)
+    return bins
+
+
+class AggregateCube:
+    """Weighted sums by (year, percentile bin, state) with fast roll-ups."""
+
+    def __init__(self, years, measures, edges=BIN_EDGES, states=STATE_LABELS):
+        self.years = np.asarray(years)
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.states = tuple(states)
+        self.measures = {name: np.asarray(values, dtype=np.float64) for name, values in measures.items()}
+        shape = (len(self.years), len(self.edges) - 1, len(self.states))
+        for name, values in self.measures.items():
+            if values.shape != shape:
+                raise ValueError(f"Measure '{name}' has shape {values.shape}, expected {shape}")
+        self._year_index = {int(year): i for i, year in enumerate(self.years)}
+        self._state_index = {state: i for i, state in enumerate(self.states)}
+        # Cumulative sums along the bin axis, with a leading zero so any bin
+        # range is cumulative[hi] - cumulative[lo], per state and nationally
+        self._cumulative = {
+            name: np.concatenate([np.zeros(values.shape[:1] + (1,) + values.shape[2:]), np.cumsum(values, axis=1)], axis=1)
+            for name, values in self.measures.items()
+        }
+        self._national_cumulative = {name: values.sum(axis=2) for name, values in self._cumulative.items()}
+
+    def _bin_bounds(self, group):
+        low, high = GROUPS[group] if isinstance(group, str) else group
+        lo, hi = np.searchsorted(self.edges, [low, high])
+        if not (np.isclose(self.edges[lo], low) and np.isclose(self.edges[hi], high)):
+            raise ValueError(f"Percentile range {low}-{high} does not align with the cube's bins")
+        return lo, hi
+
+    def _year_rows(self, years):
+        if years is None:
+            return slice(None), self.years
+        if isinstance(years, tuple):
+            first, last = years
+            mask = (self.years >= (first if first is not None else self.years.min())) & \
+                   (self.years <= (last if last is not None else self.years.max()))
+            return np.flatnonzero(mask), self.years[mask]
+        return [self._year_index[int(year)] for year in years], np.asarray(years)
+
+    def group_sums(self, measure, groups, years=None, state=None):
+        """Sums of `measure` as a (years, groups) array.
+
+        `groups` are names from GROUPS or (low, high) percentile ranges;
+        `state` is a state code, or None for the nation.
+        """
+        rows, _ = self._year_rows(years)
+        if state is None:
+            cumulative = self._national_cumulative[measure][rows]
+        else:
+            cumulative = self._cumulative[measure][rows, :, self._state_index[state]]
+        bounds = np.array([self._bin_bounds(group) for group in groups])
+        return cumulative[:, bounds[:, 1]] - cumulative[:, bounds[:, 0]]
+
+    def residual(self, measure, group, minus, years=None, state=None):
+        """Sums for `group` excluding the returns in `minus` (e.g. Highest Quintile minus Top 1%)."""
+        sums = self.group_sums(measure, [group, minus], years=years, state=state)
+        return sums[:, 0] - sums[:, 1]
+
+    def state_sums(self, measure, group, years=None):
+        """Sums of `measure` as a (years, states) array for one group."""
+        rows, _ = self._year_rows(years)
+        lo, hi = self._bin_bounds(group)
+        cumulative = self._cumulative[measure][rows]
+        return cumulative[:, hi, :] - cumulative[:, lo, :]
+
+    def rates(self, numerator, denominator='income', groups=QUINTILES + TOP_GROUPS, years=None, state=None):
+        """Ratio of sums in percent, as a (years, groups) array."""
+        top = self.group_sums(numerator, groups, years=years, state=state)
+        bottom = self.group_sums(denominator, groups, years=years, state=state)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 * top / bottom
+
+    def means(self, measure, groups=QUINTILES + TOP_GROUPS, years=None, state=None):
+        """Weighted mean of `measure` per return, as a (years, groups) array."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.group_sums(measure, groups, years=years, state=state) / \
+                self.group_sums('count', groups, years=years, state=state)
+
+    def series(self, numerator, denominator='income', groups=QUINTILES + TOP_GROUPS, years=None, state=None):
+        """Chart-shaped frame ('Year' plus one column per group) of rates in percent."""
+        _, year_values = self._year_rows(years)
+        values = self.rates(numerator, denominator, groups=groups, years=years, state=state)
+        frame = pd.DataFrame(values, columns=[group if isinstance(group, str) else f'{group[0]}-{group[1]}'
+                                              for group in groups])
+        frame.insert(0, 'Year', year_values)
+        return frame
+
+    def save(self, path):
+        np.savez(path, years=self.years, edges=self.edges, states=np.array(self.states),
+                 **{f'measure_{name}': values for name, values in self.measures.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            measures = {key[len('measure_'):]: saved[key] for key in saved.files if key.startswith('measure_')}
+            return cls(saved['years'], measures, edges=saved['edges'], states=tuple(saved['states']))
+
+
+def build_cube(years, bins, states, weight, measures, edges=BIN_EDGES, state_labels=STATE_LABELS):
+    """Accumulate weighted sums of each measure by (year, bin, state).
+
+    `measures` maps names to per-return values; 'count' (the sum of weights)
+    is always included. `states` are codes into `state_labels`, with -1 for
+    unknown (stored in the last slot).
+    """
+    cube_years, year_idx = np.unique(years, return_inverse=True)
+    n_bins, n_states = len(edges) - 1, len(state_labels)
+    states = np.where(states < 0, n_states - 1, states)
+    cell = (year_idx * n_bins + bins) * n_states + states
+    size = len(cube_years) * n_bins * n_states
+    weight = np.asarray(weight, dtype=np.float64)
+    sums = {'count': np.bincount(cell, weights=weight, minlength=size)}
+    for name, values in measures.items():
+        sums[name] = np.bincount(cell, weights=weight * values, minlength=size)
+    shape = (len(cube_years), n_bins, n_states)
+    return AggregateCube(cube_years, {name: values.reshape(shape) for name, values in sums.items()},
+                         edges=edges, states=state_labels)
+
+
+def build_cube_from_microdata(returns, extra_measures=None, edges=BIN_EDGES):
+    """Cube of income and federal income tax from return-level microdata.
+
+    Returns are ranked by adjusted gross income within each year.
+    `extra_measures` adds further per-return arrays (payroll tax, ...).
+    """
+    years = column(returns, 'year')
+    weight = column(returns, 'weight', np.float64)
+    income = adjusted_gross_income(returns)
+    measures = {'income': income, 'federal_income_tax': federal_income_tax(returns, agi=income)}
+    measures.update(extra_measures or {})
+    bins = percentile_bins(years, income, weight, edges)
+    return build_cube(years, bins, column(returns, 'state'), weight, measures, edges=edges)
+
+
+if __name__ == '__main__':
+    from microdata_store import MicrodataStore
+
+    parser = argparse.ArgumentParser(description="Build the year x group x state cube from a microdata store")
+    parser.add_argument('store_dir')
+    parser.add_argument('cube_path')
+    args = parser.parse_args()
+
+    cube = build_cube_from_microdata(MicrodataStore(args.store_dir))
+    cube.save(args.cube_path)
+    print(f"Saved cube for {len(cube.years)} years x {len(cube.edges) - 1} percentile bins x "
+          f"{len(cube.states)} states to '{args.cube_path}'")
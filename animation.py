@@ -0,0 +1,130 @@
+# Year-animated figures: one base figure plus frames carrying only what changes
+#
+# Plotly frames normally repeat every trace in full for every year, so a
+# 75-year animation is about 75 times the size of the static chart.
+# `animate_years` takes a chart's figure as the base and each year's values
+# for its traces, keeps only the (trace, attribute) pairs that differ between
+# years, and builds frames holding just those arrays; x values, colors, hover
+# templates and the layout stay in the base figure once. Frames are applied
+# by Plotly.animate on top of the base, and every frame carries every
+# changing pair, so the slider can jump to any year.
+#
+# `write_animated_html` embeds the frames in the page, or with `lazy=True`
+# writes them to <page>.frames.json and fetches them after the base figure is
+# drawn (the page must then be served over HTTP, as watch.py does).
+#
+#   fig = ...  # the chart, drawn for one year
+#   frames = animate_years(fig, years, {year: {trace: {'y': values}}}, decimals=1)
+#   write_animated_html(fig, frames, 'chart.html', lazy=True)
+
+import json
+import os
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+
+def _same(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    a, b = np.asarray(a), np.asarray(b)
+    return a.shape == b.shape and np.array_equal(a, b, equal_nan=a.dtype.kind == 'f' and b.dtype.kind == 'f')
+
+
+def _compact(value, decimals):
+    if decimals is None or isinstance(value, str):
+        return value
+    return np.round(np.asarray(value, dtype=np.float64), decimals)
+
+
+def delta_frames(fig, years, values, decimals=None):
+    """Frames holding only the trace attributes that change between years.
+
+    `values` maps each year to {trace index: {attribute: value}}. Returns
+    the frames as dicts and the sorted (trace, attribute) pairs they carry.
+    """
+    years = list(years)
+    first = values[years[0]]
+    changing = sorted({
+        (trace, attribute)
+        for year in years[1:]
+        for trace, attributes in values[year].items()
+        for attribute, value in attributes.items()
+        if trace not in first or attribute not in first[trace] or not _same(value, first[trace][attribute])
+    })
+    traces = sorted({trace for trace, _ in changing})
+    frames = []
+    for year in years:
+        data = {trace: {'type': fig.data[trace].type} for trace in traces}
+        for trace, attribute in changing:
+            data[trace][attribute] = _compact(values[year][trace][attribute], decimals)
+        frames.append({'name': str(year), 'data': [data[trace] for trace in traces], 'traces': traces})
+    return frames, changing
+
+
+def animate_years(fig, years, values, active=-1, decimals=None, frame_duration=400, label="Year: "):
+    """Turn `fig` into the base of a year animation and return its frames.
+
+    The base traces are set to the `active` year's values and a year slider
+    and play/pause buttons are added to the layout (after any existing
+    menus). Pass the frames to `write_animated_html`.
+    """
+    years = [int(year) for year in years]
+    frames, _ = delta_frames(fig, years, values, decimals)
+    active = active % len(years)
+    for trace, attributes in values[years[active]].items():
+        fig.data[trace].update({attribute: _compact(value, decimals) for attribute, value in attributes.items()})
+
+    def step(year, duration, redraw=True):
+        return [[str(year)] if year is not None else None,
+                dict(mode='immediate', frame=dict(duration=duration, redraw=redraw), transition=dict(duration=0),
+                     fromcurrent=True)]
+
+    fig.update_layout(
+        sliders=[dict(
+            active=active,
+            currentvalue=dict(prefix=label, font=dict(size=16)),
+            pad=dict(t=50),
+            steps=[dict(method='animate', label=str(year), args=step(year, 0)) for year in years],
+        )],
+        updatemenus=list(fig.layout.updatemenus) + [dict(
+            type='buttons',
+            direction='left',
+            showactive=False,
+            x=0.0,
+            xanchor='right',
+            y=0,
+            yanchor='top',
+            pad=dict(t=60, r=10),
+            buttons=[
+                dict(label='Play', method='animate', args=step(None, frame_duration)),
+                dict(label='Pause', method='animate', args=[[None], dict(mode='immediate', frame=dict(duration=0, redraw=False))]),
+            ],
+        )],
+    )
+    return frames
+
+
+def write_animated_html(fig, frames, path, lazy=False):
+    """Write the base figure with its frames, embedded or in a separate JSON file."""
+    frames_json = to_json_plotly(frames)
+    if lazy:
+        frames_path = os.path.splitext(path)[0] + '.frames.json'
+        with open(frames_path, 'w') as f:
+            f.write(frames_json)
+        # Without the frames (opened from file://, or the JSON is missing) the
+        # slider and Play button would do nothing, so drop them and say why
+        script = (f"fetch({json.dumps(os.path.basename(frames_path))})"
+                  ".then(function (response) {"
+                  " if (!response.ok) throw new Error(response.status + ' ' + response.statusText);"
+                  " return response.json(); })"
+                  ".then(function (frames) { return Plotly.addFrames('{plot_id}', frames); })"
+                  ".catch(function (error) {"
+                  " console.error('Animation frames could not be loaded:', error);"
+                  " var gd = document.getElementById('{plot_id}');"
+                  " Plotly.relayout(gd, {sliders: [], updatemenus: (gd.layout.updatemenus || []).filter("
+                  "function (menu) { return !(menu.buttons || []).some("
+                  "function (button) { return button.method === 'animate'; }); })}); });")
+    else:
+        script = "Plotly.addFrames('{plot_id}', " + frames_json + ");"
+    fig.write_html(path, post_script=script)
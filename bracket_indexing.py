@@ -0,0 +1,145 @@
+# Bracket creep versus legislation: every year's law at every year's prices
+#
+# Effective rates drift because the law changes and because dollar amounts
+# the law leaves unindexed (brackets, exemptions, the standard deduction,
+# credits) shrink as prices rise. To separate the two, each income year's
+# returns are taxed under every law year's schedule, re-indexed with the
+# CPI-U table in deflators.py from the law year's prices to the income
+# year's. The diagonal of the resulting (income year x law year) matrix is
+# actual law; moving along a row changes only the legislation, with
+# inflation neutralized, and moving down a column changes only the incomes
+# under a fixed, price-indexed law. With index_law=False schedules keep
+# their nominal dollars, so the gap between the two matrices is
+# inflation-driven bracket creep.
+#
+# Work per income year, batched over all law years:
+#   - inputs that do not depend on the law (AGI, earned income, deductions
+#     and percentile bins from one sort) are prepared once for all years
+#     (scenario_sweep.prepare_returns)
+#   - build_tables tabulates every law year once, and one scale_tables call
+#     moves the whole stack to the income year's prices, recomputing the
+#     cumulative bracket bases; the stacked capital gains table is built from
+#     the result once and shared by every chunk
+#   - income_tax evaluates a (law years x returns) block for each chunk of
+#     returns on a thread pool, and one bincount per chunk adds the tax into
+#     (law year, percentile bin) sums
+# Each income year's row of the matrix is memoized, so adding a year of
+# microdata only computes that row.
+#
+#   python bracket_indexing.py microdata/returns --group 'Middle Quintile'
+#   python bracket_indexing_visualization.py microdata/returns
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import tax_law
+from aggregate_cube import BIN_EDGES, GROUPS, QUINTILES, TOP_GROUPS
+from deflators import CPI_U, FIRST_YEAR, LAST_YEAR, price_ratio
+from memoize import memoize
+from microdata_tax import TAX_CHUNK_ROWS, capital_gains_split, itemized_deductions
+from scenario_sweep import prepare_returns
+from tax_engine import build_tables, income_tax, scale_tables, with_stacked_tables
+
+# Schedules applied to every income year: all years of the CPI table
+LAW_YEARS = tuple(range(FIRST_YEAR, LAST_YEAR + 1))
+
+
+def _chunk_tax_sums(rows, law_idx, tables, n_bins):
+    # Weighted tax of a chunk of returns under every law year, by (law year, bin)
+    statutory_agi, preferential = capital_gains_split(rows, law_idx, tables, agi=rows['agi'])
+    itemized, salt = itemized_deductions(rows)
+    tax = income_tax(statutory_agi, rows['filing_status'], law_idx, tables, children=rows['dependents'],
+                     earned=rows['earned'], preferential=preferential, itemized=itemized, salt=salt, amt=True)
+    tax *= rows['weight']
+    cell = law_idx * n_bins + rows['bin']
+    return np.bincount(cell.ravel(), weights=tax.ravel(), minlength=len(law_idx) * n_bins)
+
+
+@memoize(version=2, depends=(
+    tax_law.ORDINARY_SCHEDULES, tax_law.EITC_SCHEDULES, tax_law.CHILD_CREDIT_SCHEDULES,
+    tax_law.CAPITAL_GAINS_SCHEDULES, tax_law.AMT_SCHEDULES, tax_law.SALT_CAPS, CPI_U,
+))
+def income_year_rates(rows, income_year, law_years, groups, index_law=True, edges=BIN_EDGES):
+    """Effective federal income tax rates (%) of one year's returns under each law year, as (law years, groups).
+
+    `rows` are the year's prepared returns (see scenario_sweep.prepare_returns).
+    Chunks of returns run on one thread per CPU.
+    """
+    tables = build_tables(law_years)
+    if index_law:
+        tables = scale_tables(tables, price_ratio(np.asarray(law_years), income_year))
+    tables = with_stacked_tables(tables)
+    law_idx = np.arange(len(law_years))[:, np.newaxis]
+    n_bins, n_rows = len(edges) - 1, len(rows['agi'])
+    # Each chunk's (law years x returns) temporaries stay around TAX_CHUNK_ROWS elements
+    chunk_rows = max(1, TAX_CHUNK_ROWS // len(law_years))
+    starts = range(0, n_rows, chunk_rows)
+
+    def run(start):
+        chunk = {name: values[start:start + chunk_rows] for name, values in rows.items()}
+        return _chunk_tax_sums(chunk, law_idx, tables, n_bins)
+
+    workers = min(os.cpu_count() or 1, max(len(starts), 1))
+    with ThreadPoolExecutor(workers) as pool:
+        tax_sums = sum(pool.map(run, starts), np.zeros(len(law_years) * n_bins))
+    income_sums = np.bincount(rows['bin'], weights=rows['agi'] * rows['weight'], minlength=n_bins)
+
+    cumulative_tax = np.concatenate([np.zeros((len(law_years), 1)), np.cumsum(tax_sums.reshape(-1, n_bins), axis=1)],
+                                    axis=1)
+    cumulative_income = np.r_[0.0, np.cumsum(income_sums)]
+    bounds = np.searchsorted(edges, [GROUPS[group] for group in groups])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * (cumulative_tax[:, bounds[:, 1]] - cumulative_tax[:, bounds[:, 0]]) / \
+            (cumulative_income[bounds[:, 1]] - cumulative_income[bounds[:, 0]])
+
+
+def indexing_matrix(returns, groups=QUINTILES + TOP_GROUPS, law_years=LAW_YEARS, income_years=None, index_law=True):
+    """Effective rates (%) for every (income year, law year) pair.
+
+    Returns a frame indexed by ('Income Year', 'Law Year') with one column
+    per group; `income_years` defaults to every year in the returns.
+    """
+    arrays, year_rows = prepare_returns(returns)
+    income_years = sorted(year_rows) if income_years is None else [int(year) for year in income_years]
+    law_years = [int(year) for year in law_years]
+    blocks = []
+    for income_year in income_years:
+        if income_year not in year_rows:
+            raise ValueError(f"No returns for {income_year}")
+        start, stop = year_rows[income_year]
+        rows = {name: values[start:stop] for name, values in arrays.items()}
+        blocks.append(income_year_rates(rows, income_year, law_years, list(groups), index_law=index_law))
+    index = pd.MultiIndex.from_product([income_years, law_years], names=['Income Year', 'Law Year'])
+    return pd.DataFrame(np.concatenate(blocks), index=index, columns=list(groups))
+
+
+def law_effects(matrix, group):
+    """One group's matrix as a (income years x law years) frame, minus each income year's actual-law rate."""
+    rates = matrix[group].unstack('Law Year')
+    actual = pd.Series([rates.at[year, year] if year in rates.columns else np.nan for year in rates.index],
+                       index=rates.index)
+    return rates.sub(actual, axis=0)
+
+
+if __name__ == '__main__':
+    from microdata_store import MicrodataStore
+
+    parser = argparse.ArgumentParser(description="Effective rates of every income year under every year's indexed law")
+    parser.add_argument('store_dir')
+    parser.add_argument('--group', default='Middle Quintile', choices=list(GROUPS))
+    parser.add_argument('--nominal', action='store_true', help="Apply schedules without re-indexing their dollars")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matrix = indexing_matrix(MicrodataStore(args.store_dir), index_law=not args.nominal)
+    elapsed = time.perf_counter() - start
+    rates = matrix[args.group].unstack('Law Year')
+    print(f"{args.group}: effective rate (%) by income year (rows) and law year (columns), "
+          f"{'nominal' if args.nominal else 'indexed'} schedules")
+    print(rates.iloc[:, ::5].round(1).to_string())
+    print(f"{rates.size:,} (income year, law year) pairs in {elapsed:.1f}s")
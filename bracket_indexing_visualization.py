@@ -0,0 +1,88 @@
+import sys
+
+import numpy as np
+import plotly.graph_objects as go
+
+from bracket_indexing import indexing_matrix, law_effects
+from microdata_store import MicrodataStore
+
+# Microdata store to tax (see microdata_store.py)
+store_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/returns'
+
+# Every income year taxed under every year's law, re-indexed to its prices
+matrix = indexing_matrix(MicrodataStore(store_dir))
+
+# Groups selectable from the dropdown
+groups = ['Lowest Quintile', 'Middle Quintile', 'Highest Quintile', 'Top 1%', 'Top 0.1%']
+title = "Effective Federal Income Tax Rates Under Each Year's Law, Indexed to Each Year's Prices"
+
+# Create the figure: for each group, the change from actual law when each
+# income year (rows) is taxed under each law year (columns)
+fig = go.Figure()
+buttons = []
+for i, group in enumerate(groups):
+    rates = matrix[group].unstack('Law Year')
+    effects = law_effects(matrix, group)
+    limit = float(np.nanmax(np.abs(effects.to_numpy()))) or 1.0
+    fig.add_trace(go.Heatmap(
+        x=list(effects.columns),
+        y=[str(year) for year in effects.index],
+        z=effects.to_numpy(),
+        customdata=rates.to_numpy(),
+        colorscale='RdBu_r',
+        zmid=0,
+        zmin=-limit,
+        zmax=limit,
+        colorbar=dict(title="Change From<br>Actual Law<br>(Points)"),
+        visible=(i == 0),
+        hovertemplate="Income Year: %{y}<br>" +
+                     "Law Year: %{x}<br>" +
+                     "Tax Rate: %{customdata:.1f}%<br>" +
+                     "Change From Actual Law: %{z:+.1f} points<br>" +
+                     "<extra></extra>"
+    ))
+    buttons.append(dict(
+        label=group,
+        method='update',
+        args=[{'visible': [j == i for j in range(len(groups))]},
+              {'title.text': f"{title}<br><sub>{group}</sub>"}]
+    ))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': f"{title}<br><sub>{groups[0]}</sub>",
+        'y':0.95,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=20)
+    },
+    xaxis_title="Law Year (Schedule Re-indexed With CPI-U)",
+    yaxis_title="Income Year",
+    template='plotly_white',
+    updatemenus=[dict(
+        buttons=buttons,
+        direction='down',
+        x=0.01,
+        xanchor='left',
+        y=1.08,
+        yanchor='top'
+    )],
+    margin=dict(l=80, r=30, t=120, b=50),
+    xaxis=dict(
+        dtick=10,
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    yaxis=dict(
+        type='category'
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+
+# Save the figure as an HTML file
+fig.write_html("bracket_indexing_visualization.html")
+
+print("Bracket indexing visualization has been created and saved as 'bracket_indexing_visualization.html'")
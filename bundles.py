@@ -0,0 +1,173 @@
+# Data-only update bundles and page shells for the charts
+#
+# Every chart page embeds plotly.js and its figure, so a change of numbers
+# means shipping a new multi-megabyte page. This build runs each chart
+# script (leaving its committed page untouched), takes its figure and writes
+# it to site/ as:
+#
+#   site/bundles/<chart>.<hash>.json    figure data and layout, named by the
+#                                       hash of its content (cache forever)
+#   site/bundles/<chart>.latest.json    version, hash and path of the newest
+#                                       bundle (never cached)
+#   site/<chart>.html                   a small shell that loads plotly.js
+#                                       from site/plotly-<version>.min.js,
+#                                       fetches the newest bundle and draws
+#                                       it with Plotly.react
+#
+# Open shells check for a newer bundle every REFRESH_SECONDS and update the
+# chart in place, so a data refresh downloads kilobytes and plotly.js is
+# loaded once. A chart's version only moves when its figure changes, and the
+# previous KEEP_BUNDLES bundles are kept for pages still fetching them.
+#
+#   python bundles.py                        # every chart
+#   python bundles.py tax_rates_visualization.py --store microdata/synthetic
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from plotly.io.json import to_json_plotly
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from watch import REPO_DIR, build_chart, chart_scripts
+
+SITE_DIR = os.path.join(REPO_DIR, 'site')
+BUNDLE_DIR = 'bundles'
+HASH_LENGTH = 12
+KEEP_BUNDLES = 3
+REFRESH_SECONDS = 60
+
+SHELL_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>html, body, #chart {{ width: 100%; height: 100%; margin: 0; }}</style>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+(function () {{
+  var current = null;
+  function refresh() {{
+    fetch({latest}, {{cache: 'no-store'}}).then(function (response) {{
+      return response.json();
+    }}).then(function (latest) {{
+      if (latest.hash === current) return;
+      return fetch(latest.bundle).then(function (response) {{
+        return response.json();
+      }}).then(function (figure) {{
+        current = latest.hash;
+        Plotly.react('chart', figure.data, figure.layout, {{responsive: true}});
+      }});
+    }}).catch(function (error) {{ console.error('Chart refresh failed', error); }});
+  }}
+  refresh();
+  setInterval(refresh, {refresh_ms});
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def _latest_path(name, site_dir):
+    return os.path.join(site_dir, BUNDLE_DIR, f'{name}.latest.json')
+
+
+def read_latest(name, site_dir=SITE_DIR):
+    """The pointer to a chart's newest bundle, or None."""
+    try:
+        with open(_latest_path(name, site_dir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_bundle(name, figure, site_dir=SITE_DIR):
+    """Write `figure` as the newest bundle of chart `name`; returns its pointer.
+
+    Nothing is written when the figure matches the newest bundle.
+    """
+    os.makedirs(os.path.join(site_dir, BUNDLE_DIR), exist_ok=True)
+    plotly_json = figure.to_plotly_json()
+    payload = to_json_plotly({'data': plotly_json['data'], 'layout': plotly_json['layout']})
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    latest = read_latest(name, site_dir)
+    if latest is not None and latest['hash'] == digest:
+        return latest
+    bundle = f'{BUNDLE_DIR}/{name}.{digest}.json'
+    # The bundle goes first, so the pointer never names a missing file
+    _write(os.path.join(site_dir, bundle), payload)
+    latest = {'chart': name, 'version': (latest['version'] + 1) if latest else 1, 'hash': digest, 'bundle': bundle}
+    _write(_latest_path(name, site_dir), json.dumps(latest))
+    _prune(name, site_dir)
+    return latest
+
+
+def _prune(name, site_dir, keep=KEEP_BUNDLES):
+    # Drop all but the newest `keep` bundles of the chart
+    pattern = re.compile(re.escape(name) + r'\.[0-9a-f]{%d}\.json$' % HASH_LENGTH)
+    bundle_dir = os.path.join(site_dir, BUNDLE_DIR)
+    paths = sorted((os.path.join(bundle_dir, entry) for entry in os.listdir(bundle_dir) if pattern.match(entry)),
+                   key=os.path.getmtime)
+    for path in paths[:-keep]:
+        os.remove(path)
+
+
+def write_shell(name, title, site_dir=SITE_DIR, refresh_seconds=REFRESH_SECONDS):
+    """Write the page shell of chart `name` and the shared plotly.js it loads."""
+    plotly_js = f'plotly-{get_plotlyjs_version()}.min.js'
+    if not os.path.exists(os.path.join(site_dir, plotly_js)):
+        _write(os.path.join(site_dir, plotly_js), get_plotlyjs())
+    shell = SHELL_TEMPLATE.format(title=title, plotly_js=plotly_js,
+                                  latest=json.dumps(f'{BUNDLE_DIR}/{name}.latest.json'),
+                                  refresh_ms=int(refresh_seconds * 1000))
+    _write(os.path.join(site_dir, f'{name}.html'), shell)
+
+
+def _title(figure, name):
+    text = figure.layout.title.text or name
+    return re.sub(r'<[^>]+>', ' ', text.split('<br>')[0]).strip()
+
+
+def build_bundles(charts, store=None, site_dir=SITE_DIR):
+    """Run each chart and refresh its bundle and shell; returns {chart name: pointer}."""
+    results = {}
+    for chart in charts:
+        name = os.path.splitext(os.path.basename(chart))[0]
+        figure = build_chart(chart, store, write_page=False)
+        if figure is None:
+            raise ValueError(f"{chart} does not define a figure named 'fig'")
+        results[name] = write_bundle(name, figure, site_dir)
+        write_shell(name, _title(figure, name), site_dir)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write data-only chart bundles and the page shells that load them")
+    parser.add_argument('charts', nargs='*', help="Chart scripts (default: every chart)")
+    parser.add_argument('--store', help="Microdata store passed to charts that take one")
+    args = parser.parse_args()
+
+    os.chdir(REPO_DIR)
+    charts = [os.path.abspath(chart) for chart in args.charts] or chart_scripts()
+    for chart in charts:
+        name = os.path.splitext(os.path.basename(chart))[0]
+        try:
+            latest = build_bundles([chart], args.store)[name]
+        except Exception as error:
+            print(f"{name}: skipped ({type(error).__name__}: {error})")
+            continue
+        size = os.path.getsize(os.path.join(SITE_DIR, latest['bundle']))
+        print(f"{name}: version {latest['version']} ({latest['hash']}, {size / 1e3:,.1f} kB)")
@@ -0,0 +1,157 @@
+# Columnar storage for every chart dataset
+#
+# Each dataset is a Parquet file under data/ in long format with typed
+# columns:
+#
+#   year   int16
+#   group  dictionary-encoded string  (groups keep their dataset order)
+#   value  float64
+#
+# Rows are sorted by year and written in row groups, so year-range filters
+# are pushed down to skip whole row groups and column projection reads only
+# the requested columns. Files are memory-mapped on read; numeric columns of
+# a single-chunk table convert to NumPy without copying.
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+SCHEMA = pa.schema([
+    ('year', pa.int16()),
+    ('group', pa.dictionary(pa.int8(), pa.string())),
+    ('value', pa.float64()),
+])
+
+# Row group size for large tables; small chart datasets fit in one group
+ROW_GROUP_SIZE = 1_000_000
+
+
+def dataset_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f'{name}.parquet')
+
+
+def list_datasets(data_dir=DATA_DIR):
+    return sorted(name[:-len('.parquet')] for name in os.listdir(data_dir) if name.endswith('.parquet'))
+
+
+def to_long(wide):
+    """Convert a chart-shaped frame ('Year' plus one column per group) to long format."""
+    groups = [column for column in wide.columns if column != 'Year']
+    long = wide.melt(id_vars='Year', value_vars=groups, var_name='group', value_name='value')
+    long = long.rename(columns={'Year': 'year'})
+    long['group'] = pd.Categorical(long['group'], categories=groups)
+    return long.sort_values(['year', 'group'], kind='stable').reset_index(drop=True)
+
+
+def write_dataset(name, long, description='', data_dir=DATA_DIR, row_group_size=ROW_GROUP_SIZE):
+    """Write a long-format frame (year, group, value) as a typed Parquet table."""
+    long = long.sort_values(['year', 'group'], kind='stable')
+    groups = list(long['group'].cat.categories) if isinstance(long['group'].dtype, pd.CategoricalDtype) \
+        else list(dict.fromkeys(long['group']))
+    if pd.isna(long['year']).any() or long['year'].min() < np.iinfo(np.int16).min or long['year'].max() > np.iinfo(np.int16).max:
+        raise ValueError(f"Dataset '{name}' has years outside the int16 range")
+    if len(groups) > np.iinfo(np.int8).max:
+        raise ValueError(f"Dataset '{name}' has more than {np.iinfo(np.int8).max} groups")
+    group_codes = pd.Categorical(long['group'], categories=groups).codes.astype(np.int8)
+    table = pa.Table.from_arrays(
+        [
+            pa.array(long['year'].to_numpy(), type=pa.int16()),
+            pa.DictionaryArray.from_arrays(pa.array(group_codes), pa.array(groups, type=pa.string())),
+            pa.array(long['value'].to_numpy(dtype=np.float64), type=pa.float64()),
+        ],
+        schema=SCHEMA.with_metadata({'description': description}),
+    )
+    os.makedirs(data_dir, exist_ok=True)
+    path = dataset_path(name, data_dir)
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, row_group_size=row_group_size, write_statistics=True)
+    os.replace(tmp_path, path)
+
+
+def _filters(years, groups):
+    filters = []
+    if years is not None:
+        first, last = years
+        if first is not None:
+            filters.append(('year', '>=', first))
+        if last is not None:
+            filters.append(('year', '<=', last))
+    if groups is not None:
+        filters.append(('group', 'in', list(groups)))
+    return filters or None
+
+
+def load(name, columns=None, years=None, groups=None, data_dir=DATA_DIR):
+    """Read a dataset as an Arrow table.
+
+    `columns` projects a subset of (year, group, value); `years` is an
+    inclusive (first, last) range (either end may be None) and `groups` a
+    collection of group names, both pushed down to the Parquet reader.
+    """
+    return pq.read_table(
+        dataset_path(name, data_dir),
+        columns=columns,
+        filters=_filters(years, groups),
+        memory_map=True,
+    )
+
+
+def load_arrays(name, columns=('year', 'value'), years=None, groups=None, data_dir=DATA_DIR):
+    """Numeric columns as NumPy arrays, zero-copy where Arrow allows it."""
+    table = load(name, columns=list(columns), years=years, groups=groups, data_dir=data_dir)
+    arrays = {}
+    for column in columns:
+        chunked = table.column(column)
+        if pa.types.is_dictionary(chunked.type):
+            arrays[column] = chunked.combine_chunks().indices.to_numpy()
+        elif chunked.num_chunks == 1 and chunked.null_count == 0:
+            arrays[column] = chunked.chunk(0).to_numpy(zero_copy_only=True)
+        else:
+            arrays[column] = chunked.to_numpy()
+    return arrays
+
+
+def load_wide(name, years=None, groups=None, data_dir=DATA_DIR):
+    """Chart-shaped frame: a 'Year' column plus one column per group in dataset order."""
+    long = load(name, years=years, groups=groups, data_dir=data_dir).to_pandas()
+    wide = long.pivot(index='year', columns='group', values='value')
+    order = [group for group in long['group'].cat.categories if group in wide.columns]
+    wide = wide[order].reset_index().rename(columns={'year': 'Year'})
+    wide.columns.name = None
+    return wide
+
+
+def dataset_groups(name, data_dir=DATA_DIR):
+    """Group names of a dataset in their stored order."""
+    return list(load(name, columns=['group'], data_dir=data_dir).column('group').combine_chunks().dictionary.to_pylist())
+
+
+def append_year(name, year, values, data_dir=DATA_DIR):
+    """Add one year of {group: value} data to a dataset, or update groups of a year it has.
+
+    Groups left out keep the year's stored values; a new year needs a value
+    for every group of the dataset.
+    """
+    table = load(name, data_dir=data_dir)
+    description = (table.schema.metadata or {}).get(b'description', b'').decode('utf-8')
+    long = table.to_pandas()
+    groups = list(long['group'].cat.categories)
+    unknown = set(values) - set(groups)
+    if unknown:
+        raise ValueError(f"Unknown groups for dataset '{name}': {sorted(unknown)}")
+    replaced = (long['year'] == year) & long['group'].isin(list(values))
+    missing = set(groups) - set(values) - set(long.loc[long['year'] == year, 'group'])
+    if missing:
+        raise ValueError(f"No {year} values for groups of dataset '{name}': {sorted(missing)}")
+    new = pd.DataFrame({
+        'year': year,
+        'group': pd.Categorical(list(values), categories=groups),
+        'value': list(values.values()),
+    })
+    long = pd.concat([long[~replaced], new], ignore_index=True)
+    write_dataset(name, long, description=description, data_dir=data_dir)
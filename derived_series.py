@@ -0,0 +1,56 @@
+# Series derived from the datasets in data/ (see data_layer.py), computed one
+# year at a time so that derived_store.py can keep them as per-year partitions.
+#
+# Each entry names its source dataset, a `compute(year, row)` function that
+# maps one year's {group: value} row to the derived row, a `version` to bump
+# whenever the computation changes, and the chart scripts that plot it.
+
+from functools import partial
+
+ADJUSTED_HIGHEST_QUINTILE = 'Highest Quintile (80-99th percentile)'
+
+
+def adjusted_highest_quintile(top_quintile, top_1):
+    # Formula: [20 × Value(Top Quintile) - 1 × Value(Top 1%)] ÷ 19
+    return (20 * top_quintile - 1 * top_1) / 19
+
+
+def adjust_highest_quintile(year, row, source='Highest Quintile', target=ADJUSTED_HIGHEST_QUINTILE):
+    """Replace the top quintile with the 80-99th percentile (excluding the Top 1%)."""
+    adjusted = round(adjusted_highest_quintile(row[source], row['Top 1%']), 1)
+    return {target if group == source else group: adjusted if group == source else value
+            for group, value in row.items()}
+
+
+DERIVED_SERIES = {
+    'federal_rates_stepped_adjusted': dict(
+        source='federal_rates_stepped',
+        compute=adjust_highest_quintile,
+        version=1,
+        charts=['tax_rates_visualization_adjusted.py'],
+    ),
+    'federal_rates_decadal_adjusted': dict(
+        source='federal_rates_decadal',
+        compute=adjust_highest_quintile,
+        version=1,
+        charts=['tax_rates_bar_visualization_adjusted.py'],
+    ),
+    'income_only_rates_decadal_adjusted': dict(
+        source='income_only_rates_decadal',
+        compute=adjust_highest_quintile,
+        version=1,
+        charts=['tax_rates_visualization_income_only_adjusted.py'],
+    ),
+    'state_rates_decadal_adjusted': dict(
+        source='state_rates_decadal',
+        compute=adjust_highest_quintile,
+        version=1,
+        charts=['state_tax_rates_bar_visualization.py'],
+    ),
+    'real_income_per_capita_adjusted': dict(
+        source='real_income_per_capita',
+        compute=partial(adjust_highest_quintile, source='Top 20%', target='Top 20% (80-99th percentile)'),
+        version=1,
+        charts=['income_per_capita_visualization.py'],
+    ),
+}
@@ -0,0 +1,80 @@
+# Append-only, year-partitioned storage for derived series
+#
+# Every derived series is a directory under derived/ holding one JSON file per
+# year. Each partition records a fingerprint of the inputs it was computed
+# from (the source row, the year and the series version), so an update only
+# recomputes years that are new or whose inputs changed. Adding a year to a
+# source dataset therefore writes a single new partition.
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from data_layer import load_wide
+from derived_series import DERIVED_SERIES
+
+DERIVED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'derived')
+
+
+def partition_path(series, year, root=DERIVED_DIR):
+    return os.path.join(root, series, f'{year}.json')
+
+
+def input_fingerprint(year, row, version):
+    payload = json.dumps({'year': int(year), 'row': row, 'version': version}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def read_partition(series, year, root=DERIVED_DIR):
+    """Stored partition for `year` as {'inputs': fingerprint, 'row': {...}}, or None."""
+    try:
+        with open(partition_path(series, year, root)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_partition(series, year, fingerprint, row, root=DERIVED_DIR):
+    path = partition_path(series, year, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so readers never see a partial partition
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'year': int(year), 'inputs': fingerprint, 'row': row}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def source_rows(dataset):
+    """Yield (year, {group: value}) for each year of a source dataset."""
+    wide = load_wide(dataset)
+    groups = [column for column in wide.columns if column != 'Year']
+    for _, record in wide.iterrows():
+        yield int(record['Year']), {group: float(record[group]) for group in groups}
+
+
+def update_series(series, root=DERIVED_DIR):
+    """Compute missing or stale partitions of `series`; returns the years written."""
+    spec = DERIVED_SERIES[series]
+    written = []
+    for year, row in source_rows(spec['source']):
+        fingerprint = input_fingerprint(year, row, spec['version'])
+        stored = read_partition(series, year, root)
+        if stored is None or stored['inputs'] != fingerprint:
+            write_partition(series, year, fingerprint, spec['compute'](year, row), root)
+            written.append(year)
+    return written
+
+
+def load_series(series, root=DERIVED_DIR, update=True):
+    """Derived series as a DataFrame with a 'Year' column, one row per source year."""
+    if update:
+        update_series(series, root)
+    records = []
+    for year, _ in source_rows(DERIVED_SERIES[series]['source']):
+        stored = read_partition(series, year, root)
+        if stored is None:
+            raise FileNotFoundError(f"Missing partition {year} of derived series '{series}'")
+        records.append({'Year': year, **stored['row']})
+    return pd.DataFrame.from_records(records)
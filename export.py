@@ -0,0 +1,172 @@
+# Batch static image export of the charts
+#
+# `fig.write_image` per chart starts a headless renderer for every script
+# run. This export runs every chart in one process and streams the figures
+# through a fixed pool of persistent kaleido renderers, each started once
+# and fed one image after another, while the next chart is being built (its
+# committed page is left untouched):
+#
+#   exports/<chart>-<width>x<height>.<format>
+#
+# A manifest (exports/export.json) records the hash of the figure and
+# options behind each image, so images whose figure has not changed are
+# skipped without rendering.
+#
+#   python export.py                                    # every chart, PNG 1200x700
+#   python export.py --formats png svg --sizes 1200x700 800x600 --scale 2
+#   python export.py tax_rates_visualization.py --store microdata/synthetic --renderers 2
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly
+from kaleido.scopes.plotly import PlotlyScope
+from plotly.io.json import to_json_plotly
+
+from watch import REPO_DIR, build_chart, chart_scripts
+
+EXPORT_DIR = os.path.join(REPO_DIR, 'exports')
+MANIFEST = 'export.json'
+FORMATS = ('png',)
+SIZES = ('1200x700',)
+PLOTLY_JS = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+
+
+def _size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+class RendererPool:
+    """Persistent kaleido renderers, each rendering one image at a time.
+
+    Images are rendered on `renderers` threads, one per renderer process,
+    so `submit` returns at once and the caller can build the next figure.
+    """
+
+    def __init__(self, renderers=1):
+        self._scopes = queue.Queue()
+        for _ in range(renderers):
+            # The bundled plotly.js, so rendering needs no network
+            self._scopes.put(PlotlyScope(plotlyjs=PLOTLY_JS, mathjax=False))
+        self._threads = ThreadPoolExecutor(renderers)
+
+    def _render(self, figure, path, **options):
+        scope = self._scopes.get()
+        try:
+            image = scope.transform(figure, **options)
+        finally:
+            self._scopes.put(scope)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_path, path)
+        return path
+
+    def submit(self, figure, path, format, width, height, scale=1):
+        """Render `figure` (a figure dict) to `path`; returns a future of the path."""
+        return self._threads.submit(self._render, figure, path, format=format, width=width, height=height,
+                                    scale=scale)
+
+    def close(self):
+        self._threads.shutdown()
+        while not self._scopes.empty():
+            self._scopes.get()._shutdown_kaleido()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_manifest(export_dir=EXPORT_DIR):
+    try:
+        with open(os.path.join(export_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(manifest, export_dir):
+    path = os.path.join(export_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def export_charts(charts, formats=FORMATS, sizes=SIZES, scale=1, store=None, export_dir=EXPORT_DIR,
+                  renderers=1, force=False):
+    """Export every chart in every format and size.
+
+    Returns the rendered paths, the paths skipped as unchanged and
+    {chart name or image file name: error} for charts that failed to build
+    and images that failed to render.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    manifest = read_manifest(export_dir)
+    rendered, skipped, pending, failed = [], [], [], {}
+    try:
+        with RendererPool(renderers) as pool:
+            for chart in charts:
+                name = os.path.splitext(os.path.basename(chart))[0]
+                try:
+                    figure = build_chart(chart, store, write_page=False)
+                except Exception as error:
+                    failed[name] = error
+                    continue
+                if figure is None:
+                    failed[name] = ValueError("no figure named 'fig'")
+                    continue
+                figure = figure.to_dict()
+                figure_json = to_json_plotly(figure)
+                for width, height in map(_size, sizes):
+                    for format in formats:
+                        filename = f'{name}-{width}x{height}.{format}'
+                        path = os.path.join(export_dir, filename)
+                        digest = hashlib.sha256(f'{figure_json}|{format}|{width}|{height}|{scale}'.encode()).hexdigest()
+                        if not force and manifest.get(filename) == digest and os.path.exists(path):
+                            skipped.append(path)
+                            continue
+                        pending.append((filename, digest, pool.submit(figure, path, format, width, height, scale)))
+            for filename, digest, future in pending:
+                try:
+                    rendered.append(future.result())
+                except Exception as error:
+                    failed[filename] = error
+    finally:
+        # Record every image that did render, even if the export stopped early
+        for filename, digest, future in pending:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                manifest[filename] = digest
+        _write_manifest(manifest, export_dir)
+    return rendered, skipped, failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the charts as static images through persistent renderers")
+    parser.add_argument('charts', nargs='*', help="Chart scripts (default: every chart)")
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS), choices=['png', 'jpeg', 'webp', 'svg', 'pdf'])
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES), metavar='WIDTHxHEIGHT')
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--store', help="Microdata store passed to charts that take one")
+    parser.add_argument('--out', default=EXPORT_DIR, help="Output directory")
+    parser.add_argument('--renderers', type=int, default=1, help="Renderer processes to run at once")
+    parser.add_argument('--force', action='store_true', help="Render even images whose figure is unchanged")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out)
+    charts = [os.path.abspath(chart) for chart in args.charts] or chart_scripts()
+    os.chdir(REPO_DIR)
+    start = time.perf_counter()
+    rendered, skipped, failed = export_charts(charts, args.formats, args.sizes, args.scale, args.store, out,
+                                              args.renderers, args.force)
+    for name, error in failed.items():
+        print(f"{name}: failed ({type(error).__name__}: {error})")
+    print(f"Rendered {len(rendered)} images and skipped {len(skipped)} unchanged in "
+          f"{time.perf_counter() - start:.1f}s to '{out}'")
@@ -0,0 +1,219 @@
+# Payroll and corporate tax incidence for return-level microdata
+#
+# Payroll taxes, employee and employer shares alike, fall on the worker:
+# each return's wages and self-employment income are taxed at the year's
+# rates up to the wage bases. Returns are tax units, so joint returns get
+# two wage bases (their earnings are assumed to be split between spouses).
+#
+# Corporate income tax receipts are allocated to returns: `capital_share`
+# of each year's receipts in proportion to capital income (interest,
+# dividends, capital gains and business income, net of losses) and the rest
+# in proportion to labor income, as CBO (75/25) and Treasury (82/18) do.
+# The allocation assumes the weights represent every return filed.
+#
+# The employer payroll share and the allocated corporate tax are part of
+# each return's pre-tax income, so rates for all federal taxes use that
+# broader income while income tax rates stay on AGI. Both chart families
+# come from one pass: AGI, earned income and the percentile bins are
+# computed once and every measure lands in the same aggregate cube.
+#
+#   python incidence.py microdata/returns --capital-share 0.75 --write
+#
+# --write replaces data/federal_rates and data/income_only_rates, keeping
+# their groups, so the rate charts plot the microdata.
+
+import argparse
+import os
+
+import numpy as np
+
+from aggregate_cube import QUINTILES, TOP_GROUPS, build_cube, percentile_bins
+from data_layer import DATA_DIR, dataset_groups, dataset_path, to_long, write_dataset
+from microdata_tax import (adjusted_gross_income, capital_income, column, column_or_zero, earned_income,
+                           federal_income_tax, year_indices)
+from tax_law import FILING_STATUSES, payroll_schedule
+
+# Federal corporate income tax receipts by fiscal year ($ billions, OMB
+# Historical Tables). 2025 is an estimate.
+CORPORATE_TAX_RECEIPTS = {
+    1950: 10.4, 1951: 14.1, 1952: 21.2, 1953: 21.2, 1954: 21.1,
+    1955: 17.9, 1956: 20.9, 1957: 21.2, 1958: 20.1, 1959: 17.3,
+    1960: 21.5, 1961: 21.0, 1962: 20.5, 1963: 21.6, 1964: 23.5,
+    1965: 25.5, 1966: 30.1, 1967: 34.0, 1968: 28.7, 1969: 36.7,
+    1970: 32.8, 1971: 26.8, 1972: 32.2, 1973: 36.2, 1974: 38.6,
+    1975: 40.6, 1976: 41.4, 1977: 54.9, 1978: 60.0, 1979: 65.7,
+    1980: 64.6, 1981: 61.1, 1982: 49.2, 1983: 37.0, 1984: 56.9,
+    1985: 61.3, 1986: 63.1, 1987: 83.9, 1988: 94.5, 1989: 103.3,
+    1990: 93.5, 1991: 98.1, 1992: 100.3, 1993: 117.5, 1994: 140.4,
+    1995: 157.0, 1996: 171.8, 1997: 182.3, 1998: 188.7, 1999: 184.7,
+    2000: 207.3, 2001: 151.1, 2002: 148.0, 2003: 131.8, 2004: 189.4,
+    2005: 278.3, 2006: 353.9, 2007: 370.2, 2008: 304.3, 2009: 138.2,
+    2010: 191.4, 2011: 181.1, 2012: 242.3, 2013: 273.5, 2014: 320.7,
+    2015: 343.8, 2016: 299.6, 2017: 297.0, 2018: 204.7, 2019: 230.2,
+    2020: 211.8, 2021: 371.8, 2022: 424.9, 2023: 419.6, 2024: 529.9,
+    2025: 450.0,
+}
+
+# Share of the corporate income tax borne by capital (CBO's assumption)
+CAPITAL_SHARE = 0.75
+
+# Chart datasets written from the cube: (numerator, denominator, description)
+CHART_DATASETS = {
+    'federal_rates': ('federal_tax', 'broad_income', 'Effective federal tax rates, all federal taxes (%)'),
+    'income_only_rates': ('federal_income_tax', 'income',
+                          'Effective federal income tax rates excluding payroll and corporate taxes (%)'),
+}
+
+_JOINT = FILING_STATUSES.index('married_joint')
+
+
+def payroll_tables(years, statuses=FILING_STATUSES):
+    """Per-year payroll tax parameters as arrays, with rates as fractions."""
+    years = np.asarray(years)
+    schedules = [payroll_schedule(int(year)) for year in years]
+
+    def rates(key):
+        return np.array([schedule[key] / 100 for schedule in schedules])
+
+    return dict(
+        years=years,
+        oasdi_rate=rates('oasdi_rate'),
+        oasdi_base=np.array([schedule['oasdi_base'] for schedule in schedules], dtype=np.float64),
+        hi_rate=rates('hi_rate'),
+        hi_base=np.array([schedule['hi_base'] for schedule in schedules], dtype=np.float64),
+        se_share=np.array([schedule['se_share'] for schedule in schedules], dtype=np.float64),
+        se_earnings=np.array([schedule['se_earnings'] for schedule in schedules]),
+        additional_hi_rate=rates('additional_hi_rate'),
+        additional_hi_threshold=np.array([[schedule['additional_hi_threshold'][status] for status in statuses]
+                                          for schedule in schedules], dtype=np.float64),
+    )
+
+
+def payroll_tax(wages, self_employment, status_idx, year_idx, tables):
+    """Employer and worker payroll taxes for every return.
+
+    Returns (employer, worker): the employer share of taxes on wages, and
+    the employee share plus self-employment and additional Medicare taxes.
+    """
+    wages = np.maximum(wages, 0)
+    self_employment = np.maximum(self_employment, 0) * tables['se_earnings'][year_idx]
+    earners = np.where(status_idx == _JOINT, 2, 1)
+
+    def taxed(base):
+        # Wages use the base first; self-employment income gets what is left
+        base = base[year_idx] * earners
+        return np.minimum(wages, base), np.minimum(self_employment, np.maximum(base - wages, 0))
+
+    oasdi_wages, oasdi_self_employment = taxed(tables['oasdi_base'])
+    hi_wages, hi_self_employment = taxed(tables['hi_base'])
+    oasdi_rate, hi_rate = tables['oasdi_rate'][year_idx], tables['hi_rate'][year_idx]
+    se_oasdi_share, se_hi_share = np.moveaxis(tables['se_share'][year_idx], -1, 0)
+
+    employer = oasdi_rate * oasdi_wages
+    employer += hi_rate * hi_wages
+    employer *= 0.5
+    worker = employer.copy()
+    worker += se_oasdi_share * oasdi_rate * oasdi_self_employment
+    worker += se_hi_share * hi_rate * hi_self_employment
+    worker += tables['additional_hi_rate'][year_idx] * np.maximum(
+        wages + self_employment - tables['additional_hi_threshold'][year_idx, status_idx], 0)
+    return employer, worker
+
+
+def corporate_receipts(years):
+    """Corporate income tax receipts in dollars for each year."""
+    missing = sorted(set(int(year) for year in years) - set(CORPORATE_TAX_RECEIPTS))
+    if missing:
+        raise ValueError(f"No corporate tax receipts for {missing}")
+    return np.array([CORPORATE_TAX_RECEIPTS[int(year)] * 1e9 for year in years])
+
+
+def corporate_tax(year_idx, capital, labor, weight, receipts, capital_share=CAPITAL_SHARE):
+    """Corporate income tax allocated to every return.
+
+    `receipts` holds each year's total; `capital_share` of it is spread over
+    the weighted positive capital income of the year and the rest over
+    labor income.
+    """
+    capital = np.maximum(capital, 0)
+    labor = np.maximum(labor, 0)
+    n_years = len(receipts)
+    capital_total = np.bincount(year_idx, weights=weight * capital, minlength=n_years)
+    labor_total = np.bincount(year_idx, weights=weight * labor, minlength=n_years)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        capital_rate = np.where(capital_total > 0, capital_share * receipts / capital_total, 0)
+        labor_rate = np.where(labor_total > 0, (1 - capital_share) * receipts / labor_total, 0)
+    return capital * capital_rate[year_idx] + labor * labor_rate[year_idx]
+
+
+def incidence_measures(returns, capital_share=CAPITAL_SHARE, tables=None):
+    """Per-return income and federal taxes, from one pass over the microdata.
+
+    Returns a dict of arrays: 'income' (AGI), 'broad_income' (AGI plus the
+    employer payroll share and allocated corporate tax), and
+    'federal_income_tax', 'payroll_tax', 'corporate_tax' and their sum
+    'federal_tax'.
+    """
+    year_idx, tables = year_indices(returns, tables)
+    weight = column(returns, 'weight', np.float64)
+    status_idx = column(returns, 'filing_status')
+    agi = adjusted_gross_income(returns)
+    earned = earned_income(returns)
+
+    income_tax = federal_income_tax(returns, tables, agi=agi, earned=earned)
+    employer, worker = payroll_tax(column_or_zero(returns, 'wages'),
+                                   column_or_zero(returns, 'self_employment_income'),
+                                   status_idx, year_idx, payroll_tables(tables['years']))
+    corporate = corporate_tax(year_idx, capital_income(returns), earned, weight,
+                              corporate_receipts(tables['years']), capital_share)
+    payroll = employer + worker
+    return dict(
+        income=agi,
+        broad_income=agi + employer + corporate,
+        federal_income_tax=income_tax,
+        payroll_tax=payroll,
+        corporate_tax=corporate,
+        federal_tax=income_tax + payroll + corporate,
+    )
+
+
+def build_incidence_cube(returns, capital_share=CAPITAL_SHARE):
+    """Aggregate cube of incidence_measures, with returns ranked by AGI within each year."""
+    measures = incidence_measures(returns, capital_share=capital_share)
+    years = column(returns, 'year')
+    weight = column(returns, 'weight', np.float64)
+    bins = percentile_bins(years, measures['income'], weight)
+    return build_cube(years, bins, column(returns, 'state'), weight, measures)
+
+
+def chart_rates(cube, groups=QUINTILES + TOP_GROUPS, data_dir=DATA_DIR):
+    """Chart-shaped rate frames for CHART_DATASETS, in the groups of existing datasets."""
+    frames = {}
+    for name, (numerator, denominator, _) in CHART_DATASETS.items():
+        chart_groups = dataset_groups(name, data_dir) if os.path.exists(dataset_path(name, data_dir)) else groups
+        frames[name] = cube.series(numerator, denominator, groups=chart_groups)
+    return frames
+
+
+def save_chart_rates(frames, data_dir=DATA_DIR):
+    for name, frame in frames.items():
+        write_dataset(name, to_long(frame), description=CHART_DATASETS[name][2], data_dir=data_dir)
+
+
+if __name__ == '__main__':
+    from microdata_store import MicrodataStore
+
+    parser = argparse.ArgumentParser(description="Effective rates for all federal taxes and income tax alone")
+    parser.add_argument('store_dir')
+    parser.add_argument('--capital-share', type=float, default=CAPITAL_SHARE,
+                        help="Share of the corporate tax borne by capital")
+    parser.add_argument('--write', action='store_true', help="Replace the rate chart datasets in data/")
+    args = parser.parse_args()
+
+    frames = chart_rates(build_incidence_cube(MicrodataStore(args.store_dir), capital_share=args.capital_share))
+    for name, frame in frames.items():
+        print(f"{name}:")
+        print(frame.round(1).to_string(index=False))
+    if args.write:
+        save_chart_rates(frames)
+        print(f"Saved {', '.join(frames)} to '{DATA_DIR}'")
@@ -1,22 +1,9 @@
-import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 
-# Create the data
-years = np.arange(1950, 2026, 5)
-data = {
-    'Year': years,
-    'Lowest Quintile': [15000, 18000, 22000, 25000, 28000, 30000, 32000, 35000, 38000, 40000, 42000, 45000, 48000, 50000, 52000, 55000],
-    'Second Quintile': [25000, 30000, 35000, 40000, 45000, 50000, 55000, 60000, 65000, 70000, 75000, 80000, 85000, 90000, 95000, 100000],
-    'Middle Quintile': [35000, 42000, 50000, 58000, 65000, 72000, 80000, 88000, 95000, 100000, 105000, 110000, 115000, 120000, 125000, 130000],
-    'Fourth Quintile': [45000, 55000, 65000, 75000, 85000, 95000, 105000, 115000, 125000, 135000, 145000, 155000, 165000, 175000, 185000, 195000],
-    'Highest Quintile': [65000, 80000, 95000, 110000, 125000, 140000, 155000, 170000, 185000, 200000, 215000, 230000, 245000, 260000, 275000, 290000],
-    'Top 1%': [150000, 200000, 250000, 300000, 350000, 400000, 450000, 500000, 550000, 600000, 650000, 700000, 750000, 800000, 850000, 900000],
-    'Top 0.1%': [500000, 700000, 900000, 1100000, 1300000, 1500000, 1700000, 1900000, 2100000, 2300000, 2500000, 2700000, 2900000, 3100000, 3300000, 3500000]
-}
+from data_layer import load_wide
 
-df = pd.DataFrame(data)
+# Load the data
+df = load_wide('median_income')
 
 # Reorder columns based on the first year's income (descending order)
 first_year_income = df.iloc[0].drop('Year')
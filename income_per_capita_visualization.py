@@ -1,46 +1,10 @@
-import pandas as pd
 import plotly.graph_objects as go
-import numpy as np
 
-# Create the data
-years = [1950, 1960, 1970, 1980, 1990, 2000, 2010, 2020]
+from derived_store import load_series
 
-# Calculate adjusted Top 20% (80-99th percentile)
-# Formula: [20 × Income(Top Quintile) - 1 × Income(Top 1%)] ÷ 19
-top_20_adjusted = []
-for i in range(len(years)):
-    adjusted_income = (20 * 85 - 1 * 250) / 19  # 1950
-    if i == 0:
-        adjusted_income = (20 * 85 - 1 * 250) / 19
-    elif i == 1:
-        adjusted_income = (20 * 102 - 1 * 300) / 19
-    elif i == 2:
-        adjusted_income = (20 * 122 - 1 * 360) / 19
-    elif i == 3:
-        adjusted_income = (20 * 135 - 1 * 400) / 19
-    elif i == 4:
-        adjusted_income = (20 * 150 - 1 * 450) / 19
-    elif i == 5:
-        adjusted_income = (20 * 170 - 1 * 520) / 19
-    elif i == 6:
-        adjusted_income = (20 * 180 - 1 * 550) / 19
-    else:  # 2020
-        adjusted_income = (20 * 185 - 1 * 580) / 19
-    top_20_adjusted.append(round(adjusted_income, 1))
-
-# Income per capita data (in 2022 dollars, thousands)
-data = {
-    'Year': years,
-    'Bottom 20%': [10, 12, 15, 17, 18, 20, 21, 22],
-    'Second 20%': [20, 24, 28, 32, 35, 38, 40, 42],
-    'Middle 20%': [32, 38, 45, 50, 54, 58, 60, 62],
-    'Fourth 20%': [45, 54, 65, 72, 78, 85, 88, 90],
-    'Top 20% (80-99th percentile)': top_20_adjusted,
-    'Top 1%': [250, 300, 360, 400, 450, 520, 550, 580],
-    'Top 0.1%': [500, 600, 720, 800, 900, 1040, 1100, 1160]
-}
-
-df = pd.DataFrame(data)
+# Load the data with the Highest Quintile adjusted to exclude the Top 1%
+# (80-99th percentile), read from the per-year derived series partitions
+df = load_series('real_income_per_capita_adjusted')
 
 # Create the figure
 fig = go.Figure()
@@ -0,0 +1,214 @@
+# Weighted inequality metrics by year: Lorenz curves, Gini and Theil indices
+#
+# Exact metrics sort all returns once by (year, income) and take cumulative
+# sums of weights and weighted incomes; per-year totals come from the year
+# boundaries of that single sorted pass, so 75 years cost one sort.
+#
+# IncomeSketch is the streaming alternative for data that does not fit in
+# memory: a mergeable histogram per year with log-spaced buckets (each
+# bucket spans a fixed relative width, as in DDSketch) holding the sum of
+# weights and of weighted incomes. Chunks are added as they are read,
+# quantiles are accurate to `relative_accuracy`, Lorenz points at bucket
+# edges are exact, and the Gini index only misses inequality within
+# buckets. Theil sums are accumulated exactly.
+#
+# Theil indices cover positive incomes only; Lorenz curves and Gini indices
+# include zero and negative incomes (which can push the Gini above 1).
+#
+#   python inequality.py microdata/returns [--streaming]
+
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+from microdata_tax import adjusted_gross_income, column
+
+# Population shares (%) at which Lorenz curves are sampled
+LORENZ_POINTS = np.linspace(0, 100, 101)
+
+
+def _year_segments(sorted_year_idx, n_years):
+    # First and one-past-last row of every year in rows sorted by year
+    starts = np.searchsorted(sorted_year_idx, np.arange(n_years), side='left')
+    ends = np.searchsorted(sorted_year_idx, np.arange(n_years), side='right')
+    return starts, ends
+
+
+def _lorenz(year_idx, weight, income_sum, n_years, points=LORENZ_POINTS):
+    """Gini indices and sampled Lorenz curves from atoms sorted by (year, income).
+
+    Each atom is a return (or a sketch bucket) with a weight and a weighted
+    income sum. Returns (gini, lorenz) with lorenz as (years, points) income
+    shares in percent.
+    """
+    starts, ends = _year_segments(year_idx, n_years)
+    cumulative_weight = np.cumsum(weight)
+    cumulative_income = np.cumsum(income_sum)
+    weight_before = np.where(starts > 0, cumulative_weight[np.maximum(starts, 1) - 1], 0)
+    income_before = np.where(starts > 0, cumulative_income[np.maximum(starts, 1) - 1], 0)
+    total_weight = np.where(ends > starts, cumulative_weight[np.maximum(ends, 1) - 1], 0) - weight_before
+    total_income = np.where(ends > starts, cumulative_income[np.maximum(ends, 1) - 1], 0) - income_before
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        population = (cumulative_weight - weight_before[year_idx]) / total_weight[year_idx]
+        share = (cumulative_income - income_before[year_idx]) / total_income[year_idx]
+        share_before = share - income_sum / total_income[year_idx]
+        # Trapezoids under the Lorenz curve: G = 1 - sum(dp * (L[i-1] + L[i]))
+        area = np.bincount(year_idx, weights=weight / total_weight[year_idx] * (share_before + share),
+                           minlength=n_years)
+        gini = np.where(total_weight > 0, 1 - area, np.nan)
+
+    # Interpolate every year at once: offsetting each year's population
+    # shares (0..1) by twice its index keeps the concatenated x values
+    # increasing without one year's end touching the next year's start
+    x = np.concatenate([2 * np.arange(n_years, dtype=np.float64), 2 * year_idx + population])
+    y = np.concatenate([np.zeros(n_years), share])
+    order = np.argsort(x, kind='stable')
+    targets = (2 * np.arange(n_years)[:, np.newaxis] + np.asarray(points)[np.newaxis, :] / 100).ravel()
+    lorenz = np.interp(targets, x[order], y[order]).reshape(n_years, len(points))
+    lorenz[total_weight == 0] = np.nan
+    return gini, 100 * lorenz
+
+
+def _theil(weight_sum, income_sum, income_log_income_sum):
+    # T = sum(w x ln x) / sum(w x) - ln(mean x), over positive incomes
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return income_log_income_sum / income_sum - np.log(income_sum / weight_sum)
+
+
+def _positive_sums(year_idx, income, weight, n_years):
+    positive = income > 0
+    w, x, y = weight[positive], income[positive], year_idx[positive]
+    return (np.bincount(y, weights=w, minlength=n_years),
+            np.bincount(y, weights=w * x, minlength=n_years),
+            np.bincount(y, weights=w * x * np.log(x), minlength=n_years))
+
+
+def _frames(years, gini, theil, lorenz, points):
+    metrics = pd.DataFrame({'Year': years, 'Gini': gini, 'Theil': theil})
+    curves = pd.DataFrame(lorenz, columns=[float(point) for point in points])
+    curves.insert(0, 'Year', years)
+    return metrics, curves
+
+
+def inequality_metrics(years, income, weight, points=LORENZ_POINTS):
+    """Exact Gini and Theil indices and Lorenz curves for every year.
+
+    Returns a frame of ('Year', 'Gini', 'Theil') and a frame of Lorenz curves
+    ('Year' plus the income share, in percent, held by the bottom `points`
+    percent of the weighted population).
+    """
+    income = np.asarray(income, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    metric_years, year_idx = np.unique(years, return_inverse=True)
+    order = np.lexsort((income, year_idx))
+    sorted_year_idx, sorted_weight = year_idx[order], weight[order]
+    gini, lorenz = _lorenz(sorted_year_idx, sorted_weight, sorted_weight * income[order], len(metric_years), points)
+    theil = _theil(*_positive_sums(year_idx, income, weight, len(metric_years)))
+    return _frames(metric_years, gini, theil, lorenz, points)
+
+
+class IncomeSketch:
+    """Mergeable per-year histogram of weighted incomes in log-spaced buckets.
+
+    Bucket k > 0 holds magnitudes in (min_income * g**(k-1), min_income * g**k]
+    with g = (1 + a) / (1 - a) for relative accuracy a; magnitudes below
+    `min_income` share one zero bucket. Negative incomes mirror the positive
+    buckets, so bucket order follows income order.
+    """
+
+    def __init__(self, years, relative_accuracy=0.005, min_income=1.0, max_income=1e11):
+        self.years = np.asarray(sorted(int(year) for year in years))
+        self.relative_accuracy = relative_accuracy
+        self.min_income = min_income
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.n_magnitudes = math.ceil(math.log(max_income / min_income) / math.log(self.gamma))
+        shape = (len(self.years), 2 * self.n_magnitudes + 1)
+        self.weights = np.zeros(shape)
+        self.sums = np.zeros(shape)
+        # Exact per-year sums over positive incomes, for the Theil index
+        self.positive = np.zeros((3, len(self.years)))
+
+    def _buckets(self, income):
+        magnitude = np.abs(income)
+        with np.errstate(divide='ignore'):
+            k = np.ceil(np.log(magnitude / self.min_income) / np.log(self.gamma))
+        k = np.where(magnitude < self.min_income, 0, np.clip(k, 1, self.n_magnitudes)).astype(np.int64)
+        return self.n_magnitudes + np.sign(income).astype(np.int64) * k
+
+    def update(self, years, income, weight):
+        """Add a chunk of returns."""
+        income = np.asarray(income, dtype=np.float64)
+        weight = np.asarray(weight, dtype=np.float64)
+        year_idx = np.searchsorted(self.years, years)
+        if np.any(year_idx >= len(self.years)) or np.any(self.years[np.minimum(year_idx, len(self.years) - 1)] != years):
+            raise ValueError("Returns include years the sketch was not created for")
+        cells = year_idx * self.weights.shape[1] + self._buckets(income)
+        size = self.weights.size
+        self.weights += np.bincount(cells, weights=weight, minlength=size).reshape(self.weights.shape)
+        self.sums += np.bincount(cells, weights=weight * income, minlength=size).reshape(self.sums.shape)
+        self.positive += np.stack(_positive_sums(year_idx, income, weight, len(self.years)))
+        return self
+
+    def merge(self, other):
+        """Add another sketch with the same years and bucket layout (e.g. from another worker)."""
+        if not (np.array_equal(self.years, other.years) and self.weights.shape == other.weights.shape
+                and self.gamma == other.gamma and self.min_income == other.min_income):
+            raise ValueError("Sketches have different layouts")
+        self.weights += other.weights
+        self.sums += other.sums
+        self.positive += other.positive
+        return self
+
+    def _bucket_values(self):
+        # Representative value of each bucket: the midpoint in relative terms
+        k = np.arange(-self.n_magnitudes, self.n_magnitudes + 1)
+        magnitude = self.min_income * 2 * self.gamma ** np.abs(k) / (self.gamma + 1)
+        return np.where(k == 0, 0.0, np.sign(k) * magnitude)
+
+    def quantiles(self, q):
+        """Weighted income quantiles (q in [0, 1]) as a (years, len(q)) array."""
+        q = np.atleast_1d(q)
+        cumulative = np.cumsum(self.weights, axis=1)
+        values = self._bucket_values()
+        result = np.full((len(self.years), len(q)), np.nan)
+        for i, row in enumerate(cumulative):
+            if row[-1] > 0:
+                result[i] = values[np.minimum(np.searchsorted(row, q * row[-1], side='left'), len(values) - 1)]
+        return result
+
+    def metrics(self, points=LORENZ_POINTS):
+        """Approximate Gini and exact Theil indices, and Lorenz curves, as in inequality_metrics."""
+        year_idx, bucket = np.nonzero(self.weights)
+        gini, lorenz = _lorenz(year_idx, self.weights[year_idx, bucket], self.sums[year_idx, bucket],
+                               len(self.years), points)
+        return _frames(self.years, gini, _theil(*self.positive), lorenz, points)
+
+
+def microdata_inequality(returns, points=LORENZ_POINTS):
+    """Exact metrics of adjusted gross income from return-level microdata."""
+    return inequality_metrics(column(returns, 'year'), adjusted_gross_income(returns),
+                              column(returns, 'weight', np.float64), points)
+
+
+def streaming_inequality(store, points=LORENZ_POINTS, relative_accuracy=0.005, chunk_rows=1_000_000):
+    """Approximate metrics of adjusted gross income, reading a MicrodataStore in chunks."""
+    sketch = IncomeSketch(np.unique(store.column('year')), relative_accuracy=relative_accuracy)
+    for chunk in store.iter_chunks(chunk_rows=chunk_rows):
+        sketch.update(column(chunk, 'year'), adjusted_gross_income(chunk), column(chunk, 'weight', np.float64))
+    return sketch.metrics(points)
+
+
+if __name__ == '__main__':
+    from microdata_store import MicrodataStore
+
+    parser = argparse.ArgumentParser(description="Gini and Theil indices of AGI by year")
+    parser.add_argument('store_dir')
+    parser.add_argument('--streaming', action='store_true', help="Use the approximate streaming sketch")
+    args = parser.parse_args()
+
+    store = MicrodataStore(args.store_dir)
+    metrics, _ = streaming_inequality(store) if args.streaming else microdata_inequality(store)
+    print(metrics.round(4).to_string(index=False))
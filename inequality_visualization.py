@@ -0,0 +1,93 @@
+import sys
+
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from inequality import microdata_inequality
+from microdata_store import MicrodataStore
+
+# Microdata store to summarize (see microdata_store.py)
+store_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/returns'
+
+# Gini and Theil indices of AGI for every year, from one sorted pass
+df, _ = microdata_inequality(MicrodataStore(store_dir))
+
+# Create the figure, with the Theil index on a secondary axis
+fig = make_subplots(specs=[[{'secondary_y': True}]])
+
+colors = {
+    'Gini': '#1f77b4',   # Blue
+    'Theil': '#d62728'   # Red
+}
+
+for column in ['Gini', 'Theil']:
+    fig.add_trace(go.Scatter(
+        x=df['Year'],
+        y=df[column],
+        name=f"{column} Index",
+        mode='lines+markers',
+        line=dict(color=colors[column], width=2),
+        marker=dict(size=6),
+        hovertemplate="Year: %{x}<br>" +
+                     column + " Index: %{y:.3f}<br>" +
+                     "<extra></extra>"
+    ), secondary_y=(column == 'Theil'))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': "Income Inequality: Gini and Theil Indices of Adjusted Gross Income",
+        'y':0.95,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=24)
+    },
+    xaxis_title="Year",
+    hovermode='x unified',
+    template='plotly_white',
+    legend=dict(
+        yanchor="top",
+        y=0.99,
+        xanchor="left",
+        x=0.01,
+        bgcolor='rgba(255, 255, 255, 0.8)'
+    ),
+    margin=dict(l=80, r=80, t=100, b=50),
+    showlegend=True,
+    xaxis=dict(
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+fig.update_yaxes(title_text="Gini Index", tickformat='.2f', gridcolor='lightgrey', gridwidth=1, secondary_y=False)
+fig.update_yaxes(title_text="Theil Index", tickformat='.2f', showgrid=False, secondary_y=True)
+
+# Add annotations for key events
+annotations = [
+    dict(
+        x=1986,
+        y=1,
+        yref='paper',
+        text="Tax Reform Act of 1986",
+        showarrow=False,
+        font=dict(size=12)
+    ),
+    dict(
+        x=2017,
+        y=1,
+        yref='paper',
+        text="Tax Cuts and Jobs Act",
+        showarrow=False,
+        font=dict(size=12)
+    )
+]
+
+fig.update_layout(annotations=annotations)
+
+# Save the figure as an HTML file
+fig.write_html("inequality_visualization.html")
+
+print("Inequality visualization has been created and saved as 'inequality_visualization.html'")
@@ -0,0 +1,97 @@
+import sys
+
+import plotly.graph_objects as go
+
+from inequality import LORENZ_POINTS, microdata_inequality
+from microdata_store import MicrodataStore
+
+# Microdata store to summarize (see microdata_store.py)
+store_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/returns'
+
+# Lorenz curves of AGI for every year, from one sorted pass
+metrics, curves = microdata_inequality(MicrodataStore(store_dir))
+curves = curves.set_index('Year')
+
+# Years shown on the chart (those present in the microdata)
+years = [year for year in [1955, 1965, 1975, 1985, 1990, 2000, 2010, 2020, 2025] if year in curves.index]
+colors = {
+    1955: '#440154',
+    1965: '#472d7b',
+    1975: '#3b528b',
+    1985: '#2c728e',
+    1990: '#21918c',
+    2000: '#28ae80',
+    2010: '#5ec962',
+    2020: '#addc30',
+    2025: '#fde725'
+}
+gini = metrics.set_index('Year')['Gini']
+
+# Create the figure
+fig = go.Figure()
+
+# Line of perfect equality
+fig.add_trace(go.Scatter(
+    x=LORENZ_POINTS,
+    y=LORENZ_POINTS,
+    name="Perfect Equality",
+    mode='lines',
+    line=dict(color='#636363', width=1, dash='dash'),
+    hoverinfo='skip'
+))
+
+for year in years:
+    fig.add_trace(go.Scatter(
+        x=LORENZ_POINTS,
+        y=curves.loc[year],
+        name=f"{year} (Gini {gini[year]:.2f})",
+        mode='lines',
+        line=dict(color=colors[year], width=2),
+        hovertemplate="Year: " + str(year) + "<br>" +
+                     "Bottom %{x:.0f}% of Returns<br>" +
+                     "Share of Income: %{y:.1f}%<br>" +
+                     "<extra></extra>"
+    ))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': "Lorenz Curves of Adjusted Gross Income",
+        'y':0.95,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=24)
+    },
+    xaxis_title="Cumulative Share of Returns (%)",
+    yaxis_title="Cumulative Share of Income (%)",
+    hovermode='closest',
+    template='plotly_white',
+    legend=dict(
+        yanchor="top",
+        y=0.99,
+        xanchor="left",
+        x=0.01,
+        bgcolor='rgba(255, 255, 255, 0.8)'
+    ),
+    margin=dict(l=80, r=30, t=100, b=50),
+    showlegend=True,
+    yaxis=dict(
+        tickformat='.0f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    xaxis=dict(
+        range=[0, 100],
+        tickformat='.0f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+
+# Save the figure as an HTML file
+fig.write_html("lorenz_curves_visualization.html")
+
+print("Lorenz curves visualization has been created and saved as 'lorenz_curves_visualization.html'")
@@ -0,0 +1,91 @@
+import sys
+
+import plotly.graph_objects as go
+
+from animation import animate_years, write_animated_html
+from inequality import LORENZ_POINTS, microdata_inequality
+from microdata_store import MicrodataStore
+
+# Microdata store to summarize (see microdata_store.py)
+store_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/returns'
+
+# Lorenz curves of AGI for every year, from one sorted pass
+metrics, curves = microdata_inequality(MicrodataStore(store_dir))
+curves = curves.set_index('Year')
+
+# Every year in the microdata, one animation frame each
+years = list(curves.index)
+gini = metrics.set_index('Year')['Gini']
+
+# Create the figure
+fig = go.Figure()
+
+# Line of perfect equality
+fig.add_trace(go.Scatter(
+    x=LORENZ_POINTS,
+    y=LORENZ_POINTS,
+    name="Perfect Equality",
+    mode='lines',
+    line=dict(color='#636363', width=1, dash='dash'),
+    hoverinfo='skip'
+))
+
+# One curve, redrawn for each year by the animation
+fig.add_trace(go.Scatter(
+    x=LORENZ_POINTS,
+    y=curves.loc[years[-1]],
+    mode='lines',
+    line=dict(color='#21918c', width=3),
+    hovertemplate="Bottom %{x:.0f}% of Returns<br>" +
+                 "Share of Income: %{y:.1f}%<br>" +
+                 "<extra></extra>"
+))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': "Lorenz Curves of Adjusted Gross Income",
+        'y':0.95,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=24)
+    },
+    xaxis_title="Cumulative Share of Returns (%)",
+    yaxis_title="Cumulative Share of Income (%)",
+    hovermode='closest',
+    template='plotly_white',
+    legend=dict(
+        yanchor="top",
+        y=0.99,
+        xanchor="left",
+        x=0.01,
+        bgcolor='rgba(255, 255, 255, 0.8)'
+    ),
+    margin=dict(l=80, r=30, t=100, b=120),
+    showlegend=True,
+    yaxis=dict(
+        range=[0, 100],
+        tickformat='.0f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    xaxis=dict(
+        range=[0, 100],
+        tickformat='.0f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+
+# Frames carry only the curve and its legend entry; the rest is shared
+frames = animate_years(fig, years, {
+    year: {1: dict(y=curves.loc[year], name=f"{year} (Gini {gini[year]:.2f})")} for year in years
+}, decimals=2)
+
+# Save the figure as an HTML file, with the frames loaded after the page
+write_animated_html(fig, frames, "lorenz_curves_visualization_animated.html", lazy=True)
+
+print("Animated Lorenz curves visualization has been created and saved as 'lorenz_curves_visualization_animated.html'")
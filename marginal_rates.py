@@ -0,0 +1,72 @@
+# Effective marginal tax rates on a dense income grid
+#
+# Total tax (brackets, standard deduction, exemptions and their phase-out,
+# EITC and the child tax credit) is evaluated for every year x filing status
+# x grid point in one batched call to tax_engine.income_tax. Marginal rates
+# are the finite differences of that surface, so phase-out cliffs that fall
+# between coarse sample points show up as spikes on a fine grid.
+
+import numpy as np
+
+import tax_law
+from deflators import CPI_U, price_ratio
+from memoize import memoize
+from tax_engine import build_tables, income_tax
+from tax_law import FILING_STATUSES
+
+# Reference family used for each filing status
+DEFAULT_CHILDREN = {'single': 0, 'married_joint': 2, 'head_of_household': 1}
+
+
+def income_grid(max_income=500000, points=100000):
+    """Evenly spaced incomes from 0 to `max_income` (inclusive)."""
+    return np.linspace(0, max_income, points)
+
+
+def tax_surface(years, grid, statuses=FILING_STATUSES, children=None, price_year=None):
+    """Total income tax for every year x status x grid point.
+
+    With `price_year` set, `grid` is read in constant `price_year` dollars and
+    converted to each year's nominal dollars before the tax is computed.
+    Returns the (years, 1 or statuses, points) nominal incomes and the
+    (years, statuses, points) tax array.
+    """
+    years = np.asarray(years)
+    children = DEFAULT_CHILDREN if children is None else children
+    tables = build_tables(years, statuses)
+
+    incomes = np.asarray(grid, dtype=float)[np.newaxis, np.newaxis, :]
+    if price_year is not None:
+        incomes = incomes * price_ratio(price_year, years)[:, np.newaxis, np.newaxis]
+    year_idx = np.arange(len(years))[:, np.newaxis, np.newaxis]
+    status_idx = np.arange(len(statuses))[np.newaxis, :, np.newaxis]
+    kids = np.array([children[status] for status in statuses])[np.newaxis, :, np.newaxis]
+
+    return incomes, income_tax(incomes, status_idx, year_idx, tables, children=kids)
+
+
+def marginal_rates(incomes, tax):
+    """Forward-difference marginal rates (%) between neighbouring grid points."""
+    return 100 * np.diff(tax, axis=-1) / np.diff(incomes, axis=-1)
+
+
+@memoize(version=2, depends=(
+    tax_law.ORDINARY_SCHEDULES, tax_law.EITC_SCHEDULES, tax_law.CHILD_CREDIT_SCHEDULES, CPI_U,
+))
+def marginal_rate_schedules(years, grid, statuses=FILING_STATUSES, children=None, price_year=None):
+    """Marginal rate (%) for every year x status at the lower edge of each grid step."""
+    incomes, tax = tax_surface(years, grid, statuses=statuses, children=children, price_year=price_year)
+    return marginal_rates(incomes, tax)
+
+
+def step_points(x, rates, tolerance=1e-3):
+    """Reduce a piecewise-constant rate curve to the points where it changes.
+
+    Plotted with a horizontal-then-vertical line shape the result is
+    identical to the full curve, at a small fraction of the points.
+    """
+    rates = np.asarray(rates)
+    keep = np.ones(len(rates), dtype=bool)
+    keep[1:] = np.abs(np.diff(rates)) > tolerance
+    keep[-1] = True
+    return np.asarray(x)[keep], rates[keep]
@@ -0,0 +1,122 @@
+import time
+
+import plotly.graph_objects as go
+import numpy as np
+
+from marginal_rates import DEFAULT_CHILDREN, income_grid, marginal_rate_schedules, step_points
+from tax_law import FILING_STATUSES
+
+# Compute the full marginal rate schedule for every year, filing status and
+# income level ($5 steps up to $500k in 2022 dollars)
+all_years = np.arange(1950, 2026)
+grid = income_grid(max_income=500000, points=100001)
+
+start = time.perf_counter()
+rates = marginal_rate_schedules(all_years, grid, price_year=2022)
+elapsed = time.perf_counter() - start
+print(f"Computed {rates.size:,} marginal rates ({len(all_years)} years x {len(FILING_STATUSES)} "
+      f"filing statuses x {len(grid) - 1:,} income steps) in {elapsed:.1f}s")
+
+# Years shown on the chart
+years = [1955, 1965, 1975, 1985, 1990, 2000, 2010, 2020, 2025]
+colors = {
+    1955: '#440154',
+    1965: '#472d7b',
+    1975: '#3b528b',
+    1985: '#2c728e',
+    1990: '#21918c',
+    2000: '#28ae80',
+    2010: '#5ec962',
+    2020: '#addc30',
+    2025: '#fde725'
+}
+status_labels = {
+    'single': 'Single',
+    'married_joint': 'Married Filing Jointly',
+    'head_of_household': 'Head of Household'
+}
+default_status = 'married_joint'
+
+# Create the figure
+fig = go.Figure()
+
+# Add one trace per year and filing status; only the default status is visible
+for status_index, status in enumerate(FILING_STATUSES):
+    for year in years:
+        x, y = step_points(grid[:-1], rates[year - all_years[0], status_index])
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            name=str(year),
+            mode='lines',
+            line=dict(color=colors[year], width=2, shape='hv'),
+            visible=(status == default_status),
+            hovertemplate="Year: " + str(year) + "<br>" +
+                         "Income: $%{x:,.0f}<br>" +
+                         "Marginal Rate: %{y:.1f}%<br>" +
+                         "<extra></extra>"
+        ))
+
+# Dropdown to switch filing status
+buttons = []
+for status_index, status in enumerate(FILING_STATUSES):
+    visible = [index // len(years) == status_index for index in range(len(FILING_STATUSES) * len(years))]
+    children = DEFAULT_CHILDREN[status]
+    buttons.append(dict(
+        label=f"{status_labels[status]} ({children} {'child' if children == 1 else 'children'})",
+        method='update',
+        args=[{'visible': visible}]
+    ))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': "Effective Federal Marginal Income Tax Rates by Income (1950-2025)<br><sub>Wage income in 2022 Dollars - Includes EITC, Child Tax Credit and Exemption Phase-outs; Spikes Mark Phase-out Cliffs</sub>",
+        'y':0.95,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=24)
+    },
+    xaxis_title="Income (2022 Dollars)",
+    yaxis_title="Effective Marginal Tax Rate (%)",
+    hovermode='closest',
+    template='plotly_white',
+    legend=dict(
+        yanchor="top",
+        y=0.99,
+        xanchor="right",
+        x=0.99,
+        bgcolor='rgba(255, 255, 255, 0.8)'
+    ),
+    updatemenus=[dict(
+        buttons=buttons,
+        active=FILING_STATUSES.index(default_status),
+        direction='down',
+        x=0.01,
+        xanchor='left',
+        y=1.02,
+        yanchor='bottom'
+    )],
+    margin=dict(l=80, r=30, t=140, b=50),
+    showlegend=True,
+    yaxis=dict(
+        range=[-50, 100],
+        tickformat='.0f',
+        gridcolor='lightgrey',
+        gridwidth=1,
+        dtick=10
+    ),
+    xaxis=dict(
+        tickformat='$,.0f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+
+# Save the figure as an HTML file
+fig.write_html("marginal_rates_visualization.html")
+
+print("Marginal rates visualization has been created and saved as 'marginal_rates_visualization.html'")
@@ -0,0 +1,200 @@
+# Disk-backed memoization for deterministic computations
+#
+#   @memoize(version=1, depends=(SOME_TABLE,))
+#   def expensive(values, year, scale=1.0):
+#       ...
+#
+# Results are pickled under .cache/memo/<function>/v<version>/<key>.pkl where
+# the key is a stable hash of the bound arguments (NumPy arrays and pandas
+# objects are hashed by dtype, shape and contents) and of `depends`, the
+# module-level tables the function reads. Bumping `version` invalidates every
+# stored result of that function. The cache is bounded by MEMO_MAX_BYTES and
+# evicts the least recently used entries first; the directory is scanned once
+# per process and again only when a running estimate of its size goes over
+# the bound. Set MEMO_DISABLE=1 to bypass it.
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.environ.get(
+    'MEMO_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'memo'),
+)
+MAX_CACHE_BYTES = int(os.environ.get('MEMO_MAX_BYTES', 2 * 1024 ** 3))
+
+# Estimated bytes in each cache directory, since its last scan by this process
+_cache_bytes = {}
+
+
+def _update(h, value):
+    # Tag every value with its type so e.g. 1, 1.0 and '1' hash differently
+    if value is None or isinstance(value, (bool, int, float, str, bytes, np.generic)):
+        h.update(f'{type(value).__name__}:{value!r};'.encode('utf-8'))
+    elif isinstance(value, np.ndarray):
+        if value.dtype == object:
+            raise TypeError("Object arrays cannot be hashed for memoization")
+        h.update(f'ndarray:{value.dtype.str}:{value.shape};'.encode('utf-8'))
+        h.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, pd.DataFrame):
+        h.update(b'DataFrame;')
+        _update(h, list(value.columns))
+        _update(h, value.index)
+        for column in value.columns:
+            _update(h, value[column])
+    elif isinstance(value, (pd.Series, pd.Index)):
+        h.update(f'{type(value).__name__}:{value.name!r};'.encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(value, index=isinstance(value, pd.Series)).to_numpy().data)
+    elif isinstance(value, (list, tuple)):
+        h.update(f'{type(value).__name__}:{len(value)};'.encode('utf-8'))
+        for item in value:
+            _update(h, item)
+    elif isinstance(value, dict):
+        h.update(f'dict:{len(value)};'.encode('utf-8'))
+        for key in sorted(value, key=repr):
+            _update(h, key)
+            _update(h, value[key])
+    elif isinstance(value, functools.partial):
+        h.update(f'partial:{value.func.__module__}.{value.func.__qualname__};'.encode('utf-8'))
+        _update(h, value.args)
+        _update(h, value.keywords)
+    elif callable(value):
+        h.update(f'callable:{value.__module__}.{value.__qualname__};'.encode('utf-8'))
+    else:
+        raise TypeError(f"Cannot hash argument of type {type(value).__name__} for memoization")
+
+
+def stable_hash(*values):
+    """Hex digest that is identical across processes and runs for equal inputs."""
+    h = hashlib.sha256()
+    for value in values:
+        _update(h, value)
+    return h.hexdigest()
+
+
+def _entries(cache_dir):
+    for directory, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith('.pkl'):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Delete least recently used entries until the cache fits in `max_bytes`; returns the bytes left."""
+    entries = sorted(_entries(cache_dir))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def _added(cache_dir, size, max_bytes):
+    # Count a new entry, scanning and evicting only when the estimate exceeds
+    # the bound (entries written by other processes are picked up then)
+    if cache_dir not in _cache_bytes:
+        _cache_bytes[cache_dir] = sum(entry_size for _, entry_size, _ in _entries(cache_dir))
+    else:
+        _cache_bytes[cache_dir] += size
+    if _cache_bytes[cache_dir] > max_bytes:
+        _cache_bytes[cache_dir] = evict(cache_dir, max_bytes)
+
+
+def clear(cache_dir=CACHE_DIR):
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    _cache_bytes.pop(cache_dir, None)
+
+
+def memoize(version=1, depends=(), cache_dir=None, max_bytes=None):
+    """Decorator caching a function's results on disk, keyed by its inputs."""
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        function_dir = f'{func.__module__}.{func.__qualname__}'
+        depends_hash = stable_hash(depends)
+
+        def paths(root):
+            base = os.path.join(root, function_dir)
+            return base, os.path.join(base, f'v{version}')
+
+        def entry_path(version_dir, args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return os.path.join(version_dir, stable_hash(depends_hash, dict(bound.arguments)) + '.pkl')
+
+        def load(path):
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            os.utime(path)  # mark as recently used
+            return result
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if os.environ.get('MEMO_DISABLE'):
+                return func(*args, **kwargs)
+            root = cache_dir or CACHE_DIR
+            base, version_dir = paths(root)
+            path = entry_path(version_dir, args, kwargs)
+
+            try:
+                return load(path)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass
+
+            result = func(*args, **kwargs)
+            if not os.path.isdir(version_dir):
+                # Results from other versions of this function can never be used again
+                if os.path.isdir(base):
+                    for name in os.listdir(base):
+                        shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+                os.makedirs(version_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=version_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    size = f.tell()
+                os.replace(tmp_path, path)
+            except BaseException:
+                # Eviction only sees .pkl files, so a partial write would stay forever
+                os.remove(tmp_path)
+                raise
+            _added(root, size, max_bytes if max_bytes is not None else MAX_CACHE_BYTES)
+            return result
+
+        def cache_clear():
+            shutil.rmtree(paths(cache_dir or CACHE_DIR)[0], ignore_errors=True)
+            _cache_bytes.pop(cache_dir or CACHE_DIR, None)
+
+        def cached(*args, **kwargs):
+            """The stored result for these arguments; raises KeyError if there is none."""
+            if os.environ.get('MEMO_DISABLE'):
+                raise KeyError('memoization is disabled')
+            path = entry_path(paths(cache_dir or CACHE_DIR)[1], args, kwargs)
+            try:
+                return load(path)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                raise KeyError(path) from None
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cached = cached
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
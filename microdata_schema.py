@@ -0,0 +1,163 @@
+# Compact dtype plan for return-level microdata
+#
+# pandas defaults (float64 for every amount, int64 for counts, Python
+# strings for filing status and state) use several times more memory than
+# the data needs. RETURNS_SCHEMA assigns each column a compact type:
+#
+#   amount    float32 when every value survives the round trip to float32
+#             within `tolerance` dollars, otherwise float64
+#   int       the given integer dtype, rejecting values that would overflow
+#   category  fixed labels stored as small integer codes, rejecting
+#             unknown labels
+#
+# Filing status codes follow tax_law.FILING_STATUSES, so they can be passed
+# directly to tax_engine as status indices.
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from tax_law import FILING_STATUSES
+
+STATES = (
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS',
+    'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC',
+    'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+)
+
+AMOUNT_COLUMNS = (
+    'wages',
+    'self_employment_income',
+    'taxable_interest',
+    'ordinary_dividends',  # includes qualified dividends
+    'qualified_dividends',
+    'short_term_gains',
+    'long_term_gains',
+    'business_income',  # partnership and S corporation income
+    'pension_income',
+    'social_security',
+    'other_income',
+    'property_taxes',
+    'itemized_deductions',  # other than state and local taxes
+)
+
+RETURNS_SCHEMA = {
+    'year': dict(kind='int', dtype='int16'),
+    'weight': dict(kind='amount', tolerance=0.01),
+    'filing_status': dict(kind='category', categories=FILING_STATUSES),
+    'state': dict(kind='category', categories=STATES),
+    'age_head': dict(kind='int', dtype='int8'),
+    'dependents': dict(kind='int', dtype='int8'),
+    **{column: dict(kind='amount', tolerance=1.0) for column in AMOUNT_COLUMNS},
+}
+
+
+def _fits_float32(values, tolerance):
+    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = np.isfinite(values)
+    if np.abs(values[finite]).max(initial=0) > np.finfo(np.float32).max:
+        return False
+    rounded = values[finite].astype(np.float32).astype(np.float64)
+    return bool(np.all(np.abs(rounded - values[finite]) <= tolerance))
+
+
+def coerce_column(name, values, spec, amount_dtype=np.float32):
+    """Convert one column to its compact dtype, raising if values do not fit.
+
+    Amount columns are converted to `amount_dtype`; callers widen it to
+    float64 when `_fits_float32` fails for any chunk.
+    """
+    kind = spec['kind']
+    if kind == 'category':
+        labels = values.where(values.isna(), values.astype(str))
+        categorical = pd.Categorical(labels, categories=list(spec['categories']))
+        unknown = labels.notna().to_numpy() & (categorical.codes == -1)
+        if unknown.any():
+            raise ValueError(f"Column '{name}' has unknown labels: {sorted(set(labels[unknown]))[:10]}")
+        return pd.Series(categorical, index=values.index, name=name)
+    if kind == 'int':
+        dtype = np.dtype(spec['dtype'])
+        if values.isna().any():
+            raise ValueError(f"Column '{name}' has missing values but is stored as {dtype}")
+        info = np.iinfo(dtype)
+        numeric = pd.to_numeric(values)
+        if (numeric != np.floor(numeric)).any():
+            raise ValueError(f"Column '{name}' has fractional values but is stored as {dtype}")
+        if len(numeric) and (numeric.min() < info.min or numeric.max() > info.max):
+            raise OverflowError(
+                f"Column '{name}' ranges {numeric.min()}..{numeric.max()}, outside {dtype} ({info.min}..{info.max})"
+            )
+        return numeric.astype(dtype)
+    if kind == 'amount':
+        return pd.to_numeric(values).astype(amount_dtype)
+    raise ValueError(f"Unknown column kind '{kind}' for '{name}'")
+
+
+def plan_amount_dtype(values, spec):
+    """float32 if this chunk of an amount column fits within tolerance, else float64."""
+    return np.float32 if _fits_float32(pd.to_numeric(values), spec['tolerance']) else np.float64
+
+
+def read_columns(csv_path, schema):
+    """Schema columns present in `csv_path` (others are ignored)."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    return [column for column in schema if column in header]
+
+
+def load_returns(csv_path, schema=RETURNS_SCHEMA, chunk_rows=1_000_000):
+    """Load returns with compact dtypes.
+
+    The CSV is read in chunks so only one chunk is ever held with pandas'
+    default dtypes. Returns the compact DataFrame and a memory report
+    comparing it with a default pandas load.
+    """
+    columns = read_columns(csv_path, schema)
+    amount_dtypes = {column: np.float32 for column in columns if schema[column]['kind'] == 'amount'}
+    chunks, default_bytes = [], pd.Series(0, index=columns, dtype=np.int64)
+    for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_rows):
+        default_bytes += chunk.memory_usage(index=False, deep=True)[columns]
+        for column in amount_dtypes:
+            if amount_dtypes[column] == np.float32 and plan_amount_dtype(chunk[column], schema[column]) == np.float64:
+                amount_dtypes[column] = np.float64
+        chunks.append(pd.DataFrame({
+            column: coerce_column(column, chunk[column], schema[column], amount_dtypes.get(column, np.float32))
+            for column in columns
+        }))
+
+    if chunks:
+        frame = pd.concat(chunks, ignore_index=True)
+    else:
+        frame = pd.DataFrame({column: pd.Series(dtype=np.float64) for column in columns})
+    # Columns widened part-way through take float64 for every chunk
+    frame = frame.astype({column: dtype for column, dtype in amount_dtypes.items()})
+    return frame, memory_report(frame, default_bytes)
+
+
+def memory_report(frame, default_bytes):
+    """Per-column bytes with pandas defaults versus the compact frame."""
+    compact_bytes = frame.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'default_dtype_bytes': default_bytes,
+        'compact_bytes': compact_bytes,
+        'dtype': frame.dtypes.astype(str),
+    })
+    report['saved_bytes'] = report['default_dtype_bytes'] - report['compact_bytes']
+    return report
+
+
+def format_report(report):
+    default, compact = report['default_dtype_bytes'].sum(), report['compact_bytes'].sum()
+    ratio = default / compact if compact else float('nan')
+    return (f"{default / 1e6:,.1f} MB with pandas defaults -> {compact / 1e6:,.1f} MB compact "
+            f"({(default - compact) / 1e6:,.1f} MB saved, {ratio:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load a CSV of returns with compact dtypes and report memory use")
+    parser.add_argument('csv_path')
+    args = parser.parse_args()
+
+    frame, report = load_returns(args.csv_path)
+    print(report.to_string())
+    print(f"{len(frame):,} returns: {format_report(report)}")
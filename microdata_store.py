@@ -0,0 +1,322 @@
+# Memory-mapped column store for return-level microdata
+#
+# `convert_csv` parses a (possibly multi-gigabyte) CSV of returns once, in
+# chunks, and writes each column as a fixed-width binary file plus a
+# manifest.json describing dtypes, row count and category labels. After that
+# `MicrodataStore` memory-maps the columns read-only, so opening a store is
+# instant, only the pages a pass touches are read, and every process that
+# opens the same store shares one copy in the OS page cache.
+#
+#   python microdata_store.py returns.csv microdata/returns
+#
+# String columns (filing status, state, ...) are stored as integer codes
+# with their labels in the manifest. The command line conversion applies the
+# compact dtypes of microdata_schema.RETURNS_SCHEMA.
+
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from microdata_schema import RETURNS_SCHEMA, coerce_column, plan_amount_dtype, read_columns
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+CHUNK_ROWS = 1_000_000
+
+
+def _column_path(store_dir, column):
+    return os.path.join(store_dir, f'{column}.bin')
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'path': os.path.abspath(csv_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _code_dtype(n_categories):
+    return np.int8 if n_categories <= np.iinfo(np.int8).max else np.int16 if n_categories <= np.iinfo(np.int16).max else np.int32
+
+
+def _plan_column(series, requested):
+    # A column is either categorical (stored as codes) or a fixed NumPy dtype
+    if requested == 'category' or (requested is None and series.dtype == object):
+        return 'category'
+    return np.dtype(requested if requested is not None else series.dtype).str
+
+
+def _widen_column(store_dir, column, rows, from_dtype, to_dtype, chunk_rows):
+    # Rewrite the values written so far with a wider dtype
+    path = _column_path(store_dir, column)
+    if rows:
+        narrow = np.memmap(path, dtype=from_dtype, mode='r', shape=(rows,))
+        with open(path + '.wide', 'wb') as f:
+            for start in range(0, rows, chunk_rows):
+                f.write(narrow[start:start + chunk_rows].astype(to_dtype).tobytes())
+        del narrow
+        os.replace(path + '.wide', path)
+
+
+def _schema_plan(schema, columns):
+    return {
+        column: 'category' if schema[column]['kind'] == 'category'
+        else np.dtype(schema[column].get('dtype', np.float32)).str
+        for column in columns
+    }
+
+
+def convert_csv(csv_path, store_dir, columns=None, dtypes=None, schema=None, chunk_rows=CHUNK_ROWS):
+    """Convert a CSV of returns into a memory-mappable column store.
+
+    `dtypes` maps column names to NumPy dtypes or 'category'; other columns
+    keep the dtype pandas infers for the first chunk (strings become
+    categories). Later chunks are cast to the same dtype and rejected if the
+    cast would change values.
+
+    With a `schema` (see microdata_schema.py) the schema's columns are
+    validated and stored with its compact dtypes instead: amounts start as
+    float32 and are widened to float64 if any chunk needs it, and category
+    codes follow the schema's label order.
+    """
+    dtypes = dict(dtypes or {})
+    if schema is not None:
+        columns = columns or read_columns(csv_path, schema)
+        dtypes = {column: 'category' for column in columns if schema[column]['kind'] == 'category'}
+    tmp_dir = store_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    plan, categories, files, rows = None, {}, {}, 0
+    read_dtypes = {column: str for column, dtype in dtypes.items() if dtype == 'category'}
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=columns, dtype=read_dtypes or None, chunksize=chunk_rows):
+            if plan is None:
+                if schema is not None:
+                    plan = _schema_plan(schema, chunk.columns)
+                else:
+                    plan = {column: _plan_column(chunk[column], dtypes.get(column)) for column in chunk.columns}
+                for column, kind in plan.items():
+                    if kind == 'category':
+                        labels = schema[column]['categories'] if schema is not None else ()
+                        categories[column] = {label: code for code, label in enumerate(labels)}
+                    files[column] = open(_column_path(tmp_dir, column), 'wb')
+            if schema is not None:
+                for column, kind in plan.items():
+                    if schema[column]['kind'] == 'amount' and kind == np.dtype(np.float32).str \
+                            and plan_amount_dtype(chunk[column], schema[column]) == np.float64:
+                        files[column].close()
+                        _widen_column(tmp_dir, column, rows, np.float32, np.float64, chunk_rows)
+                        files[column] = open(_column_path(tmp_dir, column), 'ab')
+                        plan[column] = np.dtype(np.float64).str
+                chunk = pd.DataFrame({
+                    column: coerce_column(column, chunk[column], schema[column],
+                                          np.float32 if kind == 'category' else np.dtype(kind))
+                    for column, kind in plan.items()
+                })
+            for column, kind in plan.items():
+                values = chunk[column]
+                if kind == 'category':
+                    # Map this chunk's codes onto store-wide codes; they are
+                    # written as int32 and narrowed once all labels are known
+                    labels = categories[column]
+                    chunk_categorical = pd.Categorical(values.where(values.isna(), values.astype(str)))
+                    lookup = np.array(
+                        [labels.setdefault(label, len(labels)) for label in chunk_categorical.categories] + [-1],
+                        dtype=np.int32,
+                    )
+                    files[column].write(lookup[chunk_categorical.codes].tobytes())
+                else:
+                    dtype = np.dtype(kind)
+                    array = values.to_numpy()
+                    cast = array.astype(dtype)
+                    if not np.array_equal(cast, array, equal_nan=dtype.kind == 'f'):
+                        raise ValueError(f"Column '{column}' has values that do not fit {dtype}")
+                    files[column].write(cast.tobytes())
+            rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    if plan is None:
+        raise ValueError(f"{csv_path} has no rows")
+
+    manifest_columns = {}
+    for column, kind in plan.items():
+        if kind == 'category':
+            labels = list(categories[column])
+            code_dtype = np.dtype(_code_dtype(len(labels)))
+            path = _column_path(tmp_dir, column)
+            if rows:
+                wide_codes = np.memmap(path, dtype=np.int32, mode='r', shape=(rows,))
+                with open(path + '.narrow', 'wb') as f:
+                    for start in range(0, rows, chunk_rows):
+                        f.write(wide_codes[start:start + chunk_rows].astype(code_dtype).tobytes())
+                del wide_codes
+                os.replace(path + '.narrow', path)
+            manifest_columns[column] = {'dtype': code_dtype.str, 'categories': labels}
+        else:
+            manifest_columns[column] = {'dtype': kind}
+
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+        json.dump({
+            'format': FORMAT_VERSION,
+            'rows': rows,
+            'columns': manifest_columns,
+            'source': _source_signature(csv_path),
+        }, f, indent=1)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    return MicrodataStore(store_dir)
+
+
+def write_store(chunks, store_dir, schema=RETURNS_SCHEMA, source=None, chunk_rows=CHUNK_ROWS):
+    """Write chunks of {column: array} straight into a store with the schema's compact dtypes.
+
+    For generated data (see synthetic_returns.py) that never exists as a
+    CSV. Every chunk has the same columns; categorical columns hold codes in
+    the schema's label order. Amounts are widened to float64 as in
+    `convert_csv`. `source` is recorded in the manifest.
+    """
+    tmp_dir = store_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    plan, files, rows = None, {}, 0
+    try:
+        for chunk in chunks:
+            if plan is None:
+                plan = {
+                    column: np.dtype(_code_dtype(len(schema[column]['categories']))).str
+                    if schema[column]['kind'] == 'category' else _schema_plan(schema, [column])[column]
+                    for column in chunk
+                }
+                files = {column: open(_column_path(tmp_dir, column), 'wb') for column in plan}
+            for column, kind in plan.items():
+                spec, values = schema[column], np.asarray(chunk[column])
+                if spec['kind'] == 'amount' and kind == np.dtype(np.float32).str \
+                        and plan_amount_dtype(pd.Series(values), spec) == np.float64:
+                    files[column].close()
+                    _widen_column(tmp_dir, column, rows, np.float32, np.float64, chunk_rows)
+                    files[column] = open(_column_path(tmp_dir, column), 'ab')
+                    kind = plan[column] = np.dtype(np.float64).str
+                if spec['kind'] == 'category' and len(values) and \
+                        (values.min() < -1 or values.max() >= len(spec['categories'])):
+                    raise ValueError(f"Column '{column}' has codes outside its {len(spec['categories'])} labels")
+                cast = values.astype(kind)
+                if spec['kind'] != 'amount' and not np.array_equal(cast, values):
+                    raise ValueError(f"Column '{column}' has values that do not fit {np.dtype(kind)}")
+                files[column].write(cast.tobytes())
+            rows += len(next(iter(chunk.values())))
+    finally:
+        for f in files.values():
+            f.close()
+
+    if plan is None:
+        raise ValueError("No chunks to write")
+
+    manifest_columns = {
+        column: {'dtype': kind, 'categories': list(schema[column]['categories'])}
+        if schema[column]['kind'] == 'category' else {'dtype': kind}
+        for column, kind in plan.items()
+    }
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+        json.dump({
+            'format': FORMAT_VERSION,
+            'rows': rows,
+            'columns': manifest_columns,
+            'source': source,
+        }, f, indent=1)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    return MicrodataStore(store_dir)
+
+
+def is_current(csv_path, store_dir):
+    """True if `store_dir` holds a conversion of the current `csv_path`."""
+    try:
+        with open(os.path.join(store_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return False
+    return manifest.get('format') == FORMAT_VERSION and manifest.get('source') == _source_signature(csv_path)
+
+
+def open_microdata(csv_path, store_dir, **convert_kwargs):
+    """Open the store for `csv_path`, converting the CSV first only if needed."""
+    if not is_current(csv_path, store_dir):
+        return convert_csv(csv_path, store_dir, **convert_kwargs)
+    return MicrodataStore(store_dir)
+
+
+class MicrodataStore:
+    """Read-only, memory-mapped access to a converted microdata store."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self._arrays = {}
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'])
+
+    def categories(self, column):
+        """Labels of a categorical column (code i is categories[i]), or None."""
+        return self.manifest['columns'][column].get('categories')
+
+    def column(self, column):
+        """The column as a read-only memory-mapped array (codes for categorical columns)."""
+        if column not in self._arrays:
+            dtype = np.dtype(self.manifest['columns'][column]['dtype'])
+            if len(self) == 0:
+                self._arrays[column] = np.empty(0, dtype=dtype)
+            else:
+                self._arrays[column] = np.memmap(
+                    _column_path(self.store_dir, column), dtype=dtype, mode='r', shape=(len(self),)
+                )
+        return self._arrays[column]
+
+    def __getitem__(self, column):
+        return self.column(column)
+
+    def decoded(self, column):
+        """A categorical column as a pandas Categorical with its labels."""
+        return pd.Categorical.from_codes(self.column(column), categories=self.categories(column))
+
+    def iter_chunks(self, columns=None, chunk_rows=CHUNK_ROWS):
+        """Yield {column: array} views over consecutive row ranges."""
+        columns = columns or self.columns
+        arrays = {column: self.column(column) for column in columns}
+        for start in range(0, len(self), chunk_rows):
+            yield {column: array[start:start + chunk_rows] for column, array in arrays.items()}
+
+    def to_frame(self, columns=None):
+        """DataFrame over the requested columns (categorical columns decoded)."""
+        columns = columns or self.columns
+        return pd.DataFrame({
+            column: self.decoded(column) if self.categories(column) is not None else self.column(column)
+            for column in columns
+        })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert a CSV of returns into a memory-mapped column store")
+    parser.add_argument('csv_path')
+    parser.add_argument('store_dir')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--infer-dtypes', action='store_true',
+                        help="Keep pandas' inferred dtypes instead of the compact returns schema")
+    args = parser.parse_args()
+
+    schema = None if args.infer_dtypes else RETURNS_SCHEMA
+    store = convert_csv(args.csv_path, args.store_dir, schema=schema, chunk_rows=args.chunk_rows)
+    print(f"Converted {len(store):,} returns ({len(store.columns)} columns) into '{args.store_dir}'")
@@ -0,0 +1,181 @@
+# Federal income tax for return-level microdata
+#
+# `returns` can be anything indexable by column name: a MicrodataStore, a
+# DataFrame from microdata_schema.load_returns, or a dict of arrays.
+# Categorical columns (filing status, state) are used as integer codes in
+# the label order of microdata_schema.RETURNS_SCHEMA.
+#
+# `federal_income_tax` works through the returns in chunks of TAX_CHUNK_ROWS
+# rows on a thread pool, writing each chunk's tax into one preallocated
+# output. The temporaries of a chunk stay in cache and extra memory is a few
+# chunks' worth however many returns there are; NumPy (and the compiled
+# bracket kernel, see tax_engine.py) release the GIL, so chunks run on all
+# cores.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from tax_engine import build_tables, income_tax
+
+# Components of adjusted gross income. Social Security benefits are left
+# out, as they were untaxed for most of the period.
+AGI_COLUMNS = (
+    'wages',
+    'self_employment_income',
+    'taxable_interest',
+    'ordinary_dividends',
+    'short_term_gains',
+    'long_term_gains',
+    'business_income',
+    'pension_income',
+    'other_income',
+)
+EARNED_COLUMNS = ('wages', 'self_employment_income')
+# Income from capital, for allocating the corporate income tax
+CAPITAL_COLUMNS = (
+    'taxable_interest',
+    'ordinary_dividends',
+    'short_term_gains',
+    'long_term_gains',
+    'business_income',
+)
+
+TAX_CHUNK_ROWS = 1 << 16
+
+
+def column(returns, name, dtype=None):
+    """A column as a NumPy array, using codes for categorical columns."""
+    values = returns[name]
+    if isinstance(values, pd.Series):
+        values = values.cat.codes if isinstance(values.dtype, pd.CategoricalDtype) else values
+        values = values.to_numpy()
+    return np.asarray(values, dtype=dtype)
+
+
+def has_column(returns, name):
+    columns = returns.columns if hasattr(returns, 'columns') else returns.keys()
+    return name in columns
+
+
+def sum_columns(returns, names):
+    """Sum of the listed columns that are present, as float64."""
+    total = None
+    for name in names:
+        if has_column(returns, name):
+            values = column(returns, name, np.float64)
+            total = values.copy() if total is None else np.add(total, values, out=total)
+    if total is None:
+        raise KeyError(f"None of the columns {names} are present")
+    return total
+
+
+def adjusted_gross_income(returns):
+    return sum_columns(returns, AGI_COLUMNS)
+
+
+def earned_income(returns):
+    return sum_columns(returns, EARNED_COLUMNS)
+
+
+def capital_income(returns):
+    return sum_columns(returns, CAPITAL_COLUMNS)
+
+
+def column_or_zero(returns, name):
+    return column(returns, name, np.float64) if has_column(returns, name) else np.float64(0)
+
+
+def capital_gains_split(returns, year_idx, tables, agi=None):
+    """Statutory AGI and the part of it taxed at capital gains rates.
+
+    `agi` (default: adjusted_gross_income) counts capital gains in full.
+    The year's exclusion removes a share of net long-term gains (net of
+    short-term losses) and net capital losses are deducted only up to the
+    loss limit. The preferential part is the included long-term gain plus,
+    from 2003, qualified dividends.
+    """
+    agi = adjusted_gross_income(returns) if agi is None else agi
+    short_term = column_or_zero(returns, 'short_term_gains')
+    long_term = column_or_zero(returns, 'long_term_gains')
+    net_gains = short_term + long_term
+    net_long_term = np.clip(long_term, 0, np.maximum(net_gains, 0))
+    included_long_term = net_long_term * (1 - tables['cg_exclusion'][year_idx])
+    capital_income = np.maximum(net_gains, -tables['cg_loss_limit'][year_idx]) - (net_long_term - included_long_term)
+    statutory_agi = agi - net_gains + capital_income
+    preferential = included_long_term + column_or_zero(returns, 'qualified_dividends') * tables['qualified_dividends'][year_idx]
+    return statutory_agi, np.clip(preferential, 0, np.maximum(statutory_agi, 0))
+
+
+def itemized_deductions(returns, state_tax=None):
+    """Total itemized deductions and the state and local tax part of them.
+
+    `state_tax` is each return's state income tax (see state_tax.py).
+    """
+    salt = column_or_zero(returns, 'property_taxes')
+    if state_tax is not None:
+        salt = salt + np.maximum(state_tax, 0)
+    return column_or_zero(returns, 'itemized_deductions') + salt, salt
+
+
+def year_indices(returns, tables=None):
+    """Index of each return's year in `tables['years']` (building tables if needed)."""
+    years = column(returns, 'year')
+    if tables is None:
+        tables = build_tables(np.unique(years))
+    year_idx = np.searchsorted(tables['years'], years)
+    if np.any(year_idx >= len(tables['years'])) or np.any(tables['years'][np.minimum(year_idx, len(tables['years']) - 1)] != years):
+        raise ValueError("Returns include years missing from the tax tables")
+    return year_idx, tables
+
+
+def _federal_income_tax(returns, tables, agi, earned, state_tax):
+    year_idx, tables = year_indices(returns, tables)
+    statutory_agi, preferential = capital_gains_split(returns, year_idx, tables, agi)
+    earned = earned_income(returns) if earned is None else earned
+    children = column(returns, 'dependents') if has_column(returns, 'dependents') else 0
+    itemized, salt = itemized_deductions(returns, state_tax)
+    return income_tax(statutory_agi, column(returns, 'filing_status'), year_idx, tables, children=children,
+                      earned=earned, preferential=preferential, itemized=itemized, salt=salt, amt=True)
+
+
+def _rows(values, start, stop):
+    return values[start:stop] if np.ndim(values) else values
+
+
+def federal_income_tax(returns, tables=None, agi=None, earned=None, state_tax=None, chunk_rows=TAX_CHUNK_ROWS,
+                       workers=None):
+    """Federal income tax after credits for every return, with capital gains rates stacked on top and the AMT.
+
+    Returns are taxed `chunk_rows` at a time on `workers` threads (default:
+    one per CPU).
+    """
+    years = column(returns, 'year')
+    n_rows = len(years)
+    if n_rows <= chunk_rows:
+        return _federal_income_tax(returns, tables, agi, earned, state_tax)
+    if tables is None:
+        tables = build_tables(np.unique(years))
+    names = returns.columns if hasattr(returns, 'columns') else returns.keys()
+    # Memory-mapped and NumPy columns are sliced without copying
+    arrays = {name: column(returns, name) for name in names}
+    out = np.empty(n_rows)
+
+    def run(start):
+        stop = start + chunk_rows
+        chunk = {name: values[start:stop] for name, values in arrays.items()}
+        out[start:stop] = _federal_income_tax(chunk, tables, _rows(agi, start, stop), _rows(earned, start, stop),
+                                              _rows(state_tax, start, stop))
+
+    starts = range(0, n_rows, chunk_rows)
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+    if workers == 1:
+        for start in starts:
+            run(start)
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            # list() re-raises the first error from a chunk
+            list(pool.map(run, starts))
+    return out
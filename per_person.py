@@ -0,0 +1,122 @@
+# Per-person and equivalized incomes from tax-unit microdata
+#
+# Returns are tax units, not people: a joint return covers two adults and
+# dependents live on the same income, so tax-unit averages overstate what
+# each person has and rank a single filer alongside a family of five with
+# the same AGI. Here every return stands for its members (one adult, two
+# on joint returns, plus its dependents); each member gets the unit's
+# income divided by an equivalence scale and carries the return's weight.
+# EQUIVALENCE_SCALES:
+#
+#   per_capita      unit size: income per person
+#   sqrt            square root of unit size (OECD, CBO household studies)
+#   oecd_modified   1 for the first adult, 0.5 for the second and 0.3 per
+#                   dependent (all dependents are treated as children)
+#
+# People are ranked within each year by the equivalized income with one sort
+# (aggregate_cube.percentile_bins, with person weights) and the sums land in
+# an AggregateCube whose 'count' is people, so group means are per person.
+#
+#   python per_person.py microdata/returns --scale sqrt
+#   python per_person.py microdata/returns --write
+#
+# --write replaces data/real_income_per_capita (per-capita scale, thousands
+# of 2022 dollars) in its existing groups, so the per-capita chart plots the
+# microdata.
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import BIN_EDGES, build_cube, percentile_bins
+from data_layer import DATA_DIR, dataset_groups, dataset_path, to_long, write_dataset
+from deflators import price_ratio
+from microdata_tax import adjusted_gross_income, column, has_column
+from tax_law import FILING_STATUSES
+
+EQUIVALENCE_SCALES = {
+    'per_capita': lambda adults, children: adults + children,
+    'sqrt': lambda adults, children: np.sqrt(adults + children),
+    'oecd_modified': lambda adults, children: 0.5 + 0.5 * adults + 0.3 * children,
+}
+
+# Percentile ranges of people for the groups of the per-capita datasets
+PERSON_GROUPS = {
+    'Bottom 20%': (0, 20),
+    'Second 20%': (20, 40),
+    'Middle 20%': (40, 60),
+    'Fourth 20%': (60, 80),
+    'Top 20%': (80, 100),
+    'Top 20% (80-99th percentile)': (80, 99),
+    'Top 1%': (99, 100),
+    'Top 0.1%': (99.9, 100),
+}
+
+PER_CAPITA_DATASET = 'real_income_per_capita'
+PRICE_YEAR = 2022
+
+_JOINT = FILING_STATUSES.index('married_joint')
+
+
+def unit_members(returns):
+    """Adults and dependents in each return's tax unit."""
+    adults = 1 + (column(returns, 'filing_status') == _JOINT)
+    children = column(returns, 'dependents', np.int64) if has_column(returns, 'dependents') else 0
+    return adults, np.maximum(children, 0)
+
+
+def person_incomes(returns, scale='per_capita', income=None):
+    """Equivalized income of each return's members and the number of people each return stands for.
+
+    `income` (default: AGI) is the unit's income. Returns (income per
+    equivalent person, people weight).
+    """
+    income = adjusted_gross_income(returns) if income is None else income
+    adults, children = unit_members(returns)
+    people = adults + children
+    equivalized = income / EQUIVALENCE_SCALES[scale](adults, children)
+    return equivalized, column(returns, 'weight', np.float64) * people
+
+
+def person_cube(returns, scale='per_capita', income=None, edges=BIN_EDGES):
+    """AggregateCube of equivalized income with people ranked by it in each year."""
+    years = column(returns, 'year')
+    equivalized, people = person_incomes(returns, scale, income)
+    bins = percentile_bins(years, equivalized, people, edges)
+    return build_cube(years, bins, column(returns, 'state'), people, {'income': equivalized}, edges=edges)
+
+
+def real_income_frame(cube, groups=tuple(PERSON_GROUPS), price_year=PRICE_YEAR):
+    """Chart-shaped frame of mean income per person by group, in thousands of `price_year` dollars."""
+    means = cube.means('income', groups=[PERSON_GROUPS[group] for group in groups])
+    values = means * price_ratio(cube.years, price_year)[:, np.newaxis] / 1000
+    frame = pd.DataFrame(np.round(values, 2), columns=list(groups))
+    frame.insert(0, 'Year', cube.years)
+    return frame
+
+
+if __name__ == '__main__':
+    from microdata_store import MicrodataStore
+
+    parser = argparse.ArgumentParser(description="Per-person and equivalized incomes by group from tax-unit microdata")
+    parser.add_argument('store_dir')
+    parser.add_argument('--scale', choices=sorted(EQUIVALENCE_SCALES), default='per_capita')
+    parser.add_argument('--write', action='store_true',
+                        help=f"Replace data/{PER_CAPITA_DATASET} (per-capita scale only)")
+    args = parser.parse_args()
+
+    if args.write and args.scale != 'per_capita':
+        parser.error("--write replaces the per-capita dataset; use --scale per_capita")
+    groups = tuple(PERSON_GROUPS)
+    if args.write and os.path.exists(dataset_path(PER_CAPITA_DATASET)):
+        groups = tuple(dataset_groups(PER_CAPITA_DATASET))
+    frame = real_income_frame(person_cube(MicrodataStore(args.store_dir), args.scale), groups)
+    print(f"Mean income per person ({args.scale} scale, thousands of {PRICE_YEAR} dollars):")
+    print(frame.round(1).to_string(index=False))
+    if args.write:
+        write_dataset(PER_CAPITA_DATASET, to_long(frame),
+                      description=f"Income per capita ({PRICE_YEAR} dollars, thousands)",
+                      data_dir=DATA_DIR)
+        print(f"Saved {PER_CAPITA_DATASET} to '{DATA_DIR}'")
@@ -0,0 +1,319 @@
+# Year-partitioned microdata pipeline with pluggable executors
+#
+# Tax years are independent: percentile ranks, the corporate tax allocation
+# and every tax are computed within a year. The pipeline therefore runs
+# ingestion, tax calculation and aggregation once per year partition, each
+# as one task returning that year's slice of the aggregate cube, and
+# combines the slices into the cube the charts' group series come from
+# (incidence.chart_rates).
+#
+# Tasks go to any concurrent.futures-style executor (see EXECUTORS):
+#
+#   serial          in this process, one partition at a time
+#   thread          a thread pool (NumPy releases the GIL in most kernels)
+#   process         a process pool on this machine
+#   cluster         worker processes on other machines, over TCP
+#   local-cluster   the cluster executor with workers started on this
+#                   machine, for testing multi-node runs
+#
+# Cluster workers are started with `python pipeline.py worker` and receive
+# pickled tasks from anyone holding the shared key, so only run them on a
+# trusted network. Partitions are read from the same store path on every
+# node (a shared filesystem), or generated on the node (--synthetic).
+#
+#   python pipeline.py run microdata/returns --executor process --workers 4 --write
+#   python pipeline.py run --synthetic 1000000 --executor local-cluster --workers 2
+#   PIPELINE_AUTHKEY=... python pipeline.py worker --listen 0.0.0.0:7000
+#   PIPELINE_AUTHKEY=... python pipeline.py run microdata/returns --executor cluster --nodes a:7000 b:7000
+
+import argparse
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import traceback
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from aggregate_cube import AggregateCube, BIN_EDGES, STATE_LABELS, build_cube, percentile_bins
+from incidence import CAPITAL_SHARE, chart_rates, incidence_measures, save_chart_rates
+from microdata_tax import column
+
+AUTHKEY_ENV = 'PIPELINE_AUTHKEY'
+
+
+class StoreSource:
+    """Year partitions of a MicrodataStore, opened lazily in each worker."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self._store = None
+
+    def __getstate__(self):
+        return {'store_dir': self.store_dir, '_store': None}
+
+    @property
+    def store(self):
+        if self._store is None:
+            from microdata_store import MicrodataStore
+            self._store = MicrodataStore(self.store_dir)
+        return self._store
+
+    def partitions(self):
+        """{year: rows}, with rows a slice when the year's rows are contiguous."""
+        years = np.asarray(self.store.column('year'))
+        order = np.argsort(years, kind='stable')
+        sorted_years = years[order]
+        starts = np.flatnonzero(np.r_[True, sorted_years[1:] != sorted_years[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        partitions = {}
+        for start, end in zip(starts, ends):
+            rows = order[start:end]
+            contiguous = rows[-1] - rows[0] == len(rows) - 1
+            partitions[int(sorted_years[start])] = slice(int(rows[0]), int(rows[-1]) + 1) if contiguous else rows
+        return partitions
+
+    def read(self, year, rows):
+        return {name: np.asarray(self.store.column(name)[rows]) for name in self.store.columns}
+
+
+class SyntheticSource:
+    """Year partitions generated where they are processed (see synthetic_returns.py)."""
+
+    def __init__(self, years, rows_per_year, seed=0, calibration='median_income'):
+        self.years = [int(year) for year in years]
+        self.rows_per_year = rows_per_year
+        self.seed = seed
+        self.calibration = calibration
+
+    def partitions(self):
+        return {year: None for year in self.years}
+
+    def read(self, year, rows):
+        from synthetic_returns import generate_returns
+
+        chunks = list(generate_returns([year], self.rows_per_year, seed=self.seed, calibration=self.calibration))
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def run_partition(source, year, rows, capital_share=CAPITAL_SHARE, edges=BIN_EDGES):
+    """Ingest, tax and aggregate one year; returns (year, {measure: (bins, states) sums})."""
+    returns = source.read(year, rows)
+    measures = incidence_measures(returns, capital_share=capital_share)
+    years = column(returns, 'year')
+    weight = column(returns, 'weight', np.float64)
+    bins = percentile_bins(years, measures['income'], weight, edges)
+    cube = build_cube(years, bins, column(returns, 'state'), weight, measures, edges=edges)
+    return year, {name: values[0] for name, values in cube.measures.items()}
+
+
+def combine_partitions(results, edges=BIN_EDGES, states=STATE_LABELS):
+    """Stack per-year results into one AggregateCube, in year order."""
+    results = sorted(results, key=lambda result: result[0])
+    years = [year for year, _ in results]
+    names = results[0][1].keys()
+    measures = {name: np.stack([sums[name] for _, sums in results]) for name in names}
+    return AggregateCube(years, measures, edges=edges, states=states)
+
+
+def run_pipeline(source, executor, capital_share=CAPITAL_SHARE, edges=BIN_EDGES):
+    """Run every year partition of `source` on `executor` and combine them into a cube."""
+    futures = [executor.submit(run_partition, source, year, rows, capital_share, edges)
+               for year, rows in source.partitions().items()]
+    return combine_partitions([future.result() for future in futures], edges=edges)
+
+
+class SerialExecutor(Executor):
+    """Runs each task when it is submitted."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+class RemoteError(Exception):
+    """A task failed on a cluster worker; the message holds the worker's traceback."""
+
+
+class ClusterExecutor(Executor):
+    """Sends tasks to `python pipeline.py worker` processes over TCP.
+
+    One dispatcher thread per worker takes the next task from a shared
+    queue, so faster nodes take more partitions. When a worker's connection
+    drops, its task goes back on the queue for the others; tasks fail only
+    once no worker is left.
+    """
+
+    def __init__(self, addresses, authkey):
+        self._tasks = queue.Queue()
+        self._connections = [Client(address, authkey=authkey) for address in addresses]
+        self._live = len(self._connections)
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._dispatch, args=(connection,), daemon=True)
+                         for connection in self._connections]
+        for thread in self._threads:
+            thread.start()
+
+    def _dispatch(self, connection):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                connection.close()
+                return
+            future, fn, args, kwargs = task
+            # A task put back by a lost worker is already running
+            if not (future.running() or future.set_running_or_notify_cancel()):
+                continue
+            try:
+                connection.send((fn, args, kwargs))
+                status, value = connection.recv()
+            except (OSError, EOFError) as error:
+                self._lost(connection, task, error)
+                return
+            except BaseException as error:
+                future.set_exception(error)
+                continue
+            if status == 'ok':
+                future.set_result(value)
+            else:
+                future.set_exception(RemoteError(value))
+
+    def _lost(self, connection, task, error):
+        # Hand the task to the remaining workers, or fail it and every queued
+        # task when this was the last one
+        connection.close()
+        with self._lock:
+            self._live -= 1
+            if self._live:
+                self._tasks.put(task)
+                return
+            task[0].set_exception(error)
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    return
+                if task is not None and (task[0].running() or task[0].set_running_or_notify_cancel()):
+                    task[0].set_exception(ConnectionError("No cluster workers left"))
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if not self._live:
+                future.set_exception(ConnectionError("No cluster workers left"))
+            else:
+                self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class LocalCluster(ClusterExecutor):
+    """A ClusterExecutor over worker processes started on this machine."""
+
+    def __init__(self, workers):
+        authkey = secrets.token_hex(16)
+        env = dict(os.environ, **{AUTHKEY_ENV: authkey})
+        self._processes = [
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker', '--listen', '127.0.0.1:0'],
+                             stdout=subprocess.PIPE, env=env, text=True)
+            for _ in range(workers)
+        ]
+        # Each worker prints the port it bound before accepting
+        addresses = [('127.0.0.1', int(process.stdout.readline())) for process in self._processes]
+        super().__init__(addresses, authkey.encode())
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+        for process in self._processes:
+            process.wait()
+
+
+def serve_worker(host, port, authkey):
+    """Run tasks sent by a ClusterExecutor, one connection (driver) at a time."""
+    with Listener((host, port), authkey=authkey) as listener:
+        print(listener.address[1], flush=True)
+        while True:
+            with listener.accept() as connection:
+                while True:
+                    try:
+                        fn, args, kwargs = connection.recv()
+                    except EOFError:
+                        break
+                    try:
+                        connection.send(('ok', fn(*args, **kwargs)))
+                    except Exception:
+                        connection.send(('error', traceback.format_exc()))
+            if port == 0:
+                # Workers of a LocalCluster serve a single driver
+                return
+
+
+def _address(text):
+    host, port = text.rsplit(':', 1)
+    return host, int(port)
+
+
+EXECUTORS = {
+    'serial': lambda workers, nodes: SerialExecutor(),
+    'thread': lambda workers, nodes: ThreadPoolExecutor(workers),
+    'process': lambda workers, nodes: ProcessPoolExecutor(workers),
+    'cluster': lambda workers, nodes: ClusterExecutor([_address(node) for node in nodes],
+                                                      os.environ[AUTHKEY_ENV].encode()),
+    'local-cluster': lambda workers, nodes: LocalCluster(workers or os.cpu_count() or 1),
+}
+
+
+def make_executor(kind, workers=None, nodes=()):
+    return EXECUTORS[kind](workers, nodes)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the tax pipeline per year partition on a chosen executor")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="Compute the group rate series")
+    run.add_argument('store_dir', nargs='?')
+    run.add_argument('--synthetic', type=int, metavar='ROWS_PER_YEAR',
+                     help="Generate partitions on the workers instead of reading a store")
+    run.add_argument('--years', type=int, nargs='+', default=list(range(1950, 2026, 5)),
+                     help="Years to generate with --synthetic")
+    run.add_argument('--executor', choices=sorted(EXECUTORS), default='process')
+    run.add_argument('--workers', type=int, default=None)
+    run.add_argument('--nodes', nargs='+', default=(), metavar='HOST:PORT', help="Workers for --executor cluster")
+    run.add_argument('--capital-share', type=float, default=CAPITAL_SHARE)
+    run.add_argument('--write', action='store_true', help="Replace the rate chart datasets in data/")
+    worker = commands.add_parser('worker', help=f"Serve pipeline tasks (key in ${AUTHKEY_ENV})")
+    worker.add_argument('--listen', default='0.0.0.0:7000', metavar='HOST:PORT')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        if not os.environ.get(AUTHKEY_ENV):
+            parser.error(f"set {AUTHKEY_ENV} to the key shared with the driver")
+        serve_worker(*_address(args.listen), os.environ[AUTHKEY_ENV].encode())
+        sys.exit()
+
+    if (args.store_dir is None) == (args.synthetic is None):
+        parser.error("give either a store directory or --synthetic")
+    source = StoreSource(args.store_dir) if args.store_dir else SyntheticSource(args.years, args.synthetic)
+    with make_executor(args.executor, args.workers, args.nodes) as executor:
+        cube = run_pipeline(source, executor, capital_share=args.capital_share)
+    frames = chart_rates(cube)
+    for name, frame in frames.items():
+        print(f"{name}:")
+        print(frame.round(1).to_string(index=False))
+    if args.write:
+        save_chart_rates(frames)
+        print(f"Saved {', '.join(frames)} to the chart datasets")
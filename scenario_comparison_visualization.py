@@ -0,0 +1,96 @@
+import sys
+
+import plotly.graph_objects as go
+
+from microdata_store import MicrodataStore
+from scenario_sweep import run_scenarios, scenario
+
+# Policy scenarios applied to the same year of returns
+INCOME_YEAR = 2020
+SCENARIOS = [
+    scenario(f'{INCOME_YEAR} law', income_year=INCOME_YEAR),
+    scenario(f'{INCOME_YEAR} law + 1950 top bracket', income_year=INCOME_YEAR, top_bracket_year=1950),
+    scenario(f'{INCOME_YEAR} law, 70% top rate', income_year=INCOME_YEAR, top_rate=70),
+    scenario('1950 law (indexed)', income_year=INCOME_YEAR, law_year=1950),
+    scenario('1980 law (indexed)', income_year=INCOME_YEAR, law_year=1980),
+]
+
+# Define colors for each group
+colors = {
+    'Top 0.1%': '#000000',      # Black
+    'Top 1%': '#8c564b',        # Brown
+    'Highest Quintile': '#9467bd',  # Purple
+    'Fourth Quintile': '#d62728',   # Red
+    'Middle Quintile': '#ff7f0e',   # Orange
+    'Second Quintile': '#2ca02c',   # Green
+    'Lowest Quintile': '#1f77b4'    # Blue
+}
+
+if __name__ == '__main__':
+    # Microdata store to tax (see microdata_store.py)
+    store_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/returns'
+
+    # Effective federal income tax rates by group for each scenario, computed in parallel
+    df = run_scenarios(MicrodataStore(store_dir), SCENARIOS, groups=list(colors)[::-1])
+
+    # Create the figure
+    fig = go.Figure()
+
+    # Add bars for each group, with scenarios side by side
+    for column in df.columns:
+        fig.add_trace(go.Bar(
+            name=column,
+            x=df.index,
+            y=df[column],
+            marker_color=colors[column],
+            opacity=0.7,  # Make bars slightly transparent
+            hovertemplate="Scenario: %{x}<br>" +
+                         "Group: " + column + "<br>" +
+                         "Tax Rate: %{y:.1f}%<br>" +
+                         "<extra></extra>"
+        ))
+
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': f"Effective Federal Income Tax Rates on {INCOME_YEAR} Incomes under Alternative Tax Laws",
+            'y':0.95,
+            'x':0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': dict(size=24)
+        },
+        xaxis_title="Scenario",
+        yaxis_title="Effective Federal Income Tax Rate (%)",
+        barmode='group',  # Grouped bar chart
+        bargap=0.15,      # Gap between bars
+        bargroupgap=0.1,  # Gap between bar groups
+        template='plotly_white',
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=0.01,
+            bgcolor='rgba(255, 255, 255, 0.8)'
+        ),
+        margin=dict(l=80, r=30, t=100, b=50),
+        showlegend=True,
+        yaxis=dict(
+            tickformat='.0f',
+            gridcolor='lightgrey',
+            gridwidth=1,
+            zeroline=True,
+            zerolinecolor='#636363'  # Refundable credits push low-income rates below zero
+        ),
+        xaxis=dict(
+            gridcolor='lightgrey',
+            gridwidth=1
+        ),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+
+    # Save the figure as an HTML file
+    fig.write_html("scenario_comparison_visualization.html")
+
+    print("Scenario comparison has been created and saved as 'scenario_comparison_visualization.html'")
@@ -0,0 +1,249 @@
+# Policy scenario sweeps over return-level microdata
+#
+# A scenario taxes one year's returns under modified law: another year's
+# schedule (re-indexed to the returns' price level), scaled rates, a
+# different top rate, or another year's top bracket added on top:
+#
+#   scenario('1950 top bracket', income_year=2020, top_bracket_year=1950)
+#   scenario('1950 law', income_year=2020, law_year=1950)
+#   sweep(scenario('2020', income_year=2020), top_rate=[37, 50, 70, 91])
+#
+# The inputs every scenario needs (year, weight, filing status, dependents,
+# AGI, earned income, capital gains and each return's percentile bin) are
+# computed once, sorted by year and copied into named shared memory. Worker
+# processes attach to those blocks and tax their year's slice in place, so a
+# sweep of dozens of scenarios reads the microdata once and never pickles it. Group
+# rates are memoized per scenario (keyed by its parameters and a hash of the
+# shared inputs), so re-running a sweep only computes new scenarios.
+
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import tax_law
+from aggregate_cube import QUINTILES, TOP_GROUPS, build_cube, percentile_bins
+from deflators import CPI_U, price_ratio
+from memoize import memoize, stable_hash
+from microdata_tax import (adjusted_gross_income, capital_gains_split, column, earned_income, has_column,
+                          itemized_deductions)
+from tax_engine import add_top_bracket, build_tables, income_tax, override_rates, scale_tables, top_bracket
+
+SCENARIO_DEFAULTS = dict(law_year=None, index_law=True, rate_scale=1.0, top_rate=None, top_bracket_year=None)
+
+# Arrays shared with the worker processes, set by _attach
+_shared = {}
+
+
+def scenario(name, income_year, **params):
+    """A scenario: tax `income_year` returns with the given changes to the law.
+
+    law_year          schedule to apply (default: income_year)
+    index_law         rescale the schedule's dollar amounts to income_year prices
+    rate_scale        multiply every ordinary rate
+    top_rate          replace the top rate (%)
+    top_bracket_year  add that year's top bracket (threshold re-indexed) above the schedule
+    """
+    unknown = set(params) - set(SCENARIO_DEFAULTS)
+    if unknown:
+        raise TypeError(f"Unknown scenario parameters: {sorted(unknown)}")
+    return dict(SCENARIO_DEFAULTS, name=name, income_year=int(income_year), **params)
+
+
+def sweep(base, **axes):
+    """Every combination of the parameter values in `axes`, applied to `base`."""
+    names, values = list(axes), list(axes.values())
+    scenarios = []
+    for combination in itertools.product(*values):
+        changes = dict(zip(names, combination))
+        label = ', '.join(f'{name}={value}' for name, value in changes.items())
+        scenarios.append(scenario(f"{base['name']} ({label})", **{
+            **{key: value for key, value in base.items() if key != 'name'}, **changes,
+        }))
+    return scenarios
+
+
+def scenario_tables(params):
+    """Tax tables (a single year) for a scenario."""
+    income_year = params['income_year']
+    law_year = params['law_year'] or income_year
+    tables = build_tables([law_year])
+    if params['index_law'] and law_year != income_year:
+        tables = scale_tables(tables, price_ratio(law_year, income_year))
+    tables = override_rates(tables, rate_scale=params['rate_scale'], top_rate=params['top_rate'])
+    if params['top_bracket_year'] is not None:
+        donor_year = params['top_bracket_year']
+        donor = scale_tables(build_tables([donor_year]), price_ratio(donor_year, income_year))
+        tables = add_top_bracket(tables, *top_bracket(donor))
+    return tables
+
+
+def prepare_returns(returns):
+    """Per-return inputs for scenario runs, sorted by year.
+
+    Returns the arrays and {year: (start, stop)} row ranges.
+    """
+    years = column(returns, 'year')
+    order = np.argsort(years, kind='stable')
+    weight = column(returns, 'weight', np.float64)
+    agi = adjusted_gross_income(returns)
+    arrays = {
+        'year': years[order],
+        'weight': weight[order],
+        'filing_status': column(returns, 'filing_status')[order],
+        'dependents': column(returns, 'dependents')[order] if has_column(returns, 'dependents')
+        else np.zeros(len(order), dtype=np.int8),
+        'agi': agi[order],
+        'earned': earned_income(returns)[order],
+        'bin': percentile_bins(years, agi, weight)[order],
+    }
+    # Capital gains, qualified dividends and deductions, for each scenario's
+    # capital gains rates and exclusion and its AMT
+    for name in ('short_term_gains', 'long_term_gains', 'qualified_dividends', 'property_taxes',
+                 'itemized_deductions'):
+        if has_column(returns, name):
+            arrays[name] = column(returns, name, np.float64)[order]
+    sorted_years = arrays['year']
+    starts = np.flatnonzero(np.r_[True, sorted_years[1:] != sorted_years[:-1]]) if len(order) else np.array([], int)
+    stops = np.r_[starts[1:], len(order)]
+    year_rows = {int(sorted_years[start]): (int(start), int(stop)) for start, stop in zip(starts, stops)}
+    return arrays, year_rows
+
+
+class SharedReturns:
+    """Prepared return arrays held in named shared memory blocks."""
+
+    def __init__(self, blocks, spec, owner):
+        self._blocks = blocks
+        self.spec = spec
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[name].buf)
+            for name, (_, dtype, shape) in spec['arrays'].items()
+        }
+
+    @classmethod
+    def create(cls, arrays, **extra):
+        """Copy `arrays` into new shared memory; `extra` is passed to workers in the spec."""
+        blocks, spec = {}, {'arrays': {}, **extra}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            blocks[name] = block
+            spec['arrays'][name] = (block.name, array.dtype.str, array.shape)
+        return cls(blocks, spec, owner=True)
+
+    @classmethod
+    def attach(cls, spec):
+        blocks = {}
+        for name, (block_name, _, _) in spec['arrays'].items():
+            blocks[name] = shared_memory.SharedMemory(name=block_name)
+        return cls(blocks, spec, owner=False)
+
+    def close(self):
+        self.arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _attach(spec):
+    _shared['returns'] = SharedReturns.attach(spec)
+
+
+def _year_slice(year):
+    returns = _shared['returns']
+    if year not in returns.spec['year_rows']:
+        raise ValueError(f"No returns for {year}")
+    start, stop = returns.spec['year_rows'][year]
+    return {name: array[start:stop] for name, array in returns.arrays.items()}
+
+
+@memoize(version=5, depends=(
+    tax_law.ORDINARY_SCHEDULES, tax_law.EITC_SCHEDULES, tax_law.CHILD_CREDIT_SCHEDULES,
+    tax_law.CAPITAL_GAINS_SCHEDULES, tax_law.AMT_SCHEDULES, tax_law.SALT_CAPS, CPI_U,
+))
+def scenario_rates(params, groups, data_key):
+    """Effective federal income tax rate (%) by group under one scenario.
+
+    Reads the shared returns of the current process; `data_key` identifies
+    them in the cache key.
+    """
+    rows = _year_slice(params['income_year'])
+    tables = scenario_tables(params)
+    statutory_agi, preferential = capital_gains_split(rows, 0, tables, agi=rows['agi'])
+    itemized, salt = itemized_deductions(rows)
+    tax = income_tax(statutory_agi, rows['filing_status'], 0, tables, children=rows['dependents'],
+                     earned=rows['earned'], preferential=preferential, itemized=itemized, salt=salt, amt=True)
+    cube = build_cube(rows['year'], rows['bin'], np.zeros(len(tax), dtype=np.int8), rows['weight'],
+                      {'income': rows['agi'], 'tax': tax}, state_labels=('US',))
+    return cube.rates('tax', groups=groups)[0].tolist()
+
+
+def _run(job):
+    params, groups, data_key = job
+    return scenario_rates(params, groups, data_key)
+
+
+def run_scenarios(returns, scenarios, groups=QUINTILES + TOP_GROUPS, workers=None):
+    """Effective rates by group for each scenario, as a frame indexed by scenario name.
+
+    Cached scenarios are read back; the rest are spread over `workers`
+    processes (default: one per CPU) sharing a single copy of the inputs.
+    """
+    arrays, year_rows = prepare_returns(returns)
+    data_key = stable_hash(arrays)
+    jobs = [({key: value for key, value in params.items() if key != 'name'}, list(groups), data_key)
+            for params in scenarios]
+    results = {}
+    for i, job in enumerate(jobs):
+        try:
+            results[i] = scenario_rates.cached(*job)
+        except KeyError:
+            pass
+
+    pending = [i for i in range(len(jobs)) if i not in results]
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        with SharedReturns.create(arrays, year_rows=year_rows) as shared:
+            del arrays
+            if workers == 1:
+                _shared['returns'] = shared
+                try:
+                    computed = [_run(jobs[i]) for i in pending]
+                finally:
+                    _shared.clear()
+            else:
+                with ProcessPoolExecutor(workers, initializer=_attach, initargs=(shared.spec,)) as pool:
+                    computed = list(pool.map(_run, [jobs[i] for i in pending]))
+        results.update(zip(pending, computed))
+
+    return pd.DataFrame([results[i] for i in range(len(jobs))], columns=list(groups),
+                        index=pd.Index([params['name'] for params in scenarios], name='Scenario'))
+
+
+if __name__ == '__main__':
+    from microdata_store import MicrodataStore
+
+    parser = argparse.ArgumentParser(description="Effective rates by group under a sweep of top rates")
+    parser.add_argument('store_dir')
+    parser.add_argument('--year', type=int, default=2020)
+    parser.add_argument('--top-rates', type=float, nargs='+', default=[37, 50, 70, 91])
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    base = scenario(f'{args.year} law', income_year=args.year)
+    print(run_scenarios(MicrodataStore(args.store_dir), [base] + sweep(base, top_rate=args.top_rates),
+                        workers=args.workers).round(1).to_string())
@@ -0,0 +1,97 @@
+import sys
+
+import plotly.graph_objects as go
+
+from microdata_schema import STATES
+from microdata_store import MicrodataStore
+from state_tax import build_state_cube, state_rates
+
+# Microdata store to tax (see microdata_store.py)
+store_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/returns'
+
+# State, federal and combined income taxes for every return, from one pass
+cube = build_state_cube(MicrodataStore(store_dir))
+year = int(cube.years.max())
+
+# Groups selectable from the dropdown
+groups = ['Middle Quintile', 'Highest Quintile', 'Top 1%', 'Top 0.1%']
+colors = {
+    'federal_income_tax': '#1f77b4',  # Blue
+    'state_income_tax': '#ff7f0e'     # Orange
+}
+names = {
+    'federal_income_tax': "Federal Income Tax",
+    'state_income_tax': "State Income Tax"
+}
+
+# Create the figure: for each group, federal and state rates stacked per
+# state, ordered by the combined rate
+fig = go.Figure()
+buttons = []
+for i, group in enumerate(groups):
+    rates = {measure: state_rates(cube, measure, group, year) for measure in colors}
+    order = state_rates(cube, 'combined_tax', group, year).dropna().sort_values().index
+    for measure in colors:
+        fig.add_trace(go.Bar(
+            name=names[measure],
+            x=rates[measure][order],
+            y=list(order),
+            orientation='h',
+            marker_color=colors[measure],
+            visible=(i == 0),
+            hovertemplate="State: %{y}<br>" +
+                         names[measure] + ": %{x:.1f}%<br>" +
+                         "<extra></extra>"
+        ))
+    buttons.append(dict(
+        label=group,
+        method='update',
+        args=[{'visible': [j // len(colors) == i for j in range(len(groups) * len(colors))]},
+              {'title.text': f"Combined State and Federal Income Tax Rates by State, {group} ({year})"}]
+    ))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': f"Combined State and Federal Income Tax Rates by State, {groups[0]} ({year})",
+        'y':0.97,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=24)
+    },
+    xaxis_title="Effective Tax Rate (% of AGI)",
+    yaxis_title="State",
+    barmode='relative',  # Stack federal and state rates (refundable credits can push federal below zero)
+    template='plotly_white',
+    updatemenus=[dict(
+        buttons=buttons,
+        direction='down',
+        x=0.01,
+        xanchor='left',
+        y=1.06,
+        yanchor='top'
+    )],
+    legend=dict(
+        yanchor="bottom",
+        y=0.01,
+        xanchor="right",
+        x=0.99,
+        bgcolor='rgba(255, 255, 255, 0.8)'
+    ),
+    height=max(600, 18 * len(STATES)),
+    margin=dict(l=80, r=30, t=120, b=50),
+    showlegend=True,
+    xaxis=dict(
+        tickformat='.0f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+
+# Save the figure as an HTML file
+fig.write_html("state_combined_rates_visualization.html")
+
+print("State combined rates visualization has been created and saved as 'state_combined_rates_visualization.html'")
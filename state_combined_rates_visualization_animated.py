@@ -0,0 +1,105 @@
+import sys
+
+import plotly.graph_objects as go
+
+from animation import animate_years, write_animated_html
+from microdata_schema import STATES
+from microdata_store import MicrodataStore
+from state_tax import build_state_cube, state_rates
+
+# Microdata store to tax (see microdata_store.py)
+store_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/returns'
+
+# State, federal and combined income taxes for every return, from one pass
+cube = build_state_cube(MicrodataStore(store_dir))
+years = [int(year) for year in cube.years]
+
+# Groups selectable from the dropdown
+groups = ['Middle Quintile', 'Highest Quintile', 'Top 1%', 'Top 0.1%']
+colors = {
+    'federal_income_tax': '#1f77b4',  # Blue
+    'state_income_tax': '#ff7f0e'     # Orange
+}
+names = {
+    'federal_income_tax': "Federal Income Tax",
+    'state_income_tax': "State Income Tax"
+}
+
+# Create the figure: for each group, federal and state rates stacked per
+# state, ordered by the latest year's combined rate; the animation changes
+# only the rates
+fig = go.Figure()
+buttons = []
+values = {year: {} for year in years}
+for i, group in enumerate(groups):
+    order = state_rates(cube, 'combined_tax', group, years[-1]).dropna().sort_values().index
+    for measure in colors:
+        for year in years:
+            values[year][len(fig.data)] = dict(x=state_rates(cube, measure, group, year)[order])
+        fig.add_trace(go.Bar(
+            name=names[measure],
+            x=values[years[-1]][len(fig.data)]['x'],
+            y=list(order),
+            orientation='h',
+            marker_color=colors[measure],
+            visible=(i == 0),
+            hovertemplate="State: %{y}<br>" +
+                         names[measure] + ": %{x:.1f}%<br>" +
+                         "<extra></extra>"
+        ))
+    buttons.append(dict(
+        label=group,
+        method='update',
+        args=[{'visible': [j // len(colors) == i for j in range(len(groups) * len(colors))]},
+              {'title.text': f"Combined State and Federal Income Tax Rates by State, {group}"}]
+    ))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': f"Combined State and Federal Income Tax Rates by State, {groups[0]}",
+        'y':0.97,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=24)
+    },
+    xaxis_title="Effective Tax Rate (% of AGI)",
+    yaxis_title="State",
+    barmode='relative',  # Stack federal and state rates (refundable credits can push federal below zero)
+    template='plotly_white',
+    updatemenus=[dict(
+        buttons=buttons,
+        direction='down',
+        x=0.01,
+        xanchor='left',
+        y=1.06,
+        yanchor='top'
+    )],
+    legend=dict(
+        yanchor="bottom",
+        y=0.01,
+        xanchor="right",
+        x=0.99,
+        bgcolor='rgba(255, 255, 255, 0.8)'
+    ),
+    height=max(600, 18 * len(STATES)) + 100,
+    margin=dict(l=80, r=30, t=120, b=150),
+    showlegend=True,
+    xaxis=dict(
+        tickformat='.0f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+
+# Frames carry only the rates of each year
+frames = animate_years(fig, years, values, decimals=2)
+
+# Save the figure as an HTML file, with the frames loaded after the page
+write_animated_html(fig, frames, "state_combined_rates_visualization_animated.html", lazy=True)
+
+print("Animated state combined rates visualization has been created and saved as "
+      "'state_combined_rates_visualization_animated.html'")
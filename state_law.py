@@ -0,0 +1,295 @@
+# State individual income tax parameters (1950-2025)
+#
+# Regimes per state (postal code), as in tax_law.py: each applies from its
+# `start` year until the next regime begins. Dollar amounts are in
+# PRICE_YEAR dollars and are scaled with CPI-U to every year, which stands
+# in both for the indexing of current schedules and for the lower nominal
+# amounts of older ones. Graduated schedules are current law back to the
+# first listed change; rate changes, adoptions and repeals of the tax are
+# listed where they matter. The base is federal AGI less a standard
+# `deduction` and an `exemption` per person (filer, spouse and dependents).
+# Itemized deductions, credits and local income taxes are not modelled.
+#
+# Joint filers use the `joint` brackets when given, otherwise the single
+# thresholds times `joint_scale`; heads of household use the single
+# brackets. `brackets=None` means no broad-based income tax (New Hampshire
+# and Tennessee taxed only interest and dividends).
+
+from deflators import price_ratio
+from tax_law import FILING_STATUSES, _regime
+
+PRICE_YEAR = 2023
+
+
+def _flat(rate):
+    return [(0, rate)]
+
+
+def _amounts(single, joint=None, head=None):
+    return {
+        'single': single,
+        'married_joint': 2 * single if joint is None else joint,
+        'head_of_household': single if head is None else head,
+    }
+
+
+# Federal standard deduction, which several states adopt
+_FEDERAL_DEDUCTION = _amounts(13850, 27700, 20800)
+_NO_DEDUCTION = _amounts(0)
+
+
+def _regimes(common, *changes):
+    # Each change is (start, brackets) or (start, brackets, overrides)
+    regimes = []
+    for change in changes:
+        start, brackets = change[:2]
+        regime = dict(dict(joint=None, joint_scale=2, deduction=_NO_DEDUCTION, exemption=0), **common)
+        regime.update(start=start, brackets=brackets, **(change[2] if len(change) > 2 else {}))
+        regimes.append(regime)
+    return regimes
+
+
+_NO_TAX = _regimes({}, (1950, None))
+
+STATE_SCHEDULES = {
+    'AL': _regimes(dict(deduction=_amounts(2500, 7500, 4700), exemption=1500),
+                   (1950, [(0, 2), (500, 4), (3000, 5)])),
+    # Repealed in 1980; the earlier schedule is approximate
+    'AK': _regimes({}, (1950, [(0, 3), (10000, 5), (40000, 9), (150000, 14.5)]), (1980, None)),
+    'AZ': _regimes(dict(deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 2.59), (28653, 3.34), (57305, 4.17), (171915, 4.5)]),
+                   (2023, _flat(2.5))),
+    'AR': _regimes(dict(joint_scale=1, deduction=_amounts(2270)),
+                   (1950, [(0, 1), (4300, 2.5), (8500, 3.5), (12700, 4.5), (21200, 6), (35100, 7)]),
+                   (2019, [(0, 2), (4400, 4), (8800, 5.9)]),
+                   (2023, [(0, 2), (4400, 4), (8800, 4.7)])),
+    'CA': _regimes(dict(deduction=_amounts(5363, 10726, 10726)),
+                   (1950, [(0, 1), (10412, 2), (24684, 3), (38959, 4), (54081, 5), (68350, 6)]),
+                   (1959, [(0, 1), (10412, 2), (24684, 3), (38959, 4), (54081, 5), (68350, 6), (100000, 7)]),
+                   (1967, [(0, 1), (10412, 2), (24684, 4), (38959, 6), (54081, 8), (68350, 9), (100000, 10)]),
+                   (1971, [(0, 1), (10412, 2), (24684, 4), (38959, 6), (54081, 8), (68350, 9.3), (100000, 10),
+                           (150000, 11)]),
+                   (1988, [(0, 1), (10412, 2), (24684, 4), (38959, 6), (54081, 8), (68350, 9.3)]),
+                   # Mental health services surcharge on incomes over $1 million
+                   (2005, [(0, 1), (10412, 2), (24684, 4), (38959, 6), (54081, 8), (68350, 9.3), (1000000, 10.3)]),
+                   (2012, [(0, 1), (10412, 2), (24684, 4), (38959, 6), (54081, 8), (68350, 9.3), (349137, 10.3),
+                           (418961, 11.3), (698271, 12.3), (1000000, 13.3)])),
+    # Graduated until 1987 (approximate), then a flat tax
+    'CO': _regimes(dict(deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 1), (10000, 3), (30000, 5), (60000, 8)]),
+                   (1987, _flat(5)), (1999, _flat(4.75)), (2000, _flat(4.63)), (2020, _flat(4.55)),
+                   (2022, _flat(4.4)), (2025, _flat(4.25))),
+    'CT': _regimes(dict(deduction=_amounts(15000, 24000, 19000)),
+                   (1950, None), (1991, _flat(4.5)),
+                   (1996, [(0, 3), (10000, 4.5)]),
+                   (2003, [(0, 3), (10000, 5)]),
+                   (2011, [(0, 3), (10000, 5), (50000, 5.5), (100000, 6), (200000, 6.5), (250000, 6.7)]),
+                   (2015, [(0, 3), (10000, 5), (50000, 5.5), (100000, 6), (200000, 6.5), (250000, 6.9),
+                           (500000, 6.99)]),
+                   (2024, [(0, 2), (10000, 4.5), (50000, 5.5), (100000, 6), (200000, 6.5), (250000, 6.9),
+                           (500000, 6.99)])),
+    'DE': _regimes(dict(joint_scale=1, deduction=_amounts(3250)),
+                   (1950, [(0, 0), (2000, 2.2), (5000, 3.9), (10000, 4.8), (20000, 5.2), (25000, 5.55),
+                           (60000, 6.6)])),
+    'DC': _regimes(dict(joint_scale=1, deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 4), (10000, 6), (40000, 6.5), (60000, 8.5), (350000, 8.75), (1000000, 8.95)]),
+                   (2022, [(0, 4), (10000, 6), (40000, 6.5), (60000, 8.5), (250000, 9.25), (500000, 9.75),
+                           (1000000, 10.75)])),
+    'FL': _NO_TAX,
+    'GA': _regimes(dict(deduction=_amounts(5400, 7100), exemption=2700),
+                   (1950, [(0, 1), (750, 2), (2250, 3), (3750, 4), (5250, 5), (7000, 5.75)],
+                    dict(joint=[(0, 1), (1000, 2), (3000, 3), (5000, 4), (7000, 5), (10000, 5.75)])),
+                   (2024, _flat(5.49)), (2025, _flat(5.39))),
+    'HI': _regimes(dict(deduction=_amounts(2200, 4400, 3212), exemption=1144),
+                   (1950, [(0, 1.4), (2400, 3.2), (4800, 5.5), (9600, 6.4), (14400, 6.8), (19200, 7.2),
+                           (24000, 7.6), (36000, 7.9), (48000, 8.25)]),
+                   (2009, [(0, 1.4), (2400, 3.2), (4800, 5.5), (9600, 6.4), (14400, 6.8), (19200, 7.2),
+                           (24000, 7.6), (36000, 7.9), (48000, 8.25), (150000, 9), (175000, 10), (200000, 11)])),
+    'ID': _regimes(dict(deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 1), (1700, 3), (5000, 4.5), (8300, 5.5), (12500, 6.5), (20000, 7.8)]),
+                   (2023, [(0, 0), (4489, 5.8)]),
+                   (2025, [(0, 0), (4673, 5.3)])),
+    'IL': _regimes(dict(exemption=2425),
+                   (1950, None), (1969, _flat(2.5)), (1983, _flat(3)), (2011, _flat(5)), (2015, _flat(3.75)),
+                   (2017, _flat(4.95))),
+    'IN': _regimes(dict(exemption=1000),
+                   (1950, None), (1963, _flat(2)), (1983, _flat(3)), (1987, _flat(3.4)), (2015, _flat(3.3)),
+                   (2017, _flat(3.23)), (2023, _flat(3.15)), (2025, _flat(3))),
+    'IA': _regimes(dict(joint_scale=1, deduction=_amounts(2210, 5450, 5450)),
+                   (1950, [(0, 0.33), (1743, 0.67), (3486, 2.25), (6972, 4.14), (15687, 5.63), (26145, 5.96),
+                           (34860, 6.25), (52290, 7.44), (78435, 8.53)]),
+                   (2023, [(0, 4.4), (6000, 4.82), (30000, 5.7), (75000, 6)]),
+                   (2025, _flat(3.8))),
+    'KS': _regimes(dict(deduction=_amounts(3500, 8000, 6000), exemption=2250),
+                   (1950, [(0, 3.1), (15000, 5.25), (30000, 5.7)]),
+                   (2013, [(0, 2.7), (15000, 4.8)]),
+                   (2017, [(0, 2.9), (15000, 4.9), (30000, 5.2)]),
+                   (2018, [(0, 3.1), (15000, 5.25), (30000, 5.7)]),
+                   (2024, [(0, 5.2), (23000, 5.58)])),
+    'KY': _regimes(dict(deduction=_amounts(2980)),
+                   (1950, [(0, 2), (3000, 3), (4000, 4), (5000, 5), (8000, 5.8), (75000, 6)]),
+                   (2018, _flat(5)), (2023, _flat(4.5)), (2024, _flat(4))),
+    'LA': _regimes(dict(exemption=4500),
+                   (1950, [(0, 2), (12500, 4), (50000, 6)]),
+                   (2022, [(0, 1.85), (12500, 3.5), (50000, 4.25)]),
+                   (2025, _flat(3))),
+    'ME': _regimes(dict(deduction=_FEDERAL_DEDUCTION, exemption=4700),
+                   (1950, None), (1969, [(0, 5.8), (24500, 6.75), (58050, 7.15)])),
+    'MD': _regimes(dict(joint_scale=1, deduction=_amounts(2550, 5100, 5100), exemption=3200),
+                   (1950, [(0, 2), (1000, 3), (2000, 4), (3000, 4.75)]),
+                   (2008, [(0, 2), (1000, 3), (2000, 4), (3000, 4.75), (100000, 5), (125000, 5.25),
+                           (150000, 5.5), (250000, 5.75)])),
+    'MA': _regimes(dict(exemption=4400),
+                   (1950, _flat(5)), (1975, _flat(5.375)), (1989, _flat(5.95)), (2002, _flat(5.3)),
+                   (2012, _flat(5.25)), (2014, _flat(5.2)), (2015, _flat(5.15)), (2016, _flat(5.1)),
+                   (2019, _flat(5.05)), (2020, _flat(5)),
+                   # Surtax on incomes over $1 million
+                   (2023, [(0, 5), (1000000, 9)], dict(joint_scale=1))),
+    'MI': _regimes(dict(exemption=5400),
+                   (1950, None), (1967, _flat(2.6)), (1971, _flat(3.9)), (1975, _flat(4.6)), (1994, _flat(4.4)),
+                   (2000, _flat(4.2)), (2004, _flat(3.9)), (2007, _flat(4.35)), (2012, _flat(4.25)),
+                   (2023, _flat(4.05)), (2024, _flat(4.25))),
+    'MN': _regimes(dict(deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 5.35), (30070, 7.05), (98760, 7.85)],
+                    dict(joint=[(0, 5.35), (43950, 7.05), (174610, 7.85)])),
+                   (2013, [(0, 5.35), (30070, 6.8), (98760, 7.85), (183340, 9.85)],
+                    dict(joint=[(0, 5.35), (43950, 6.8), (174610, 7.85), (304970, 9.85)]))),
+    'MS': _regimes(dict(deduction=_amounts(2300, 4600, 3400), exemption=6000),
+                   (1950, [(0, 3), (5000, 4), (10000, 5)]),
+                   (2023, [(0, 0), (10000, 5)]),
+                   (2024, [(0, 0), (10000, 4.7)])),
+    'MO': _regimes(dict(joint_scale=1, deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 1.5), (1053, 2), (2106, 2.5), (3159, 3), (4212, 3.5), (5265, 4), (6318, 4.5),
+                           (7371, 5), (8424, 5.5), (9477, 6)]),
+                   (2019, [(0, 0), (1207, 2), (2414, 2.5), (3621, 3), (4828, 3.5), (6035, 4), (7242, 4.5),
+                           (8449, 5.4)]),
+                   (2023, [(0, 0), (1207, 2), (2414, 2.5), (3621, 3), (4828, 3.5), (6035, 4), (7242, 4.5),
+                           (8449, 4.95)])),
+    'MT': _regimes(dict(deduction=_amounts(5540), exemption=2580),
+                   (1950, [(0, 1), (3600, 2), (6300, 3), (9700, 4), (13000, 5), (16800, 6), (21600, 6.75)],
+                    dict(joint_scale=1)),
+                   (2024, [(0, 4.7), (20500, 5.9)])),
+    'NE': _regimes(dict(deduction=_amounts(7900, 15800, 11600)),
+                   (1950, None),
+                   (1968, [(0, 2.46), (3700, 3.51), (22170, 5.01), (35730, 6.84)]),
+                   (2023, [(0, 2.46), (3700, 3.51), (22170, 5.01), (35730, 5.84)]),
+                   (2024, [(0, 2.46), (3700, 3.51), (22170, 5.01), (35730, 5.2)])),
+    'NV': _NO_TAX,
+    'NH': _NO_TAX,
+    'NJ': _regimes(dict(joint_scale=1, exemption=1000),
+                   (1950, None),
+                   (1976, [(0, 2), (107000, 2.5)]),
+                   (1990, [(0, 1.4), (20000, 1.75), (35000, 3.5), (40000, 5.525), (75000, 6.37)]),
+                   (2004, [(0, 1.4), (20000, 1.75), (35000, 3.5), (40000, 5.525), (75000, 6.37), (500000, 8.97)]),
+                   (2018, [(0, 1.4), (20000, 1.75), (35000, 3.5), (40000, 5.525), (75000, 6.37), (500000, 8.97),
+                           (5000000, 10.75)]),
+                   (2020, [(0, 1.4), (20000, 1.75), (35000, 3.5), (40000, 5.525), (75000, 6.37), (500000, 8.97),
+                           (1000000, 10.75)],
+                    dict(joint=[(0, 1.4), (20000, 1.75), (50000, 2.45), (70000, 3.5), (80000, 5.525),
+                                (150000, 6.37), (500000, 8.97), (1000000, 10.75)]))),
+    'NM': _regimes(dict(deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 1.7), (5500, 3.2), (11000, 4.7), (16000, 4.9)],
+                    dict(joint=[(0, 1.7), (8000, 3.2), (16000, 4.7), (24000, 4.9)])),
+                   (2021, [(0, 1.7), (5500, 3.2), (11000, 4.7), (16000, 4.9), (210000, 5.9)],
+                    dict(joint=[(0, 1.7), (8000, 3.2), (16000, 4.7), (24000, 4.9), (315000, 5.9)]))),
+    'NY': _regimes(dict(deduction=_amounts(8000, 16050, 11200)),
+                   (1950, [(0, 2), (8500, 3), (17000, 4), (25500, 5), (34000, 6), (42500, 7)]),
+                   (1959, [(0, 2), (8500, 3), (17000, 4), (25500, 5), (34000, 6), (42500, 7), (60000, 8),
+                           (80000, 9), (100000, 10)]),
+                   (1968, [(0, 2), (8500, 3), (17000, 4), (25500, 5), (34000, 6), (42500, 7), (60000, 8),
+                           (80000, 9), (100000, 10), (150000, 11), (200000, 12), (250000, 13), (300000, 14)]),
+                   (1987, [(0, 4), (8500, 4.5), (11700, 5.25), (13900, 5.9), (21400, 6.85), (80650, 7.875)]),
+                   (1997, [(0, 4), (8500, 4.5), (11700, 5.25), (13900, 5.9), (21400, 6.85)]),
+                   (2009, [(0, 4), (8500, 4.5), (11700, 5.25), (13900, 5.9), (21400, 6.85), (300000, 7.85),
+                           (500000, 8.97)]),
+                   (2012, [(0, 4), (8500, 4.5), (11700, 5.25), (13900, 5.9), (21400, 6.45), (80650, 6.65),
+                           (215400, 6.85), (1077550, 8.82)]),
+                   (2021, [(0, 4), (8500, 4.5), (11700, 5.25), (13900, 5.5), (80650, 6), (215400, 6.85),
+                           (1077550, 9.65), (5000000, 10.3), (25000000, 10.9)])),
+    'NC': _regimes(dict(deduction=_amounts(12750, 25500, 19125)),
+                   (1950, [(0, 3), (25000, 4), (50000, 5), (76000, 6), (126000, 7)]),
+                   (1989, [(0, 6), (21250, 7)]),
+                   (2001, [(0, 6), (21250, 7), (120000, 7.75)]),
+                   (2014, _flat(5.8)), (2015, _flat(5.75)), (2017, _flat(5.499)), (2019, _flat(5.25)),
+                   (2022, _flat(4.99)), (2023, _flat(4.75)), (2024, _flat(4.5)), (2025, _flat(4.25))),
+    'ND': _regimes(dict(deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 1.1), (44725, 2.04), (108325, 2.27), (225975, 2.64), (491350, 2.9)]),
+                   (2023, [(0, 0), (44725, 1.95), (225975, 2.5)],
+                    dict(joint=[(0, 0), (74750, 1.95), (275100, 2.5)]))),
+    # Ohio's schedules before 2019 are approximate
+    'OH': _regimes(dict(joint_scale=1, exemption=2400),
+                   (1950, None),
+                   (1972, [(0, 0.5), (26050, 1), (52000, 2), (78000, 2.5), (104000, 3), (208000, 3.5)]),
+                   (1983, [(0, 0.95), (26050, 1.9), (52000, 3.8), (78000, 4.75), (104000, 5.7), (150000, 6.65),
+                           (208000, 7.6), (300000, 8.55), (400000, 9.5)]),
+                   (2005, [(0, 0.5), (26050, 2.6), (52000, 3.9), (78000, 4.6), (104000, 5.2), (208000, 5.9)]),
+                   (2019, [(0, 0), (26050, 2.75), (100000, 3.688), (115300, 3.75)]),
+                   (2024, [(0, 0), (26050, 2.75), (100000, 3.5)])),
+    'OK': _regimes(dict(deduction=_amounts(6350, 12700, 9350), exemption=1000),
+                   (1950, [(0, 0.5), (1000, 1), (2500, 2), (3750, 3), (4900, 4), (7200, 5), (8700, 6)]),
+                   (2008, [(0, 0.5), (1000, 1), (2500, 2), (3750, 3), (4900, 4), (7200, 5), (8700, 5.25)]),
+                   (2016, [(0, 0.5), (1000, 1), (2500, 2), (3750, 3), (4900, 4), (7200, 5)]),
+                   (2022, [(0, 0.25), (1000, 0.75), (2500, 1.75), (3750, 2.75), (4900, 3.75), (7200, 4.75)])),
+    'OR': _regimes(dict(deduction=_amounts(2605, 5210, 4195)),
+                   (1950, [(0, 4.75), (4050, 6.75), (10200, 9)]),
+                   (2009, [(0, 4.75), (4050, 6.75), (10200, 8.75), (125000, 9.9)])),
+    'PA': _regimes({},
+                   (1950, None), (1971, _flat(2.3)), (1973, _flat(2)), (1974, _flat(2.2)), (1987, _flat(2.1)),
+                   (1991, _flat(2.8)), (2004, _flat(3.07))),
+    # Rhode Island's tax was a share of federal liability until 2011 (approximate)
+    'RI': _regimes(dict(joint_scale=1, deduction=_amounts(10000, 20050, 15000), exemption=4700),
+                   (1950, None),
+                   (1971, [(0, 3.75), (73450, 7), (166950, 9.9)]),
+                   (2011, [(0, 3.75), (73450, 4.75), (166950, 5.99)])),
+    'SC': _regimes(dict(joint_scale=1, deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 0), (3200, 3), (6410, 4), (9620, 5), (12820, 6), (16040, 7)]),
+                   (2022, [(0, 0), (3200, 3), (16040, 6.5)]),
+                   (2024, [(0, 0), (3200, 3), (16040, 6.4)])),
+    'SD': _NO_TAX,
+    'TN': _NO_TAX,
+    'TX': _NO_TAX,
+    # Utah's taxpayer credit is approximated by the federal standard deduction
+    'UT': _regimes(dict(deduction=_FEDERAL_DEDUCTION),
+                   (1950, [(0, 2.3), (2500, 3.3), (5000, 4.3), (7500, 5.3), (10000, 6.3), (12500, 7)]),
+                   (2008, _flat(5)), (2018, _flat(4.95)), (2022, _flat(4.85)), (2023, _flat(4.65)),
+                   (2024, _flat(4.55)), (2025, _flat(4.5))),
+    # Vermont's tax was a share of federal liability until 2009 (approximate)
+    'VT': _regimes(dict(deduction=_amounts(7000, 14050, 10500), exemption=4850),
+                   (1950, [(0, 3.6), (45400, 7.2), (110050, 8.5), (229550, 9.5)],
+                    dict(joint=[(0, 3.6), (75850, 7.2), (183400, 8.5), (279450, 9.5)])),
+                   (2009, [(0, 3.35), (45400, 6.6), (110050, 7.6), (229550, 8.75)],
+                    dict(joint=[(0, 3.35), (75850, 6.6), (183400, 7.6), (279450, 8.75)]))),
+    'VA': _regimes(dict(joint_scale=1, deduction=_amounts(8000, 16000, 8000), exemption=930),
+                   (1950, [(0, 2), (3000, 3), (5000, 5)]),
+                   (1987, [(0, 2), (3000, 3), (5000, 5), (17000, 5.75)])),
+    'WA': _NO_TAX,
+    'WV': _regimes(dict(joint_scale=1, exemption=2000),
+                   (1950, None),
+                   (1961, [(0, 3), (10000, 4), (25000, 4.5), (40000, 6), (60000, 6.5)]),
+                   (2023, [(0, 2.36), (10000, 3.15), (25000, 3.54), (40000, 4.72), (60000, 5.12)])),
+    'WI': _regimes(dict(deduction=_amounts(12760, 23620, 16480), exemption=700),
+                   (1950, [(0, 4), (13810, 5.84), (27630, 6.27), (304170, 7.65)],
+                    dict(joint=[(0, 4), (18420, 5.84), (36840, 6.27), (405550, 7.65)])),
+                   (2023, [(0, 3.54), (13810, 4.65), (27630, 5.3), (304170, 7.65)],
+                    dict(joint=[(0, 3.54), (18420, 4.65), (36840, 5.3), (405550, 7.65)]))),
+    'WY': _NO_TAX,
+}
+
+
+def state_schedule(state, year):
+    """State income tax parameters for `state` and `year` in that year's dollars, or None without a tax."""
+    schedule = _regime(STATE_SCHEDULES[state], year)
+    if schedule['brackets'] is None:
+        return None
+    factor = float(price_ratio(PRICE_YEAR, year))
+    joint = schedule['joint'] or [(threshold * schedule['joint_scale'], rate)
+                                  for threshold, rate in schedule['brackets']]
+    brackets = {'single': schedule['brackets'], 'married_joint': joint, 'head_of_household': schedule['brackets']}
+    return dict(
+        brackets={
+            status: [(threshold * factor, rate) for threshold, rate in brackets[status]]
+            for status in FILING_STATUSES
+        },
+        deduction={status: schedule['deduction'][status] * factor for status in FILING_STATUSES},
+        exemption=schedule['exemption'] * factor,
+    )
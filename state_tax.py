@@ -0,0 +1,150 @@
+# Vectorized state income tax, and federal income tax with the SALT deduction
+#
+# `build_state_tables` lays out every (state, year, filing status) schedule
+# from state_law.py as one row of a single bracket table, plus a zero-tax row
+# per (year, status) for returns without a state. Returns are sorted once by
+# their row, so one searchsorted pass walks the table in order for every
+# state at once and per-row parameters are gathered from contiguous runs;
+# results are scattered back to the original order.
+#
+# State income tax (with property taxes) is deductible for federal
+# itemizers, capped from 2018, so the federal tax is computed after the
+# state tax and depends on it.
+#
+#   python state_tax.py microdata/returns --year 2020 --group "Top 1%"
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from aggregate_cube import build_cube, percentile_bins
+from microdata_schema import STATES
+from microdata_tax import adjusted_gross_income, column, earned_income, federal_income_tax, has_column, year_indices
+from state_law import state_schedule
+from tax_engine import bracket_lookup, schedule_tax
+from tax_law import FILING_STATUSES
+
+# Row stride of the state bracket table; thresholds stay far below half of
+# it, and rows x stride stays well inside float64's exact integer range
+STATE_ROW_STRIDE = 2.0 ** 32
+
+_JOINT = FILING_STATUSES.index('married_joint')
+
+
+def build_state_tables(years, states=STATES, statuses=FILING_STATUSES):
+    """Tabulate state parameters as (state, year, status) arrays.
+
+    An extra last state row has no tax, for returns without a state.
+    """
+    years = [int(year) for year in years]
+    n_states, n_years, n_statuses = len(states) + 1, len(years), len(statuses)
+    schedules = [[state_schedule(state, year) for year in years] for state in states]
+    n_brackets = max([len(schedule['brackets'][status]) for rows in schedules for schedule in rows
+                      if schedule is not None for status in statuses] or [1])
+
+    thresholds = np.full((n_states, n_years, n_statuses, n_brackets), STATE_ROW_STRIDE / 2)
+    thresholds[..., 0] = 0
+    rates = np.zeros((n_states, n_years, n_statuses, n_brackets))
+    deduction = np.zeros((n_states, n_years, n_statuses))
+    exemption = np.zeros((n_states, n_years))
+    for i, rows in enumerate(schedules):
+        for y, schedule in enumerate(rows):
+            if schedule is None:
+                continue
+            exemption[i, y] = schedule['exemption']
+            for s, status in enumerate(statuses):
+                brackets = schedule['brackets'][status]
+                thresholds[i, y, s, :len(brackets)] = [threshold for threshold, _ in brackets]
+                rates[i, y, s, :len(brackets)] = [rate / 100 for _, rate in brackets]
+                # Padded slots keep the top rate so the tail of each row is flat
+                rates[i, y, s, len(brackets):] = brackets[-1][1] / 100
+                deduction[i, y, s] = schedule['deduction'][status]
+
+    return dict(
+        years=np.array(years),
+        states=tuple(states),
+        statuses=tuple(statuses),
+        **bracket_lookup(thresholds, rates, stride=STATE_ROW_STRIDE),
+        deduction=deduction,
+        exemption=exemption,
+    )
+
+
+def state_income_tax(agi, state_idx, status_idx, year_idx, tables, dependents=0):
+    """State income tax for every return.
+
+    `state_idx` indexes `tables['states']` (-1 for no state); `status_idx`
+    and `year_idx` index the statuses and years. Arrays are 1-D, one element
+    per return.
+    """
+    n_states = len(tables['states'])
+    n_years, n_statuses = len(tables['years']), len(tables['statuses'])
+    # Codes arrive as int8 from the store; widen them before the row arithmetic
+    state_idx, status_idx, year_idx = (np.asarray(idx).astype(np.intp) for idx in (state_idx, status_idx, year_idx))
+    state_idx = np.where(state_idx < 0, n_states, state_idx)
+    row = (state_idx * n_years + year_idx) * n_statuses + status_idx
+    # Sort once by schedule row: every state's returns become one contiguous
+    # run. Computed in intp, rows fit in 16 bits for centuries of years, and
+    # a stable sort of 16-bit keys is a radix sort.
+    order = np.argsort(row.astype(np.uint16) if row.max(initial=0) < 2 ** 16 else row, kind='stable')
+    row = row[order]
+    agi = np.asarray(agi, dtype=np.float64)[order]
+    persons = 1 + (status_idx[order] == _JOINT) + np.broadcast_to(dependents, order.shape)[order]
+
+    taxable = agi - tables['deduction'].ravel()[row]
+    taxable -= tables['exemption'].ravel()[row // n_statuses] * persons
+    np.maximum(taxable, 0, out=taxable)
+    tax = np.empty_like(taxable)
+    tax[order] = schedule_tax(taxable, row, tables, stride=STATE_ROW_STRIDE)
+    return tax
+
+
+def state_and_federal_tax(returns, tables=None, state_tables=None, agi=None, earned=None):
+    """State income tax and federal income tax (with the SALT deduction) for every return.
+
+    Returns a dict of 'state_income_tax', 'federal_income_tax' and their
+    sum 'combined_tax'.
+    """
+    year_idx, tables = year_indices(returns, tables)
+    state_tables = build_state_tables(tables['years']) if state_tables is None else state_tables
+    agi = adjusted_gross_income(returns) if agi is None else agi
+    earned = earned_income(returns) if earned is None else earned
+    dependents = column(returns, 'dependents') if has_column(returns, 'dependents') else 0
+    state = state_income_tax(agi, column(returns, 'state'), column(returns, 'filing_status'), year_idx,
+                             state_tables, dependents=dependents)
+    federal = federal_income_tax(returns, tables, agi=agi, earned=earned, state_tax=state)
+    return dict(state_income_tax=state, federal_income_tax=federal, combined_tax=state + federal)
+
+
+def build_state_cube(returns):
+    """Aggregate cube of income and state, federal and combined income taxes by year, group and state."""
+    years = column(returns, 'year')
+    weight = column(returns, 'weight', np.float64)
+    income = adjusted_gross_income(returns)
+    measures = dict(income=income, **state_and_federal_tax(returns, agi=income))
+    bins = percentile_bins(years, income, weight)
+    return build_cube(years, bins, column(returns, 'state'), weight, measures)
+
+
+def state_rates(cube, measure, group, year):
+    """Effective rate (%) of `measure` for `group` in every state, as a Series indexed by state code."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = 100 * cube.state_sums(measure, group, years=[year])[0] / cube.state_sums('income', group, years=[year])[0]
+    return pd.Series(rates[:len(STATES)], index=list(STATES), name=measure)
+
+
+if __name__ == '__main__':
+    from microdata_store import MicrodataStore
+
+    parser = argparse.ArgumentParser(description="State and combined income tax rates by state")
+    parser.add_argument('store_dir')
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--group', default='Middle Quintile')
+    args = parser.parse_args()
+
+    cube = build_state_cube(MicrodataStore(args.store_dir))
+    table = pd.concat([state_rates(cube, measure, args.group, args.year)
+                       for measure in ('state_income_tax', 'federal_income_tax', 'combined_tax')], axis=1)
+    print(f"Effective rates (%) for the {args.group}, {args.year}")
+    print(table.dropna().round(1).to_string())
@@ -1,35 +1,10 @@
-import pandas as pd
 import plotly.graph_objects as go
-import numpy as np
 
-# Create the data for 10-year intervals
-years = [1950, 1960, 1970, 1980, 1990, 2000, 2010, 2020]
+from derived_store import load_series
 
-# Original data (approximate state tax rates across income groups)
-data_original = {
-    'Year': years,
-    'Lowest Quintile': [2, 3, 3.5, 4, 4.5, 4.8, 5, 5],
-    'Second Quintile': [3, 3.5, 4, 4.5, 5, 5.2, 5.5, 5.5],
-    'Middle Quintile': [3.5, 4, 4.5, 5, 5.5, 5.8, 6, 6],
-    'Fourth Quintile': [4, 4.5, 5, 5.5, 6, 6.2, 6.5, 6.5],
-    'Highest Quintile': [4.5, 5, 5.5, 6, 6.5, 6.8, 7, 7],
-    'Top 1%': [5, 5.5, 6, 6.5, 7, 7.2, 7.5, 6.5],  # Note the recent decline due to tax competition
-    'Top 0.1%': [5.2, 5.8, 6.2, 6.8, 7.2, 7.5, 7.8, 6.8]
-}
-
-# Calculate adjusted Highest Quintile (80-99th percentile)
-# Formula: [20 × Rate(Top Quintile) - 1 × Rate(Top 1%)] ÷ 19
-highest_quintile_adjusted = []
-for i in range(len(years)):
-    adjusted_rate = (20 * data_original['Highest Quintile'][i] - 1 * data_original['Top 1%'][i]) / 19
-    highest_quintile_adjusted.append(round(adjusted_rate, 1))
-
-# Create new data dictionary with adjusted highest quintile
-data = data_original.copy()
-data['Highest Quintile (80-99th percentile)'] = highest_quintile_adjusted
-del data['Highest Quintile']  # Remove the original highest quintile
-
-df = pd.DataFrame(data)
+# Load the data with the Highest Quintile adjusted to exclude the Top 1%
+# (80-99th percentile), read from the per-year derived series partitions
+df = load_series('state_rates_decadal_adjusted')
 
 # Define colors for each group
 colors = {
@@ -0,0 +1,305 @@
+# Synthetic return-level microdata calibrated to the plotted group series
+#
+# Real returns cannot be shipped, so benchmarks and tests run on generated
+# ones. Each return gets a position p in the year's income distribution and
+# an income from a quantile function through the group levels of a chart
+# dataset: each group's level is placed at the middle of its percentile range
+# (the Middle Quintile at p = 0.5, the Top 1% at 0.995), levels are
+# interpolated log-linearly in -log(1 - p) between groups and between the
+# dataset's years, extended with a Pareto tail above the Top 0.1% and
+# falling linearly to zero below the Lowest Quintile.
+#
+# The top percentile is oversampled (TOP_SHARE of the rows) with weights
+# that compensate, and weights add up to the number of returns filed in each
+# year. Filing status, dependents, age, state, income composition and
+# deductions are drawn per return, with shares that vary by position in the
+# distribution.
+#
+# Rows are drawn in fixed blocks, each from its own generator seeded by
+# (seed, year, block), and streamed straight into a column store, so a
+# year's returns are reproducible for a fixed (year, rows_per_year, seed),
+# whichever other years are generated with it, and never have to fit in
+# memory. Weights and the number of top-percentile rows depend on
+# rows_per_year, so changing it changes every row.
+#
+#   python synthetic_returns.py microdata/synthetic --rows-per-year 10000000 --seed 0
+#   python synthetic_returns.py microdata/synthetic --years 1980 2020 --calibration real_income_per_capita
+
+import argparse
+from functools import partial
+
+import numpy as np
+
+from data_layer import load_wide
+from deflators import price_ratio
+from derived_store import load_series
+from microdata_schema import STATES
+from microdata_store import write_store
+from tax_law import FILING_STATUSES
+
+# Group levels to calibrate to: the dataset, each group's percentile range,
+# the dollars per unit, whether levels are per person rather than per
+# return, and the price year of constant-dollar levels (None for nominal)
+CALIBRATIONS = {
+    # Levels are constant 2022 dollars (as the dataset's description says),
+    # deflated to each year's prices
+    'median_income': dict(
+        load=partial(load_wide, 'median_income'),
+        groups={
+            'Lowest Quintile': (0, 20),
+            'Second Quintile': (20, 40),
+            'Middle Quintile': (40, 60),
+            'Fourth Quintile': (60, 80),
+            'Highest Quintile': (80, 100),
+            'Top 1%': (99, 100),
+            'Top 0.1%': (99.9, 100),
+        },
+        scale=1,
+        per_capita=False,
+        price_year=2022,
+    ),
+    'real_income_per_capita': dict(
+        load=partial(load_series, 'real_income_per_capita_adjusted'),
+        groups={
+            'Bottom 20%': (0, 20),
+            'Second 20%': (20, 40),
+            'Middle 20%': (40, 60),
+            'Fourth 20%': (60, 80),
+            'Top 20% (80-99th percentile)': (80, 99),
+            'Top 1%': (99, 100),
+            'Top 0.1%': (99.9, 100),
+        },
+        scale=1000,
+        per_capita=True,
+        price_year=2022,
+    ),
+}
+
+# Individual income tax returns filed (millions, IRS Statistics of Income);
+# other years are interpolated. 2025 is an estimate.
+RETURNS_FILED = {
+    1950: 53.1, 1955: 58.3, 1960: 61.0, 1965: 65.4, 1970: 74.3,
+    1975: 82.2, 1980: 93.9, 1985: 101.7, 1990: 113.7, 1995: 118.2,
+    2000: 129.4, 2005: 134.4, 2010: 142.9, 2015: 150.5, 2020: 164.4,
+    2025: 163.0,
+}
+
+# Shares of returns filed jointly and as head of household; head of
+# household status starts in 1952
+JOINT_SHARE = {1950: 0.66, 1970: 0.58, 1990: 0.45, 2010: 0.38, 2025: 0.37}
+HEAD_OF_HOUSEHOLD_SHARE = {1951: 0.0, 1952: 0.02, 1970: 0.04, 1990: 0.12, 2010: 0.15, 2025: 0.15}
+
+# Resident population by state (millions, 2020 Census), used for every year
+STATE_POPULATION = {
+    'AL': 5.02, 'AK': 0.73, 'AZ': 7.15, 'AR': 3.01, 'CA': 39.54, 'CO': 5.77, 'CT': 3.61, 'DE': 0.99,
+    'DC': 0.69, 'FL': 21.54, 'GA': 10.71, 'HI': 1.46, 'ID': 1.84, 'IL': 12.81, 'IN': 6.79, 'IA': 3.19,
+    'KS': 2.94, 'KY': 4.51, 'LA': 4.66, 'ME': 1.36, 'MD': 6.18, 'MA': 7.03, 'MI': 10.08, 'MN': 5.71,
+    'MS': 2.96, 'MO': 6.15, 'MT': 1.08, 'NE': 1.96, 'NV': 3.10, 'NH': 1.38, 'NJ': 9.29, 'NM': 2.12,
+    'NY': 20.20, 'NC': 10.44, 'ND': 0.78, 'OH': 11.80, 'OK': 3.96, 'OR': 4.24, 'PA': 13.00, 'RI': 1.10,
+    'SC': 5.12, 'SD': 0.89, 'TN': 6.91, 'TX': 29.15, 'UT': 3.27, 'VT': 0.64, 'VA': 8.63, 'WA': 7.71,
+    'WV': 1.79, 'WI': 5.89, 'WY': 0.58,
+}
+
+# Shares of AGI by component at positions in the distribution (interpolated
+# in between), and the chance a return has the component at all. Wages are
+# always present.
+COMPOSITION_PERCENTILES = np.array([0.1, 0.5, 0.9, 0.99, 0.999])
+COMPOSITION = {
+    #                          share at each percentile        presence at each percentile
+    'wages':                  ((0.80, 0.85, 0.78, 0.50, 0.30), (1.00, 1.00, 1.00, 1.00, 1.00)),
+    'self_employment_income': ((0.06, 0.05, 0.05, 0.06, 0.04), (0.08, 0.10, 0.15, 0.25, 0.25)),
+    'taxable_interest':       ((0.03, 0.02, 0.03, 0.04, 0.04), (0.30, 0.50, 0.80, 0.95, 0.98)),
+    'ordinary_dividends':     ((0.01, 0.01, 0.03, 0.07, 0.10), (0.05, 0.15, 0.45, 0.85, 0.95)),
+    'short_term_gains':       ((0.00, 0.00, 0.005, 0.01, 0.02), (0.01, 0.03, 0.10, 0.35, 0.55)),
+    'long_term_gains':        ((0.00, 0.01, 0.04, 0.15, 0.30), (0.02, 0.08, 0.30, 0.75, 0.90)),
+    'business_income':        ((0.00, 0.01, 0.04, 0.15, 0.18), (0.01, 0.03, 0.10, 0.45, 0.70)),
+    'pension_income':         ((0.06, 0.04, 0.03, 0.02, 0.01), (0.10, 0.15, 0.20, 0.20, 0.15)),
+    'other_income':           ((0.04, 0.01, 0.005, 0.005, 0.01), (0.20, 0.10, 0.10, 0.20, 0.30)),
+}
+# Spread (log standard deviation) of each return's shares around the profile
+COMPOSITION_NOISE = 0.6
+
+# Share of ordinary dividends that qualify for capital gains rates from 2003
+QUALIFIED_DIVIDEND_SHARE = 0.75
+QUALIFIED_DIVIDENDS_YEAR = 2003
+
+RETIREMENT_AGE = 65
+
+# Share of rows drawn from the top percentile
+TOP_SHARE = 0.05
+
+# Rows per generator block (and per chunk written)
+BLOCK_ROWS = 1 << 20
+
+_JOINT = FILING_STATUSES.index('married_joint')
+_HEAD_OF_HOUSEHOLD = FILING_STATUSES.index('head_of_household')
+_SINGLE = FILING_STATUSES.index('single')
+
+
+def _by_year(table, years):
+    keys = sorted(table)
+    return np.interp(years, keys, [table[key] for key in keys])
+
+
+def income_anchors(calibration, years):
+    """Percentile positions of the calibration groups and their log income levels in each year.
+
+    Returns (percentiles, log_levels) with log_levels shaped (years, groups)
+    in nominal dollars, sorted by percentile.
+    """
+    spec = CALIBRATIONS[calibration]
+    frame = spec['load']()
+    years = np.asarray(years)
+    percentiles = np.array([(low + high) / 200 for low, high in spec['groups'].values()])
+    log_levels = np.stack([
+        np.interp(years, frame['Year'], np.log(frame[group].to_numpy(dtype=np.float64) * spec['scale']))
+        for group in spec['groups']
+    ], axis=-1)
+    if spec['price_year'] is not None:
+        log_levels += np.log(price_ratio(spec['price_year'], years))[:, None]
+    order = np.argsort(percentiles)
+    return percentiles[order], log_levels[:, order]
+
+
+def income_quantile(p, percentiles, log_levels):
+    """Income at distribution positions `p` through one year's anchors."""
+    x = -np.log1p(-p)
+    anchors = -np.log1p(-percentiles)
+    log_income = np.interp(x, anchors, log_levels)
+    # Pareto tail above the last anchor, linear to zero below the first
+    tail_slope = (log_levels[-1] - log_levels[-2]) / (anchors[-1] - anchors[-2])
+    top = x > anchors[-1]
+    log_income[top] += tail_slope * (x[top] - anchors[-1])
+    bottom = p < percentiles[0]
+    log_income[bottom] = log_levels[0] + np.log(p[bottom] / percentiles[0])
+    return np.exp(log_income)
+
+
+def _statuses(rng, p, year):
+    joint = np.clip(_by_year(JOINT_SHARE, year) + 0.6 * (p - 0.5), 0.03, 0.92)
+    # Heads of household are concentrated below the middle
+    head = _by_year(HEAD_OF_HOUSEHOLD_SHARE, year) * 2 * (1 - p)
+    u = rng.random(len(p))
+    return np.where(u < joint, _JOINT, np.where(u < joint + head, _HEAD_OF_HOUSEHOLD, _SINGLE)).astype(np.int8)
+
+
+def _composition(rng, p, income, age, year):
+    """AGI split into its components, plus Social Security benefits for retirees."""
+    n = len(p)
+    names = list(COMPOSITION)
+    # Position of every return between the profile's percentiles, found once
+    i = np.clip(np.searchsorted(COMPOSITION_PERCENTILES, p) - 1, 0, len(COMPOSITION_PERCENTILES) - 2)
+    frac = np.clip((p - COMPOSITION_PERCENTILES[i]) / np.diff(COMPOSITION_PERCENTILES)[i], 0, 1)
+    shares = np.empty((len(names), n))
+    for k, (profile, presence) in enumerate(COMPOSITION.values()):
+        profile, presence = np.array(profile), np.array(presence)
+        shares[k] = profile[i] + frac * np.diff(profile)[i]
+        shares[k] *= rng.random(n, dtype=np.float32) < presence[i] + frac * np.diff(presence)[i]
+    # Retirees draw pensions instead of most of their wages
+    retired = age >= RETIREMENT_AGE
+    wages, pensions = names.index('wages'), names.index('pension_income')
+    shares[pensions] += np.where(retired, 0.7 * shares[wages], 0)
+    shares[wages] *= np.where(retired, 0.3, 1)
+    shares *= np.exp(COMPOSITION_NOISE * rng.standard_normal(shares.shape, dtype=np.float32))
+    shares *= income / shares.sum(axis=0)
+
+    amounts = {name: np.round(shares[k]) for k, name in enumerate(names)}
+    amounts['qualified_dividends'] = (np.round(amounts['ordinary_dividends'] * QUALIFIED_DIVIDEND_SHARE)
+                                      if year >= QUALIFIED_DIVIDENDS_YEAR else np.zeros(n))
+    # Benefits replace part of pre-retirement income, up to a maximum
+    max_benefit = 50_000 * price_ratio(2022, year)
+    amounts['social_security'] = np.where(
+        retired, np.round(np.minimum(0.3 * income * rng.lognormal(0, 0.3, n), max_benefit)), 0)
+    return amounts
+
+
+def _deductions(rng, p, income, median):
+    """Property taxes and other itemizable deductions (mortgage interest, charity)."""
+    n = len(p)
+    owner = rng.random(n) < np.interp(p, [0.0, 0.5, 1.0], [0.3, 0.65, 0.9])
+    home_value = owner * 2.5 * median * (np.maximum(income, 1) / median) ** 0.75 * rng.lognormal(0, 0.3, n)
+    property_taxes = np.round(0.012 * home_value)
+    other = np.round(0.03 * home_value + 0.02 * income * rng.lognormal(0, 0.5, n))
+    return property_taxes, other
+
+
+def _block(seed, year, block, n, first_row, n_rows, percentiles, log_levels, per_capita, top_share):
+    """One block of returns for one year, from its own generator."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(year, block)))
+    # Row i is a top-percentile row when floor((i + 1) * top_share) steps
+    row = np.arange(first_row, first_row + n)
+    top = np.floor((row + 1) * top_share) > np.floor(row * top_share)
+    n_top = int(np.floor(n_rows * top_share))
+    u = 1 - rng.random(n)
+    p = np.where(top, 0.99 + 0.01 * (1 - u), 0.99 * u)
+    returns_filed = _by_year(RETURNS_FILED, year) * 1e6
+    weight = np.where(top, 0.01 * returns_filed / max(n_top, 1), 0.99 * returns_filed / max(n_rows - n_top, 1))
+
+    status = _statuses(rng, p, year)
+    age = np.round(18 + 72 * rng.beta(2, 3.2, n)).astype(np.int8)
+    dependents = np.where(status == _JOINT, rng.poisson(1.0, n),
+                          np.where(status == _HEAD_OF_HOUSEHOLD, 1 + rng.poisson(0.5, n), 0))
+    dependents = np.where(age >= RETIREMENT_AGE, 0, np.minimum(dependents, 8)).astype(np.int8)
+    state = np.searchsorted(np.cumsum([STATE_POPULATION[code] for code in STATES]),
+                            rng.random(n) * sum(STATE_POPULATION.values())).astype(np.int8)
+
+    income = income_quantile(p, percentiles, log_levels)
+    median = income_quantile(np.array([0.5]), percentiles, log_levels)[0]
+    if per_capita:
+        persons = 1 + (status == _JOINT) + dependents
+        income *= persons
+        median *= 2  # about two persons per return
+    property_taxes, itemized = _deductions(rng, p, income, median)
+    return dict(
+        year=np.full(n, year, dtype=np.int16),
+        weight=weight,
+        filing_status=status,
+        state=np.minimum(state, len(STATES) - 1),
+        age_head=age,
+        dependents=dependents,
+        **_composition(rng, p, income, age, year),
+        property_taxes=property_taxes,
+        itemized_deductions=itemized,
+    )
+
+
+def generate_returns(years, rows_per_year, seed=0, calibration='median_income', top_share=TOP_SHARE,
+                     block_rows=BLOCK_ROWS):
+    """Yield synthetic returns as {column: array} chunks, one year at a time.
+
+    Columns follow microdata_schema.RETURNS_SCHEMA, with categorical columns
+    as codes. The same seed and block size always give the same rows.
+    """
+    years = [int(year) for year in years]
+    percentiles, log_levels = income_anchors(calibration, years)
+    per_capita = CALIBRATIONS[calibration]['per_capita']
+    for y, year in enumerate(years):
+        for block, first_row in enumerate(range(0, rows_per_year, block_rows)):
+            rows = min(block_rows, rows_per_year - first_row)
+            yield _block(seed, year, block, rows, first_row, rows_per_year, percentiles, log_levels[y],
+                         per_capita, top_share)
+
+
+def write_synthetic(store_dir, years, rows_per_year, seed=0, calibration='median_income', top_share=TOP_SHARE):
+    """Generate synthetic returns into a MicrodataStore at `store_dir`."""
+    years = [int(year) for year in years]
+    source = dict(generator='synthetic_returns', years=years, rows_per_year=rows_per_year, seed=seed,
+                  calibration=calibration, top_share=top_share, block_rows=BLOCK_ROWS)
+    chunks = generate_returns(years, rows_per_year, seed=seed, calibration=calibration, top_share=top_share)
+    return write_store(chunks, store_dir, source=source)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic returns calibrated to the group income series")
+    parser.add_argument('store_dir')
+    parser.add_argument('--years', type=int, nargs='+', default=list(range(1950, 2026, 5)))
+    parser.add_argument('--rows-per-year', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--calibration', choices=sorted(CALIBRATIONS), default='median_income')
+    parser.add_argument('--top-share', type=float, default=TOP_SHARE,
+                        help="Share of rows drawn from the top percentile")
+    args = parser.parse_args()
+
+    store = write_synthetic(args.store_dir, args.years, args.rows_per_year, seed=args.seed,
+                            calibration=args.calibration, top_share=args.top_share)
+    print(f"Generated {len(store):,} synthetic returns for {len(args.years)} years into '{args.store_dir}'")
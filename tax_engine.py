@@ -0,0 +1,532 @@
+# Vectorized federal income tax calculation
+#
+# `build_tables` turns the yearly parameters in tax_law.py into dense arrays
+# indexed by (year, filing status). `income_tax` then evaluates every element
+# of broadcastable income / status / year / children arrays at once, so the
+# same code serves a dense income grid (years x statuses x grid points) and a
+# file of individual returns.
+#
+# The bracket lookup in `schedule_tax` is the costliest step. When numba is
+# installed, large lookups run in a compiled kernel that scans each
+# element's few brackets in place and releases the GIL, so threads (see
+# microdata_tax.federal_income_tax) run it in parallel. Set TAX_ENGINE_JIT=0
+# to always use the NumPy path.
+
+import os
+
+import numpy as np
+
+from tax_law import (
+    FILING_STATUSES, amt_schedule, capital_gains_schedule, child_credit_schedule, eitc_schedule, ordinary_schedule,
+    salt_cap,
+)
+
+# Padding for unused bracket slots. Rows of the bracket table are laid end to
+# end with this stride so a single searchsorted call covers every schedule.
+BRACKET_ROW_STRIDE = 2.0 ** 40
+MAX_TAXABLE_INCOME = BRACKET_ROW_STRIDE / 2
+
+# EITC parameters are tabulated for 0, 1 and 2+ qualifying children
+EITC_CHILD_CATEGORIES = 3
+
+USE_JIT = os.environ.get('TAX_ENGINE_JIT', '1') != '0'
+# Smaller lookups stay in NumPy, so charts on small grids never load numba
+JIT_MIN_SIZE = 1 << 14
+
+
+def build_tables(years, statuses=FILING_STATUSES):
+    """Tabulate tax parameters for `years` x `statuses` as NumPy arrays."""
+    years = [int(year) for year in years]
+    n_years, n_statuses = len(years), len(statuses)
+    ordinary = [ordinary_schedule(year) for year in years]
+    eitc = [eitc_schedule(year) for year in years]
+    ctc = [child_credit_schedule(year) for year in years]
+    gains = [capital_gains_schedule(year) for year in years]
+    amt = [amt_schedule(year) for year in years]
+
+    thresholds, rates = _bracket_arrays([schedule['brackets'] for schedule in ordinary], statuses)
+    cg_thresholds, cg_rates = _bracket_arrays([schedule['brackets'] for schedule in gains], statuses)
+    std_rate = np.zeros((n_years, n_statuses))
+    std_floor = np.zeros((n_years, n_statuses))
+    std_cap = np.zeros((n_years, n_statuses))
+    exemption = np.zeros((n_years, n_statuses))
+    pep_start = np.full((n_years, n_statuses), np.inf)
+    pep_step = np.ones((n_years, n_statuses))
+    pep_rate = np.zeros((n_years, n_statuses))
+    eitc_params = np.zeros((n_years, n_statuses, EITC_CHILD_CATEGORIES, 4))
+    ctc_per_child = np.zeros((n_years, n_statuses))
+    ctc_start = np.zeros((n_years, n_statuses))
+    ctc_step = np.ones((n_years, n_statuses))
+    ctc_amount = np.zeros((n_years, n_statuses))
+    ctc_refundable = np.zeros((n_years, n_statuses, 3))
+    # Years without a minimum tax keep zero AMT rates
+    amt_exemption = np.zeros((n_years, n_statuses))
+    amt_start = np.full((n_years, n_statuses), np.inf)
+    amt_phaseout_rate = np.zeros(n_years)
+    amt_rates = np.zeros((n_years, 2))
+    amt_break = np.full(n_years, np.inf)
+
+    for y, minimum_tax in enumerate(amt):
+        if minimum_tax is not None:
+            amt_exemption[y] = [minimum_tax['exemption'][status] for status in statuses]
+            amt_start[y] = [minimum_tax['phaseout_start'][status] for status in statuses]
+            amt_phaseout_rate[y] = minimum_tax['phaseout_rate']
+            amt_rates[y] = [rate / 100 for rate in minimum_tax['rates']]
+            amt_break[y] = minimum_tax['rate_break']
+
+    for y, (schedule, credit, child_credit) in enumerate(zip(ordinary, eitc, ctc)):
+        for s, status in enumerate(statuses):
+            std_rate[y, s] = schedule['standard_deduction_rate']
+            std_floor[y, s] = schedule['standard_deduction_floor'][status]
+            std_cap[y, s] = schedule['standard_deduction'][status]
+            exemption[y, s] = schedule['exemption']
+            if schedule['exemption_phaseout'] is not None:
+                pep_start[y, s] = schedule['exemption_phaseout']['start'][status]
+                pep_step[y, s] = schedule['exemption_phaseout']['step']
+                pep_rate[y, s] = schedule['exemption_phaseout']['rate']
+            for c, params in enumerate(credit['by_children']):
+                if params is not None:
+                    rate, max_earned, phaseout_start, phaseout_rate = params
+                    if status == 'married_joint':
+                        phaseout_start += credit['joint_bonus']
+                    eitc_params[y, s, c] = (rate / 100, max_earned, phaseout_start, phaseout_rate / 100)
+            ctc_per_child[y, s] = child_credit['per_child']
+            ctc_start[y, s] = child_credit['phaseout_start'][status]
+            ctc_step[y, s] = child_credit['phaseout_step']
+            ctc_amount[y, s] = child_credit['phaseout_amount']
+            ctc_refundable[y, s] = (
+                child_credit['refundable_rate'],
+                child_credit['refundable_threshold'],
+                child_credit['refundable_cap'],
+            )
+
+    return dict(
+        years=np.array(years),
+        statuses=tuple(statuses),
+        **bracket_lookup(thresholds, rates),
+        std_rate=std_rate,
+        std_floor=std_floor,
+        std_cap=std_cap,
+        exemption=exemption,
+        pep_start=pep_start,
+        pep_step=pep_step,
+        pep_rate=pep_rate,
+        eitc=eitc_params,
+        ctc_per_child=ctc_per_child,
+        ctc_start=ctc_start,
+        ctc_step=ctc_step,
+        ctc_amount=ctc_amount,
+        ctc_refundable=ctc_refundable,
+        cg_thresholds=cg_thresholds,
+        cg_rates=cg_rates,
+        cg_exclusion=np.array([schedule['exclusion'] for schedule in gains], dtype=float),
+        cg_loss_limit=np.array([schedule['loss_limit'] for schedule in gains], dtype=float),
+        qualified_dividends=np.array([schedule['qualified_dividends'] for schedule in gains]),
+        amt_exemption=amt_exemption,
+        amt_start=amt_start,
+        amt_phaseout_rate=amt_phaseout_rate,
+        amt_rates=amt_rates,
+        amt_break=amt_break,
+        salt_cap=np.array([salt_cap(year) for year in years], dtype=float),
+    )
+
+
+def _bracket_arrays(brackets_by_year, statuses):
+    # (years, statuses, brackets) thresholds and rates, padded with
+    # MAX_TAXABLE_INCOME thresholds
+    n_brackets = max(len(brackets[status]) for brackets in brackets_by_year for status in statuses)
+    thresholds = np.full((len(brackets_by_year), len(statuses), n_brackets), MAX_TAXABLE_INCOME)
+    rates = np.zeros((len(brackets_by_year), len(statuses), n_brackets))
+    for y, brackets_by_status in enumerate(brackets_by_year):
+        for s, status in enumerate(statuses):
+            brackets = brackets_by_status[status]
+            thresholds[y, s, :len(brackets)] = [threshold for threshold, _ in brackets]
+            rates[y, s, :len(brackets)] = [rate / 100 for _, rate in brackets]
+            # Padded slots keep the top rate so the tail of each row is flat
+            rates[y, s, len(brackets):] = brackets[-1][1] / 100
+    return thresholds, rates
+
+
+def bracket_lookup(thresholds, rates, stride=BRACKET_ROW_STRIDE):
+    """Flattened bracket table for schedule_tax.
+
+    `thresholds` and `rates` are (..., brackets) arrays; every leading index
+    is one schedule (row), laid end to end at `stride` offsets. Thresholds
+    are padded to half the stride.
+    """
+    # Tax owed at the bottom of each bracket, so the liability for any income
+    # is base[k] + rate[k] * (income - threshold[k]) for its bracket k
+    widths = np.diff(thresholds, axis=-1)
+    base = np.zeros_like(thresholds)
+    base[..., 1:] = np.cumsum(rates[..., :-1] * widths, axis=-1)
+    n_rows = int(np.prod(thresholds.shape[:-1]))
+    row_offsets = np.arange(n_rows).reshape(thresholds.shape[:-1] + (1,)) * stride
+    return dict(
+        thresholds=thresholds,
+        rates=rates,
+        base=base,
+        flat_thresholds=(thresholds + row_offsets).ravel(),
+    )
+
+
+# Dollar-denominated (year, status) parameters; eitc and ctc_refundable pack
+# rates and dollar amounts together and are scaled slice by slice
+_DOLLAR_PARAMETERS = (
+    'std_floor', 'std_cap', 'exemption', 'pep_start', 'pep_step',
+    'ctc_per_child', 'ctc_start', 'ctc_step', 'ctc_amount', 'amt_exemption', 'amt_start',
+)
+
+
+def _scale_thresholds(thresholds, per_year):
+    real = thresholds < MAX_TAXABLE_INCOME
+    return np.where(real, np.minimum(thresholds * per_year[..., np.newaxis], MAX_TAXABLE_INCOME), MAX_TAXABLE_INCOME)
+
+
+def scale_tables(tables, factor):
+    """Tables with every dollar amount multiplied by `factor`.
+
+    `factor` is a scalar or one value per year of the tables, e.g. a CPI
+    ratio to move each year's schedule to another year's price level.
+    Rates, phase-out rates and the refundable credit rate are unchanged.
+    """
+    factor = np.asarray(factor, dtype=float)
+    per_year = factor.reshape(factor.shape + (1,) * (2 - factor.ndim)) if factor.ndim else factor
+    scaled = dict(tables)
+    scaled.pop('stacked', None)
+    for name in _DOLLAR_PARAMETERS:
+        scaled[name] = tables[name] * per_year
+    scaled.update(bracket_lookup(_scale_thresholds(tables['thresholds'], per_year), tables['rates']))
+    scaled['cg_thresholds'] = _scale_thresholds(tables['cg_thresholds'], per_year)
+    scaled['cg_loss_limit'] = tables['cg_loss_limit'] * factor
+    scaled['amt_break'] = tables['amt_break'] * factor
+    scaled['salt_cap'] = tables['salt_cap'] * factor
+    eitc = tables['eitc'].copy()
+    eitc[..., 1:3] *= per_year[..., np.newaxis, np.newaxis]  # fully phased-in earnings, phase-out start
+    scaled['eitc'] = eitc
+    refundable = tables['ctc_refundable'].copy()
+    refundable[..., 1:] *= per_year[..., np.newaxis]  # earnings threshold, per-child cap
+    scaled['ctc_refundable'] = refundable
+    return scaled
+
+
+def override_rates(tables, rate_scale=1.0, top_rate=None):
+    """Tables with ordinary rates multiplied by `rate_scale` and/or the top rate replaced (%)."""
+    rates = tables['rates'] * rate_scale
+    if top_rate is not None:
+        # The top bracket and the padding after it share the last real threshold's rate
+        n_real = (tables['thresholds'] < MAX_TAXABLE_INCOME).sum(axis=-1, keepdims=True)
+        top = np.arange(rates.shape[-1]) >= n_real - 1
+        rates = np.where(top, top_rate / 100, rates)
+    modified = dict(tables)
+    modified.pop('stacked', None)
+    modified.update(bracket_lookup(tables['thresholds'], rates))
+    return modified
+
+
+def top_bracket(tables):
+    """(threshold, rate %) of the highest bracket for every (year, status)."""
+    n_real = (tables['thresholds'] < MAX_TAXABLE_INCOME).sum(axis=-1, keepdims=True)
+    threshold = np.take_along_axis(tables['thresholds'], n_real - 1, axis=-1)[..., 0]
+    rate = np.take_along_axis(tables['rates'], n_real - 1, axis=-1)[..., 0]
+    return threshold, 100 * rate
+
+
+def add_top_bracket(tables, threshold, rate):
+    """Tables with `rate` (%) applying to all taxable income above `threshold`.
+
+    `threshold` and `rate` broadcast against (years, statuses). Brackets
+    starting above the new threshold are absorbed into it.
+    """
+    shape = tables['thresholds'].shape[:2] + (1,)
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=float)[..., np.newaxis], shape)
+    rate = np.broadcast_to(np.asarray(rate, dtype=float)[..., np.newaxis] / 100, shape)
+    thresholds = np.concatenate([tables['thresholds'], threshold], axis=-1)
+    rates = np.concatenate([tables['rates'], rate], axis=-1)
+    order = np.argsort(thresholds, axis=-1, kind='stable')
+    thresholds = np.take_along_axis(thresholds, order, axis=-1)
+    rates = np.where(thresholds >= threshold, rate, np.take_along_axis(rates, order, axis=-1))
+    modified = dict(tables)
+    modified.pop('stacked', None)
+    modified.update(bracket_lookup(thresholds, rates))
+    return modified
+
+
+def _rates_at(thresholds, rates, points):
+    # Rate in force at each of `points` (per row) under a bracket schedule
+    bracket = (thresholds[..., np.newaxis, :] <= points[..., :, np.newaxis]).sum(axis=-1) - 1
+    return np.take_along_axis(rates, np.maximum(bracket, 0), axis=-1)
+
+
+def preferential_tables(tables):
+    """Bracket table for preferential income stacked on top of ordinary income.
+
+    At every point of the stack the lower of the ordinary and the capital
+    gains rate applies, so the tax on preferential income P above ordinary
+    taxable income O is stacked(O + P) - stacked(O).
+    """
+    thresholds = np.sort(np.concatenate([tables['thresholds'], tables['cg_thresholds']], axis=-1), axis=-1)
+    rates = np.minimum(
+        _rates_at(tables['thresholds'], tables['rates'], thresholds),
+        _rates_at(tables['cg_thresholds'], tables['cg_rates'], thresholds),
+    )
+    return dict(statuses=tables['statuses'], **bracket_lookup(thresholds, rates))
+
+
+def with_stacked_tables(tables):
+    """Tables carrying their preferential_tables under 'stacked'.
+
+    tax_components otherwise rebuilds the stacked table on every call; build
+    it once when the same tables tax many chunks of returns. The functions
+    here that derive modified tables drop it.
+    """
+    return dict(tables, stacked=preferential_tables(tables))
+
+
+_jit_kernel = None
+
+
+def _schedule_tax_kernel():
+    # The compiled kernel, or None without numba; compiled on first use
+    global _jit_kernel
+    if _jit_kernel is None:
+        try:
+            import numba
+        except ImportError:
+            _jit_kernel = False
+            return None
+
+        @numba.njit(nogil=True, cache=True)
+        def kernel(taxable, row, thresholds, base, rates, cap, out):
+            n_brackets = thresholds.shape[1]
+            for i in range(taxable.shape[0]):
+                r = row[i]
+                income = min(taxable[i], cap)
+                k = 0
+                while k + 1 < n_brackets and thresholds[r, k + 1] <= income:
+                    k += 1
+                out[i] = base[r, k] + rates[r, k] * (taxable[i] - thresholds[r, k])
+
+        _jit_kernel = kernel
+    return _jit_kernel or None
+
+
+def schedule_tax(taxable, row, lookup, stride=BRACKET_ROW_STRIDE, jit=None):
+    """Tax on `taxable` income under schedule `row` of a bracket_lookup table.
+
+    Incomes above half the stride fall in the top bracket of their row.
+    `jit` forces (True) or rules out (False) the compiled kernel; by default
+    it runs lookups of JIT_MIN_SIZE or more when USE_JIT is set.
+    """
+    n_brackets = lookup['thresholds'].shape[-1]
+    shape = np.broadcast(taxable, row).shape
+    if jit is None:
+        jit = USE_JIT and np.prod(shape) >= JIT_MIN_SIZE
+    kernel = _schedule_tax_kernel() if jit else None
+    if kernel is not None:
+        out = np.empty(shape)
+        kernel(np.ascontiguousarray(np.broadcast_to(taxable, shape), dtype=np.float64).ravel(),
+               np.ascontiguousarray(np.broadcast_to(row, shape), dtype=np.int64).ravel(),
+               *(np.ascontiguousarray(lookup[name], dtype=np.float64).reshape(-1, n_brackets)
+                 for name in ('thresholds', 'base', 'rates')),
+               stride / 2, out.reshape(-1))
+        return out
+    income = np.minimum(taxable, stride / 2)
+    position = np.searchsorted(lookup['flat_thresholds'], income + row * stride, side='right') - 1
+    # Incomes below zero would land in the previous row; clamp to this row's first bracket
+    first = row * n_brackets
+    position = np.maximum(position, first)
+    # Adding the row offset rounds away the cents of large keys, so an income
+    # just below a threshold can land too high (past every copy of a repeated
+    # threshold); step back until each bracket starts at or below its income
+    thresholds = lookup['thresholds'].ravel()
+    while True:
+        too_high = (thresholds[position] > income) & (position > first)
+        if not too_high.any():
+            break
+        position -= too_high
+    tax = taxable - thresholds[position]
+    tax *= lookup['rates'].ravel()[position]
+    tax += lookup['base'].ravel()[position]
+    return tax
+
+
+def jit_parity(tables, offsets=(-0.01, -1e-6, 0, 1e-6, 0.01)):
+    """Largest difference between the compiled and the NumPy schedule_tax, or None without numba.
+
+    Both run on incomes `offsets` away from every real threshold of the
+    ordinary and the stacked capital gains tables; the two must agree exactly.
+    """
+    if _schedule_tax_kernel() is None:
+        return None
+    worst = 0.0
+    for lookup in (tables, preferential_tables(tables)):
+        thresholds = lookup['thresholds'].reshape(-1, lookup['thresholds'].shape[-1])
+        row, _ = np.nonzero(thresholds < MAX_TAXABLE_INCOME)
+        incomes = thresholds[thresholds < MAX_TAXABLE_INCOME][:, np.newaxis] + np.asarray(offsets)
+        row = np.repeat(row, len(offsets))
+        difference = schedule_tax(incomes.ravel(), row, lookup, jit=True) - \
+            schedule_tax(incomes.ravel(), row, lookup, jit=False)
+        worst = max(worst, float(np.abs(difference).max()))
+    return worst
+
+
+def bracket_tax(taxable, status_idx, year_idx, tables):
+    """Tax on `taxable` income from the ordinary brackets of each element's schedule."""
+    n_statuses = len(tables['statuses'])
+    taxable = np.minimum(taxable, MAX_TAXABLE_INCOME)
+    row = np.broadcast_to(year_idx * n_statuses + status_idx, np.broadcast(taxable, year_idx, status_idx).shape)
+    return schedule_tax(taxable, row, tables)
+
+
+def _status_index(tables, status):
+    # -1 never matches a status index, for tables built without `status`
+    return tables['statuses'].index(status) if status in tables['statuses'] else -1
+
+
+def _phaseout_steps(income, start, step):
+    # Number of whole or partial steps above `start`
+    return np.ceil(np.maximum(income - start, 0) / step)
+
+
+def alternative_minimum_tax(amti, status_idx, year_idx, tables, regular_tax, preferential=0, preferential_tax=0):
+    """AMT owed on top of `regular_tax`: the excess of the tentative minimum tax over it.
+
+    `amti` is alternative minimum taxable income before the exemption.
+    Preferential income keeps its capital gains tax (`preferential_tax`,
+    from the regular calculation); the rest of the base is taxed at the
+    AMT rates.
+    """
+    exemption = np.array(np.maximum(amti - tables['amt_start'][year_idx, status_idx], 0), dtype=np.float64)
+    exemption *= -tables['amt_phaseout_rate'][year_idx]
+    exemption += tables['amt_exemption'][year_idx, status_idx]
+    np.maximum(exemption, 0, out=exemption)
+    # Reuse the exemption array for the base taxed at AMT rates
+    base = np.subtract(amti, exemption, out=exemption)
+    np.maximum(base, 0, out=base)
+    base -= np.minimum(preferential, base)
+    rate_break = tables['amt_break'][year_idx]
+    low_rate, high_rate = np.moveaxis(tables['amt_rates'][year_idx], -1, 0)
+    tentative = high_rate * np.maximum(base - rate_break, 0)
+    tentative += low_rate * np.minimum(base, rate_break, out=base)
+    tentative += preferential_tax
+    tentative -= regular_tax
+    return np.maximum(tentative, 0)
+
+
+def tax_components(income, status_idx, year_idx, tables, children=0, earned=None, preferential=None,
+                   itemized=None, salt=0, amt=False):
+    """Income tax before credits and each credit for every element.
+
+    `income` is AGI; `earned` defaults to `income` (all wage income).
+    `preferential` is the part of AGI (included long-term gains and
+    qualified dividends) taxed at capital gains rates, stacked on top of
+    ordinary taxable income. `itemized` deductions replace the standard
+    deduction when larger; `salt` is the state and local tax part of them,
+    which is capped from 2018 and disallowed by the AMT. With `amt` the alternative minimum tax is
+    added in the same pass. `status_idx` and `year_idx` index
+    `tables['statuses']` and `tables['years']`. All arguments broadcast
+    against each other.
+    """
+    income = np.asarray(income, dtype=float)
+    earned = income if earned is None else np.asarray(earned, dtype=float)
+    status_idx = np.asarray(status_idx)
+    year_idx = np.asarray(year_idx)
+    children = np.asarray(children)
+    joint = status_idx == _status_index(tables, 'married_joint')
+
+    exemptions = tables['exemption'][year_idx, status_idx] * (1 + joint + children)
+    pep_loss = np.minimum(
+        1, _phaseout_steps(income, tables['pep_start'][year_idx, status_idx], tables['pep_step'][year_idx, status_idx])
+        * tables['pep_rate'][year_idx, status_idx]
+    )
+    exemptions = exemptions * (1 - pep_loss)
+    standard = np.clip(
+        tables['std_rate'][year_idx, status_idx] * income,
+        tables['std_floor'][year_idx, status_idx],
+        tables['std_cap'][year_idx, status_idx],
+    )
+    if itemized is not None:
+        # State and local taxes above the cap are not deductible
+        allowed_salt = np.minimum(salt, tables['salt_cap'][year_idx])
+        itemized = itemized - salt + allowed_salt
+        salt = allowed_salt
+    deduction = standard if itemized is None else np.maximum(standard, itemized)
+    taxable = np.maximum(income - deduction - exemptions, 0)
+    if preferential is None:
+        before_credits = bracket_tax(taxable, status_idx, year_idx, tables)
+        preferential_tax = np.zeros_like(before_credits)
+    else:
+        # Deductions come out of ordinary income first
+        ordinary = taxable - np.clip(preferential, 0, taxable)
+        stacked = tables['stacked'] if 'stacked' in tables else preferential_tables(tables)
+        preferential_tax = bracket_tax(taxable, status_idx, year_idx, stacked) \
+            - bracket_tax(ordinary, status_idx, year_idx, stacked)
+        before_credits = bracket_tax(ordinary, status_idx, year_idx, tables) + preferential_tax
+
+    if amt:
+        # No standard deduction or personal exemptions; itemizers keep their
+        # deductions other than state and local taxes
+        amti = income if itemized is None else income - np.where(itemized > standard, itemized - salt, 0)
+        minimum_tax = alternative_minimum_tax(amti, status_idx, year_idx, tables, before_credits,
+                                              0 if preferential is None else preferential, preferential_tax)
+        before_credits = before_credits + minimum_tax
+    else:
+        minimum_tax = np.zeros_like(before_credits)
+
+    child_credit = np.maximum(
+        children * tables['ctc_per_child'][year_idx, status_idx]
+        - _phaseout_steps(income, tables['ctc_start'][year_idx, status_idx], tables['ctc_step'][year_idx, status_idx])
+        * tables['ctc_amount'][year_idx, status_idx],
+        0,
+    )
+    nonrefundable = np.minimum(child_credit, before_credits)
+    refundable_rate, refundable_threshold, refundable_cap = np.moveaxis(
+        tables['ctc_refundable'][year_idx, status_idx], -1, 0
+    )
+    refundable = np.minimum(
+        child_credit - nonrefundable,
+        np.minimum(refundable_rate * np.maximum(earned - refundable_threshold, 0), refundable_cap * children),
+    )
+
+    category = np.minimum(children, EITC_CHILD_CATEGORIES - 1)
+    rate, max_earned, phaseout_start, phaseout_rate = np.moveaxis(tables['eitc'][year_idx, status_idx, category], -1, 0)
+    eitc = np.maximum(
+        rate * np.minimum(earned, max_earned)
+        - phaseout_rate * np.maximum(np.maximum(income, earned) - phaseout_start, 0),
+        0,
+    )
+
+    return dict(
+        taxable_income=taxable,
+        tax_before_credits=before_credits,
+        preferential_tax=preferential_tax,
+        amt=minimum_tax,
+        child_credit=nonrefundable + refundable,
+        eitc=eitc,
+    )
+
+
+def income_tax(income, status_idx, year_idx, tables, children=0, earned=None, preferential=None,
+               itemized=None, salt=0, amt=False):
+    """Federal income tax after credits (negative when refundable credits exceed tax)."""
+    components = tax_components(income, status_idx, year_idx, tables, children=children, earned=earned,
+                                preferential=preferential, itemized=itemized, salt=salt, amt=amt)
+    return components['tax_before_credits'] - components['child_credit'] - components['eitc']
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from deflators import FIRST_YEAR, LAST_YEAR
+
+    parser = argparse.ArgumentParser(description="Check that the compiled bracket kernel matches the NumPy lookup")
+    parser.add_argument('--years', type=int, nargs=2, default=[FIRST_YEAR, LAST_YEAR], metavar=('FIRST', 'LAST'))
+    args = parser.parse_args()
+
+    difference = jit_parity(build_tables(range(args.years[0], args.years[1] + 1)))
+    if difference is None:
+        print("numba is not installed; only the NumPy lookup is used")
+    elif difference:
+        raise SystemExit(f"Compiled and NumPy bracket lookups differ by up to ${difference:.6f}")
+    else:
+        print("Compiled and NumPy bracket lookups agree at every threshold")
@@ -0,0 +1,570 @@
+# Federal individual income and payroll tax parameters (1950-2025)
+#
+# Each regime applies from its `start` year until the next regime begins.
+# Regimes marked `indexed` are inflation-adjusted from their start year with
+# CPI-U (see deflators.py); older regimes use fixed nominal amounts. Like the
+# other series in this repository the tables are approximations: transitional
+# years are folded into the neighbouring regime, and head-of-household
+# schedules that predate 1988 are derived from the single schedule.
+
+from deflators import price_ratio
+
+FILING_STATUSES = ('single', 'married_joint', 'head_of_household')
+
+# Thresholds for head of household filers before they are listed explicitly
+HOH_THRESHOLD_SCALE = 1.5
+
+
+def _brackets(thresholds, rates):
+    return list(zip(thresholds, rates))
+
+
+def _joint(brackets, scale=2):
+    return [(threshold * scale, rate) for threshold, rate in brackets]
+
+
+_SINGLE_1950 = _brackets(
+    [0, 2000, 4000, 6000, 8000, 10000, 12000, 14000, 16000, 18000, 20000, 22000,
+     26000, 32000, 38000, 44000, 50000, 60000, 70000, 80000, 90000, 100000, 150000, 200000],
+    [20, 22, 26, 30, 34, 38, 43, 47, 50, 53, 56, 59,
+     62, 65, 69, 72, 75, 78, 81, 84, 87, 89, 90, 91],
+)
+
+_SINGLE_1965 = _brackets(
+    [0, 500, 1000, 1500, 2000, 4000, 6000, 8000, 10000, 12000, 14000, 16000, 18000,
+     20000, 22000, 26000, 32000, 38000, 44000, 50000, 60000, 70000, 80000, 90000, 100000],
+    [14, 15, 16, 17, 19, 22, 25, 28, 32, 36, 39, 42, 45,
+     48, 50, 53, 55, 58, 60, 62, 64, 66, 68, 69, 70],
+)
+
+_SINGLE_1982 = _brackets(
+    [0, 1100, 2100, 4200, 6200, 8500, 10600, 12700, 15900, 21200, 26500, 31800, 39200, 53000, 79500],
+    [11, 12, 14, 15, 16, 18, 20, 23, 26, 30, 34, 38, 42, 48, 50],
+)
+
+_JOINT_1982 = _brackets(
+    [0, 2100, 4200, 8500, 12600, 16800, 21200, 26500, 31800, 42400, 56600, 82200, 106000, 159000],
+    [11, 12, 14, 16, 18, 22, 25, 28, 33, 38, 42, 45, 49, 50],
+)
+
+# Ordinary income brackets, standard deduction and personal exemptions.
+# Standard deductions before 1977 were a percentage of income between a floor
+# and a cap; afterwards they are flat amounts (floor == cap).
+# `exemption_phaseout` is the personal exemption phase-out (PEP): exemptions
+# lose `rate` of their value for each `step` dollars (or part of a step) of
+# income above `start`.
+ORDINARY_SCHEDULES = [
+    dict(
+        start=1950, indexed=False,
+        brackets={
+            'single': _SINGLE_1950,
+            'married_joint': _joint(_SINGLE_1950),
+            'head_of_household': _joint(_SINGLE_1950, HOH_THRESHOLD_SCALE),
+        },
+        standard_deduction_rate=0.10,
+        standard_deduction_floor={'single': 0, 'married_joint': 0, 'head_of_household': 0},
+        standard_deduction={'single': 1000, 'married_joint': 1000, 'head_of_household': 1000},
+        exemption=600,
+        exemption_phaseout=None,
+    ),
+    dict(
+        start=1964, indexed=False,
+        brackets={
+            'single': _SINGLE_1965,
+            'married_joint': _joint(_SINGLE_1965),
+            'head_of_household': _joint(_SINGLE_1965, HOH_THRESHOLD_SCALE),
+        },
+        standard_deduction_rate=0.10,
+        standard_deduction_floor={'single': 300, 'married_joint': 300, 'head_of_household': 300},
+        standard_deduction={'single': 1000, 'married_joint': 1000, 'head_of_household': 1000},
+        exemption=600,
+        exemption_phaseout=None,
+    ),
+    dict(
+        start=1971, indexed=False,
+        brackets={
+            'single': _SINGLE_1965,
+            'married_joint': _joint(_SINGLE_1965),
+            'head_of_household': _joint(_SINGLE_1965, HOH_THRESHOLD_SCALE),
+        },
+        standard_deduction_rate=0.15,
+        standard_deduction_floor={'single': 1300, 'married_joint': 1300, 'head_of_household': 1300},
+        standard_deduction={'single': 2000, 'married_joint': 2000, 'head_of_household': 2000},
+        exemption=750,
+        exemption_phaseout=None,
+    ),
+    dict(
+        start=1977, indexed=False,
+        brackets={
+            'single': _SINGLE_1965,
+            'married_joint': _joint(_SINGLE_1965),
+            'head_of_household': _joint(_SINGLE_1965, HOH_THRESHOLD_SCALE),
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 2200, 'married_joint': 3200, 'head_of_household': 2200},
+        standard_deduction={'single': 2200, 'married_joint': 3200, 'head_of_household': 2200},
+        exemption=1000,
+        exemption_phaseout=None,
+    ),
+    dict(
+        start=1982, indexed=False,
+        brackets={
+            'single': _SINGLE_1982,
+            'married_joint': _JOINT_1982,
+            'head_of_household': _joint(_SINGLE_1982, HOH_THRESHOLD_SCALE),
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 2300, 'married_joint': 3400, 'head_of_household': 2300},
+        standard_deduction={'single': 2300, 'married_joint': 3400, 'head_of_household': 2300},
+        exemption=1000,
+        exemption_phaseout=None,
+    ),
+    # Tax Reform Act of 1986: the 33% "bubble" phases out the benefit of the
+    # 15% bracket before the rate drops back to 28%
+    dict(
+        start=1987, indexed=True,
+        brackets={
+            'single': [(0, 15), (17850, 28), (43150, 33), (89560, 28)],
+            'married_joint': [(0, 15), (29750, 28), (71900, 33), (149250, 28)],
+            'head_of_household': [(0, 15), (23900, 28), (61650, 33), (123790, 28)],
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 3000, 'married_joint': 5000, 'head_of_household': 4400},
+        standard_deduction={'single': 3000, 'married_joint': 5000, 'head_of_household': 4400},
+        exemption=1950,
+        exemption_phaseout=None,
+    ),
+    dict(
+        start=1991, indexed=True,
+        brackets={
+            'single': [(0, 15), (20350, 28), (49300, 31)],
+            'married_joint': [(0, 15), (34000, 28), (82150, 31)],
+            'head_of_household': [(0, 15), (27300, 28), (70450, 31)],
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 3400, 'married_joint': 5700, 'head_of_household': 5000},
+        standard_deduction={'single': 3400, 'married_joint': 5700, 'head_of_household': 5000},
+        exemption=2150,
+        exemption_phaseout=dict(
+            start={'single': 100000, 'married_joint': 150000, 'head_of_household': 125000},
+            step=2500, rate=0.02,
+        ),
+    ),
+    dict(
+        start=1993, indexed=True,
+        brackets={
+            'single': [(0, 15), (22100, 28), (53500, 31), (115000, 36), (250000, 39.6)],
+            'married_joint': [(0, 15), (36900, 28), (89150, 31), (140000, 36), (250000, 39.6)],
+            'head_of_household': [(0, 15), (29600, 28), (76400, 31), (127500, 36), (250000, 39.6)],
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 3700, 'married_joint': 6200, 'head_of_household': 5450},
+        standard_deduction={'single': 3700, 'married_joint': 6200, 'head_of_household': 5450},
+        exemption=2350,
+        exemption_phaseout=dict(
+            start={'single': 108450, 'married_joint': 162700, 'head_of_household': 135600},
+            step=2500, rate=0.02,
+        ),
+    ),
+    dict(
+        start=2001, indexed=True,
+        brackets={
+            'single': [(0, 10), (7000, 15), (28400, 25), (68800, 28), (143500, 33), (311950, 35)],
+            'married_joint': [(0, 10), (14000, 15), (56800, 25), (114650, 28), (174700, 33), (311950, 35)],
+            'head_of_household': [(0, 10), (10000, 15), (38050, 25), (98250, 28), (159100, 33), (311950, 35)],
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 4750, 'married_joint': 9500, 'head_of_household': 7000},
+        standard_deduction={'single': 4750, 'married_joint': 9500, 'head_of_household': 7000},
+        exemption=3050,
+        exemption_phaseout=dict(
+            start={'single': 139500, 'married_joint': 209250, 'head_of_household': 174400},
+            step=2500, rate=0.02,
+        ),
+    ),
+    dict(
+        start=2013, indexed=True,
+        brackets={
+            'single': [(0, 10), (8925, 15), (36250, 25), (87850, 28), (183250, 33), (398350, 35), (400000, 39.6)],
+            'married_joint': [(0, 10), (17850, 15), (72500, 25), (146400, 28), (223050, 33), (398350, 35), (450000, 39.6)],
+            'head_of_household': [(0, 10), (12750, 15), (48600, 25), (125450, 28), (203150, 33), (398350, 35), (425000, 39.6)],
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 6100, 'married_joint': 12200, 'head_of_household': 8950},
+        standard_deduction={'single': 6100, 'married_joint': 12200, 'head_of_household': 8950},
+        exemption=3900,
+        exemption_phaseout=dict(
+            start={'single': 250000, 'married_joint': 300000, 'head_of_household': 275000},
+            step=2500, rate=0.02,
+        ),
+    ),
+    # Tax Cuts and Jobs Act
+    dict(
+        start=2018, indexed=True,
+        brackets={
+            'single': [(0, 10), (9525, 12), (38700, 22), (82500, 24), (157500, 32), (200000, 35), (500000, 37)],
+            'married_joint': [(0, 10), (19050, 12), (77400, 22), (165000, 24), (315000, 32), (400000, 35), (600000, 37)],
+            'head_of_household': [(0, 10), (13600, 12), (51800, 22), (82500, 24), (157500, 32), (200000, 35), (500000, 37)],
+        },
+        standard_deduction_rate=0.0,
+        standard_deduction_floor={'single': 12000, 'married_joint': 24000, 'head_of_household': 18000},
+        standard_deduction={'single': 12000, 'married_joint': 24000, 'head_of_household': 18000},
+        exemption=0,
+        exemption_phaseout=None,
+    ),
+]
+
+# Earned income tax credit. `by_children` lists (phase-in rate %, earnings at
+# which the credit is fully phased in, phase-out start, phase-out rate %) for
+# 0, 1 and 2+ qualifying children; None means not eligible. Joint filers start
+# phasing out `joint_bonus` dollars later.
+EITC_SCHEDULES = [
+    dict(start=1950, indexed=False, joint_bonus=0, by_children=[None, None, None]),
+    dict(start=1975, indexed=False, joint_bonus=0,
+         by_children=[None, (10, 4000, 4000, 10), (10, 4000, 4000, 10)]),
+    dict(start=1979, indexed=False, joint_bonus=0,
+         by_children=[None, (10, 5000, 6000, 12.5), (10, 5000, 6000, 12.5)]),
+    dict(start=1985, indexed=False, joint_bonus=0,
+         by_children=[None, (11, 5000, 6500, 12.22), (11, 5000, 6500, 12.22)]),
+    dict(start=1987, indexed=True, joint_bonus=0,
+         by_children=[None, (14, 5714, 6920, 10), (14, 5714, 6920, 10)]),
+    dict(start=1991, indexed=True, joint_bonus=0,
+         by_children=[None, (16.7, 7140, 11250, 11.93), (17.3, 7140, 11250, 12.36)]),
+    dict(start=1996, indexed=True, joint_bonus=0,
+         by_children=[(7.65, 4220, 5280, 7.65), (34, 6330, 11610, 15.98), (40, 8890, 11610, 21.06)]),
+    dict(start=2018, indexed=True, joint_bonus=5690,
+         by_children=[(7.65, 6780, 8490, 7.65), (34, 10180, 18660, 15.98), (40, 14290, 18660, 21.06)]),
+]
+
+# Child tax credit: `per_child` dollars, reduced by `phaseout_amount` for each
+# `phaseout_step` dollars (or part of a step) of income above
+# `phaseout_start`. The refundable portion is `refundable_rate` of earnings
+# above `refundable_threshold`, at most `refundable_cap` per child.
+CHILD_CREDIT_SCHEDULES = [
+    dict(start=1950, per_child=0, phaseout_start={'single': 0, 'married_joint': 0, 'head_of_household': 0},
+         phaseout_step=1000, phaseout_amount=0, refundable_rate=0, refundable_threshold=0, refundable_cap=0),
+    dict(start=1998, per_child=400,
+         phaseout_start={'single': 75000, 'married_joint': 110000, 'head_of_household': 75000},
+         phaseout_step=1000, phaseout_amount=50, refundable_rate=0, refundable_threshold=0, refundable_cap=0),
+    dict(start=1999, per_child=500,
+         phaseout_start={'single': 75000, 'married_joint': 110000, 'head_of_household': 75000},
+         phaseout_step=1000, phaseout_amount=50, refundable_rate=0, refundable_threshold=0, refundable_cap=0),
+    dict(start=2003, per_child=1000,
+         phaseout_start={'single': 75000, 'married_joint': 110000, 'head_of_household': 75000},
+         phaseout_step=1000, phaseout_amount=50, refundable_rate=0.15, refundable_threshold=10500,
+         refundable_cap=1000),
+    dict(start=2009, per_child=1000,
+         phaseout_start={'single': 75000, 'married_joint': 110000, 'head_of_household': 75000},
+         phaseout_step=1000, phaseout_amount=50, refundable_rate=0.15, refundable_threshold=3000,
+         refundable_cap=1000),
+    dict(start=2018, per_child=2000,
+         phaseout_start={'single': 200000, 'married_joint': 400000, 'head_of_household': 200000},
+         phaseout_step=1000, phaseout_amount=50, refundable_rate=0.15, refundable_threshold=2500,
+         refundable_cap=1400),
+]
+
+
+# Long-term capital gains. `exclusion` is the share of net long-term gains
+# left out of AGI; `brackets` are preferential rates applied to the included
+# gains (and to qualified dividends when `qualified_dividends` is set),
+# stacked on top of ordinary taxable income: at each point of the stack the
+# lower of the ordinary and the preferential rate applies. None taxes gains
+# as ordinary income. Before 1970 the alternative tax capped the tax on the
+# full gain at 25%, i.e. 50% of the included half; the later $50,000 limit on
+# the alternative tax is not modelled. `loss_limit` caps net capital losses
+# deducted against other income.
+CAPITAL_GAINS_SCHEDULES = [
+    dict(start=1950, indexed=False, exclusion=0.5, loss_limit=1000, qualified_dividends=False,
+         brackets={'single': [(0, 50)], 'married_joint': [(0, 50)], 'head_of_household': [(0, 50)]}),
+    dict(start=1970, indexed=False, exclusion=0.5, loss_limit=1000, qualified_dividends=False, brackets=None),
+    dict(start=1978, indexed=False, exclusion=0.5, loss_limit=3000, qualified_dividends=False, brackets=None),
+    dict(start=1979, indexed=False, exclusion=0.6, loss_limit=3000, qualified_dividends=False, brackets=None),
+    dict(start=1987, indexed=False, exclusion=0.0, loss_limit=3000, qualified_dividends=False,
+         brackets={'single': [(0, 28)], 'married_joint': [(0, 28)], 'head_of_household': [(0, 28)]}),
+    dict(start=1997, indexed=True, exclusion=0.0, loss_limit=3000, qualified_dividends=False,
+         brackets={
+             'single': [(0, 10), (24650, 20)],
+             'married_joint': [(0, 10), (41200, 20)],
+             'head_of_household': [(0, 10), (33050, 20)],
+         }),
+    dict(start=2003, indexed=True, exclusion=0.0, loss_limit=3000, qualified_dividends=True,
+         brackets={
+             'single': [(0, 5), (28400, 15)],
+             'married_joint': [(0, 5), (56800, 15)],
+             'head_of_household': [(0, 5), (38050, 15)],
+         }),
+    dict(start=2008, indexed=True, exclusion=0.0, loss_limit=3000, qualified_dividends=True,
+         brackets={
+             'single': [(0, 0), (32550, 15)],
+             'married_joint': [(0, 0), (65100, 15)],
+             'head_of_household': [(0, 0), (43650, 15)],
+         }),
+    dict(start=2013, indexed=True, exclusion=0.0, loss_limit=3000, qualified_dividends=True,
+         brackets={
+             'single': [(0, 0), (36250, 15), (400000, 20)],
+             'married_joint': [(0, 0), (72500, 15), (450000, 20)],
+             'head_of_household': [(0, 0), (48600, 15), (425000, 20)],
+         }),
+    dict(start=2018, indexed=True, exclusion=0.0, loss_limit=3000, qualified_dividends=True,
+         brackets={
+             'single': [(0, 0), (38600, 15), (425800, 20)],
+             'married_joint': [(0, 0), (77200, 15), (479000, 20)],
+             'head_of_household': [(0, 0), (51700, 15), (452400, 20)],
+         }),
+]
+
+
+# Alternative minimum tax. Minimum taxable income is AGI less itemized
+# deductions other than state and local taxes (no standard deduction or
+# personal exemptions), reduced by an `exemption` that phases out at
+# `phaseout_rate` above `phaseout_start`. The tentative minimum tax is
+# rates[0] % up to `rate_break` and rates[1] % above, with capital gains
+# keeping their preferential rates. The add-on minimum taxes before 1983 are
+# not modelled; None means no minimum tax.
+AMT_SCHEDULES = [
+    dict(start=1950, indexed=False, exemption=None),
+    dict(start=1983, indexed=False, exemption={'single': 30000, 'married_joint': 40000, 'head_of_household': 30000},
+         phaseout_start=None, phaseout_rate=0, rates=(20, 20), rate_break=None),
+    dict(start=1987, indexed=False, exemption={'single': 30000, 'married_joint': 40000, 'head_of_household': 30000},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(21, 21), rate_break=None),
+    dict(start=1991, indexed=False, exemption={'single': 30000, 'married_joint': 40000, 'head_of_household': 30000},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(24, 24), rate_break=None),
+    dict(start=1993, indexed=False, exemption={'single': 33750, 'married_joint': 45000, 'head_of_household': 33750},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=175000),
+    dict(start=2001, indexed=False, exemption={'single': 35750, 'married_joint': 49000, 'head_of_household': 35750},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=175000),
+    dict(start=2003, indexed=False, exemption={'single': 40250, 'married_joint': 58000, 'head_of_household': 40250},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=175000),
+    dict(start=2006, indexed=False, exemption={'single': 42500, 'married_joint': 62550, 'head_of_household': 42500},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=175000),
+    dict(start=2009, indexed=False, exemption={'single': 46700, 'married_joint': 70950, 'head_of_household': 46700},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=175000),
+    dict(start=2012, indexed=False, exemption={'single': 50600, 'married_joint': 78750, 'head_of_household': 50600},
+         phaseout_start={'single': 112500, 'married_joint': 150000, 'head_of_household': 112500},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=175000),
+    # American Taxpayer Relief Act: exemptions indexed from here on
+    dict(start=2013, indexed=True, exemption={'single': 51900, 'married_joint': 80800, 'head_of_household': 51900},
+         phaseout_start={'single': 115400, 'married_joint': 153900, 'head_of_household': 115400},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=179500),
+    dict(start=2018, indexed=True, exemption={'single': 70300, 'married_joint': 109400, 'head_of_household': 70300},
+         phaseout_start={'single': 500000, 'married_joint': 1000000, 'head_of_household': 500000},
+         phaseout_rate=0.25, rates=(26, 28), rate_break=191500),
+]
+
+
+# Cap on the itemized deduction for state and local taxes (None: no cap).
+# The phase-down of the 2025 cap above $500,000 of income is not modelled.
+SALT_CAPS = [
+    dict(start=1950, cap=None),
+    # Tax Cuts and Jobs Act
+    dict(start=2018, cap=10000),
+    dict(start=2025, cap=40000),
+]
+
+# Social Security (OASDI) taxable maximum, per worker, by year
+SOCIAL_SECURITY_WAGE_BASE = {
+    1950: 3000, 1951: 3600, 1952: 3600, 1953: 3600, 1954: 3600,
+    1955: 4200, 1956: 4200, 1957: 4200, 1958: 4200, 1959: 4800,
+    1960: 4800, 1961: 4800, 1962: 4800, 1963: 4800, 1964: 4800,
+    1965: 4800, 1966: 6600, 1967: 6600, 1968: 7800, 1969: 7800,
+    1970: 7800, 1971: 7800, 1972: 9000, 1973: 10800, 1974: 13200,
+    1975: 14100, 1976: 15300, 1977: 16500, 1978: 17700, 1979: 22900,
+    1980: 25900, 1981: 29700, 1982: 32400, 1983: 35700, 1984: 37800,
+    1985: 39600, 1986: 42000, 1987: 43800, 1988: 45000, 1989: 48000,
+    1990: 51300, 1991: 53400, 1992: 55500, 1993: 57600, 1994: 60600,
+    1995: 61200, 1996: 62700, 1997: 65400, 1998: 68400, 1999: 72600,
+    2000: 76200, 2001: 80400, 2002: 84900, 2003: 87000, 2004: 87900,
+    2005: 90000, 2006: 94200, 2007: 97500, 2008: 102000, 2009: 106800,
+    2010: 106800, 2011: 106800, 2012: 110100, 2013: 113700, 2014: 117000,
+    2015: 118500, 2016: 118500, 2017: 127200, 2018: 128400, 2019: 132900,
+    2020: 137700, 2021: 142800, 2022: 147000, 2023: 160200, 2024: 168600,
+    2025: 176100,
+}
+
+# Payroll taxes. Rates are employee plus employer shares, in percent.
+# Medicare (HI) wages are capped at `hi_base` (None: the Social Security
+# wage base; 'uncapped' from 1994). Self-employment income is taxed at
+# `se_share` of the combined rates (the self-employment rate was about
+# three quarters of the combined OASDI rate and half the combined HI rate
+# before 1984) on `se_earnings` of net earnings (92.35% once half of the
+# tax became deductible in 1990). The additional Medicare tax applies to
+# wages and self-employment income above `additional_hi_threshold`.
+PAYROLL_SCHEDULES = [
+    dict(start=1950, oasdi_rate=3.0, hi_rate=0.0, hi_base=None, se_share=(0.0, 0.0), se_earnings=1.0),
+    dict(start=1951, oasdi_rate=3.0, hi_rate=0.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1954, oasdi_rate=4.0, hi_rate=0.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1957, oasdi_rate=4.5, hi_rate=0.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1959, oasdi_rate=5.0, hi_rate=0.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1960, oasdi_rate=6.0, hi_rate=0.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1962, oasdi_rate=6.25, hi_rate=0.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1963, oasdi_rate=7.25, hi_rate=0.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    # Medicare
+    dict(start=1966, oasdi_rate=7.7, hi_rate=0.7, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1967, oasdi_rate=7.8, hi_rate=1.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1968, oasdi_rate=7.6, hi_rate=1.2, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1969, oasdi_rate=8.4, hi_rate=1.2, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1971, oasdi_rate=9.2, hi_rate=1.2, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1973, oasdi_rate=9.7, hi_rate=2.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1974, oasdi_rate=9.9, hi_rate=1.8, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1978, oasdi_rate=10.1, hi_rate=2.0, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1979, oasdi_rate=10.16, hi_rate=2.1, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1981, oasdi_rate=10.7, hi_rate=2.6, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    dict(start=1982, oasdi_rate=10.8, hi_rate=2.6, hi_base=None, se_share=(0.75, 0.5), se_earnings=1.0),
+    # Social Security Amendments of 1983: self-employed pay the combined rate
+    dict(start=1984, oasdi_rate=11.4, hi_rate=2.6, hi_base=None, se_share=(1.0, 1.0), se_earnings=1.0),
+    dict(start=1985, oasdi_rate=11.4, hi_rate=2.7, hi_base=None, se_share=(1.0, 1.0), se_earnings=1.0),
+    dict(start=1986, oasdi_rate=11.4, hi_rate=2.9, hi_base=None, se_share=(1.0, 1.0), se_earnings=1.0),
+    dict(start=1988, oasdi_rate=12.12, hi_rate=2.9, hi_base=None, se_share=(1.0, 1.0), se_earnings=1.0),
+    dict(start=1990, oasdi_rate=12.4, hi_rate=2.9, hi_base=None, se_share=(1.0, 1.0), se_earnings=0.9235),
+    dict(start=1991, oasdi_rate=12.4, hi_rate=2.9, hi_base=125000, se_share=(1.0, 1.0), se_earnings=0.9235),
+    dict(start=1992, oasdi_rate=12.4, hi_rate=2.9, hi_base=130200, se_share=(1.0, 1.0), se_earnings=0.9235),
+    dict(start=1993, oasdi_rate=12.4, hi_rate=2.9, hi_base=135000, se_share=(1.0, 1.0), se_earnings=0.9235),
+    dict(start=1994, oasdi_rate=12.4, hi_rate=2.9, hi_base='uncapped', se_share=(1.0, 1.0), se_earnings=0.9235),
+    # Employee payroll tax holiday
+    dict(start=2011, oasdi_rate=10.4, hi_rate=2.9, hi_base='uncapped', se_share=(1.0, 1.0), se_earnings=0.9235),
+    # Affordable Care Act additional Medicare tax (thresholds are not indexed)
+    dict(start=2013, oasdi_rate=12.4, hi_rate=2.9, hi_base='uncapped', se_share=(1.0, 1.0), se_earnings=0.9235,
+         additional_hi_rate=0.9,
+         additional_hi_threshold={'single': 200000, 'married_joint': 250000, 'head_of_household': 200000}),
+]
+
+
+def _regime(schedules, year):
+    if year < schedules[0]['start']:
+        raise ValueError(f"No tax schedule before {schedules[0]['start']}, got {year}")
+    return [schedule for schedule in schedules if schedule['start'] <= year][-1]
+
+
+def _index_factor(schedule, year):
+    if not schedule.get('indexed'):
+        return 1.0
+    return float(price_ratio(schedule['start'], year))
+
+
+def _indexed(amount, factor):
+    # Indexed amounts are rounded to the nearest $50, as the statute does
+    return round(amount * factor / 50) * 50 if factor != 1.0 else amount
+
+
+def ordinary_schedule(year):
+    """Ordinary income parameters for `year` with indexed amounts applied."""
+    schedule = _regime(ORDINARY_SCHEDULES, year)
+    factor = _index_factor(schedule, year)
+    phaseout = schedule['exemption_phaseout']
+    return dict(
+        brackets={
+            status: [(_indexed(threshold, factor), rate) for threshold, rate in brackets]
+            for status, brackets in schedule['brackets'].items()
+        },
+        standard_deduction_rate=schedule['standard_deduction_rate'],
+        standard_deduction_floor={
+            status: _indexed(amount, factor) for status, amount in schedule['standard_deduction_floor'].items()
+        },
+        standard_deduction={
+            status: _indexed(amount, factor) for status, amount in schedule['standard_deduction'].items()
+        },
+        exemption=_indexed(schedule['exemption'], factor),
+        exemption_phaseout=None if phaseout is None else dict(
+            start={status: _indexed(amount, factor) for status, amount in phaseout['start'].items()},
+            step=phaseout['step'],
+            rate=phaseout['rate'],
+        ),
+    )
+
+
+def eitc_schedule(year):
+    """EITC parameters for `year` with indexed amounts applied."""
+    schedule = _regime(EITC_SCHEDULES, year)
+    factor = _index_factor(schedule, year)
+    by_children = []
+    for params in schedule['by_children']:
+        if params is None:
+            by_children.append(None)
+        else:
+            rate, max_earned, phaseout_start, phaseout_rate = params
+            by_children.append((rate, _indexed(max_earned, factor), _indexed(phaseout_start, factor), phaseout_rate))
+    return dict(joint_bonus=_indexed(schedule['joint_bonus'], factor), by_children=by_children)
+
+
+def child_credit_schedule(year):
+    """Child tax credit parameters for `year` (not inflation-indexed)."""
+    return dict(_regime(CHILD_CREDIT_SCHEDULES, year))
+
+
+def capital_gains_schedule(year):
+    """Capital gains parameters for `year` with indexed amounts applied.
+
+    Years that tax gains as ordinary income get a single 100% bracket,
+    which never binds against the ordinary rates.
+    """
+    schedule = _regime(CAPITAL_GAINS_SCHEDULES, year)
+    factor = _index_factor(schedule, year)
+    brackets = schedule['brackets'] or {status: [(0, 100)] for status in FILING_STATUSES}
+    return dict(
+        exclusion=schedule['exclusion'],
+        loss_limit=schedule['loss_limit'],
+        qualified_dividends=schedule['qualified_dividends'],
+        brackets={
+            status: [(_indexed(threshold, factor), rate) for threshold, rate in status_brackets]
+            for status, status_brackets in brackets.items()
+        },
+    )
+
+
+def amt_schedule(year):
+    """Alternative minimum tax parameters for `year`, or None before the AMT.
+
+    Missing phase-outs and rate breaks are returned as infinite thresholds.
+    """
+    schedule = _regime(AMT_SCHEDULES, year)
+    if schedule['exemption'] is None:
+        return None
+    factor = _index_factor(schedule, year)
+    phaseout_start = schedule['phaseout_start'] or {status: float('inf') for status in FILING_STATUSES}
+    return dict(
+        exemption={status: _indexed(amount, factor) for status, amount in schedule['exemption'].items()},
+        phaseout_start={
+            status: amount if amount == float('inf') else _indexed(amount, factor)
+            for status, amount in phaseout_start.items()
+        },
+        phaseout_rate=schedule['phaseout_rate'],
+        rates=schedule['rates'],
+        rate_break=float('inf') if schedule['rate_break'] is None else _indexed(schedule['rate_break'], factor),
+    )
+
+
+def salt_cap(year):
+    """Cap on deductible state and local taxes for `year` (infinite when uncapped)."""
+    cap = _regime(SALT_CAPS, year)['cap']
+    return float('inf') if cap is None else cap
+
+
+def payroll_schedule(year):
+    """Payroll tax parameters for `year`, with wage bases in dollars.
+
+    Uncapped wage bases and a missing additional Medicare tax are returned
+    as infinite thresholds.
+    """
+    schedule = _regime(PAYROLL_SCHEDULES, year)
+    if year not in SOCIAL_SECURITY_WAGE_BASE:
+        raise ValueError(f"No Social Security wage base for {year}")
+    oasdi_base = SOCIAL_SECURITY_WAGE_BASE[year]
+    hi_base = schedule['hi_base']
+    return dict(
+        oasdi_rate=schedule['oasdi_rate'],
+        oasdi_base=oasdi_base,
+        hi_rate=schedule['hi_rate'],
+        hi_base=oasdi_base if hi_base is None else float('inf') if hi_base == 'uncapped' else hi_base,
+        se_share=schedule['se_share'],
+        se_earnings=schedule['se_earnings'],
+        additional_hi_rate=schedule.get('additional_hi_rate', 0),
+        additional_hi_threshold=schedule.get(
+            'additional_hi_threshold', {status: float('inf') for status in FILING_STATUSES}),
+    )
@@ -1,21 +1,9 @@
-import pandas as pd
 import plotly.graph_objects as go
-import numpy as np
 
-# Create the data for 10-year intervals using the original data (including all federal taxes)
-years = [1950, 1960, 1970, 1980, 1990, 2000, 2010, 2020]
-data = {
-    'Year': years,
-    'Lowest Quintile': [5, 6, 7, 7, 5, 4, 3, 3],
-    'Second Quintile': [8, 9, 10, 9, 7, 6.5, 5, 5],
-    'Middle Quintile': [10, 11, 12, 11, 9, 8.5, 8, 8],
-    'Fourth Quintile': [12, 13, 14, 13, 11, 10.5, 10, 10],
-    'Highest Quintile': [20, 21, 22, 21, 19, 18.5, 18, 18],
-    'Top 1%': [42, 38, 35, 34, 32, 30, 28, 26],
-    'Top 0.1%': [50, 45, 40, 37, 35, 33, 31, 30]
-}
+from data_layer import load_wide
 
-df = pd.DataFrame(data)
+# Load the data for 10-year intervals using the original data (including all federal taxes)
+df = load_wide('federal_rates_decadal')
 
 # Define colors for each group
 colors = {
@@ -1,35 +1,10 @@
-import pandas as pd
 import plotly.graph_objects as go
-import numpy as np
 
-# Create the data for 10-year intervals
-years = [1950, 1960, 1970, 1980, 1990, 2000, 2010, 2020]
+from derived_store import load_series
 
-# Original data
-data_original = {
-    'Year': years,
-    'Lowest Quintile': [5, 6, 7, 7, 5, 4, 3, 3],
-    'Second Quintile': [8, 9, 10, 9, 7, 6.5, 5, 5],
-    'Middle Quintile': [10, 11, 12, 11, 9, 8.5, 8, 8],
-    'Fourth Quintile': [12, 13, 14, 13, 11, 10.5, 10, 10],
-    'Highest Quintile': [20, 21, 22, 21, 19, 18.5, 18, 18],
-    'Top 1%': [42, 38, 35, 34, 32, 30, 28, 26],
-    'Top 0.1%': [50, 45, 40, 37, 35, 33, 31, 30]
-}
-
-# Calculate adjusted Highest Quintile (80-99th percentile)
-# Formula: [20 × Rate(Top Quintile) - 1 × Rate(Top 1%)] ÷ 19
-highest_quintile_adjusted = []
-for i in range(len(years)):
-    adjusted_rate = (20 * data_original['Highest Quintile'][i] - 1 * data_original['Top 1%'][i]) / 19
-    highest_quintile_adjusted.append(round(adjusted_rate, 1))
-
-# Create new data dictionary with adjusted highest quintile
-data = data_original.copy()
-data['Highest Quintile (80-99th percentile)'] = highest_quintile_adjusted
-del data['Highest Quintile']  # Remove the original highest quintile
-
-df = pd.DataFrame(data)
+# Load the data with the Highest Quintile adjusted to exclude the Top 1%
+# (80-99th percentile), read from the per-year derived series partitions
+df = load_series('federal_rates_decadal_adjusted')
 
 # Define colors for each group
 colors = {
@@ -1,22 +1,9 @@
-import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 
-# Create the data
-years = np.arange(1950, 2026, 5)
-data = {
-    'Year': years,
-    'Lowest Quintile': [5, 6, 6, 7, 7.5, 7, 6, 5, 4, 3.5, 3, 3, 3, 3, 3, 3],
-    'Second Quintile': [8, 8.5, 9, 10, 9.5, 9, 8, 7, 6.5, 6, 5, 5, 5, 5, 5, 5],
-    'Middle Quintile': [10, 10.5, 11, 12, 11.5, 11, 10, 9, 8.5, 8, 8, 8, 8, 8, 8, 8],
-    'Fourth Quintile': [12, 12.5, 13, 14, 13.5, 13, 12, 11, 10.5, 10, 10, 10, 10, 10, 10, 10],
-    'Highest Quintile': [20, 20.5, 21, 22, 21.5, 21, 20, 19, 18.5, 18, 18, 18, 18, 18, 18, 18],
-    'Top 1%': [42, 40, 38, 35, 35, 35, 34, 33, 32, 31, 30, 29, 28, 27, 26, 26],
-    'Top 0.1%': [50, 48, 45, 40, 40, 38, 37, 36, 35, 34, 33, 32, 31, 30, 30, 30]
-}
+from data_layer import load_wide
 
-df = pd.DataFrame(data)
+# Load the data
+df = load_wide('federal_rates')
 
 # Reorder columns based on the first year's tax rates (descending order)
 first_year_rates = df.iloc[0].drop('Year')
@@ -1,20 +1,10 @@
-import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 
-# Create the data
-years = [1950, 1975, 2000, 2022]
-data = {
-    'Year': years,
-    'Lowest Quintile': [0, 0, -6, -10],
-    'Second Quintile': [1, 1, -3, -4],
-    'Middle Quintile': [3, 3, 2, 1],
-    'Top 1%': [16.9, 20, 25, 26.1],
-    'Top 0.1%': [20, 23, 27, 27.5]
-}
+from bootstrap import add_confidence_bands
+from data_layer import load_wide
 
-df = pd.DataFrame(data)
+# Load the data
+df = load_wide('income_only_rates')
 
 # Reorder columns based on the first year's tax rates (descending order)
 first_year_rates = df.iloc[0].drop('Year')
@@ -33,6 +23,9 @@ colors = {
     'Lowest Quintile': '#1f77b4'   # Blue
 }
 
+# Shade bootstrap confidence bands behind the lines, once `python bootstrap.py` has computed them
+add_confidence_bands(fig, df, colors)
+
 for column in df.columns[1:]:
     fig.add_trace(go.Scatter(
         x=df['Year'],
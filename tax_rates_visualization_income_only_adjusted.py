@@ -1,36 +1,11 @@
-import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 
-# Create the data
-years = [1950, 1960, 1970, 1980, 1990, 2000, 2010, 2020]
+from bootstrap import add_confidence_bands
+from derived_store import load_series
 
-# Original data
-data_original = {
-    'Year': years,
-    'Lowest Quintile': [0, -2, -4, -6, -8, -10, -10, -10],
-    'Second Quintile': [1, 0, -1, -2, -3, -4, -4, -4],
-    'Middle Quintile': [3, 3, 2, 2, 1, 1, 1, 1],
-    'Fourth Quintile': [6, 6, 5, 5, 4, 4, 4, 4],
-    'Highest Quintile': [18, 19, 19, 20, 20, 19, 19, 19],
-    'Top 1%': [16.9, 18, 19, 22, 24, 25, 26, 26.1],
-    'Top 0.1%': [20, 21, 22, 24, 26, 27, 27.5, 27.5]
-}
-
-# Calculate adjusted Highest Quintile (80-99th percentile)
-# Formula: [20 × Rate(Top Quintile) - 1 × Rate(Top 1%)] ÷ 19
-highest_quintile_adjusted = []
-for i in range(len(years)):
-    adjusted_rate = (20 * data_original['Highest Quintile'][i] - 1 * data_original['Top 1%'][i]) / 19
-    highest_quintile_adjusted.append(round(adjusted_rate, 1))
-
-# Create new data dictionary with adjusted highest quintile
-data = data_original.copy()
-data['Highest Quintile (80-99th percentile)'] = highest_quintile_adjusted
-del data['Highest Quintile']  # Remove the original highest quintile
-
-df = pd.DataFrame(data)
+# Load the data with the Highest Quintile adjusted to exclude the Top 1%
+# (80-99th percentile), read from the per-year derived series partitions
+df = load_series('income_only_rates_decadal_adjusted')
 
 # Create the figure
 fig = go.Figure()
@@ -51,6 +26,9 @@ first_year_rates = df.iloc[0].drop('Year')
 ordered_columns = ['Year'] + list(first_year_rates.sort_values(ascending=False).index)
 df = df[ordered_columns]
 
+# Shade bootstrap confidence bands behind the lines, once `python bootstrap.py` has computed them
+add_confidence_bands(fig, df, colors)
+
 for column in df.columns[1:]:
     fig.add_trace(go.Scatter(
         x=df['Year'],
@@ -0,0 +1,268 @@
+# Multi-resolution tile pyramid of effective rates by year, percentile and state
+#
+# An annual cube with 0.1% percentile bins and every state is far too large
+# to send to a browser. `build_pyramid` aggregates it into LEVELS, from
+# decades x quintiles to years x 0.1% bins, for the nation and each state,
+# and cuts every level into tiles of at most TILE_YEARS x TILE_PERCENTILES
+# cells, one JSON file each:
+#
+#   <pyramid>/pyramid.json                         levels, cell edges, regions
+#   <pyramid>/<level>/<region>/<year tile>-<percentile tile>.json
+#
+# Cells hold ratios of weighted sums (rates are not averaged). The chart
+# client (CLIENT_SCRIPT, used by tile_pyramid_visualization.py) picks the
+# finest level whose cells in the zoom window stay under a budget and
+# fetches only the tiles covering the window, so each zoom moves a bounded
+# amount of data.
+#
+#   python tile_pyramid.py build microdata/returns microdata/pyramid
+#   python tile_pyramid.py serve --port 8000
+
+import argparse
+import json
+import os
+import shutil
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+from aggregate_cube import build_cube_from_microdata
+from microdata_schema import STATES
+
+PYRAMID_INDEX = 'pyramid.json'
+NATIONAL = 'US'
+
+# Percentile bins of the finest level
+FINE_EDGES = np.linspace(0, 100, 1001)
+
+# (years per cell, percentiles per cell), coarsest first
+LEVELS = ((10, 20), (5, 5), (1, 1), (1, 0.1))
+
+TILE_YEARS = 16
+TILE_PERCENTILES = 128
+
+# Cell values: name -> (numerator, denominator, scale)
+MEASURES = {
+    'rate': ('federal_income_tax', 'income', 100),
+    'income': ('income', 'count', 1),
+}
+
+# Most cells the client draws at once; it picks the finest level under it
+MAX_CELLS = 20000
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _groups(keys):
+    # First index of each run of equal keys (keys are sorted)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def level_sums(cube, year_step, percentile_step):
+    """The cube's sums rolled up to cells of `year_step` years and `percentile_step` percentiles.
+
+    Returns (cell start years, cell lower percentiles, {measure: (years,
+    percentiles, states) sums}).
+    """
+    year_cells = cube.years // year_step * year_step
+    year_starts = _groups(year_cells)
+    lows = np.round(cube.edges[:-1] / percentile_step, 6)
+    bin_cells = np.floor(lows)
+    bin_starts = _groups(bin_cells)
+    # Each cell must start exactly on a bin edge of the cube
+    if not np.allclose(lows[bin_starts], bin_cells[bin_starts]) or not np.allclose(
+            cube.edges[-1] / percentile_step, np.round(cube.edges[-1] / percentile_step)):
+        raise ValueError(f"Cube bins do not align with {percentile_step}% cells")
+    sums = {
+        name: np.add.reduceat(np.add.reduceat(values, year_starts, axis=0), bin_starts, axis=1)
+        for name, values in cube.measures.items()
+    }
+    return year_cells[year_starts], cube.edges[bin_starts], sums
+
+
+def _cell_values(sums):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {name: scale * sums[numerator] / sums[denominator]
+                for name, (numerator, denominator, scale) in MEASURES.items()}
+
+
+def _write_json(path, payload):
+    with open(path, 'w') as f:
+        f.write(payload)
+
+
+def build_pyramid(cube, pyramid_dir, levels=LEVELS, regions=STATES):
+    """Write the tile pyramid of `cube` (built with FINE_EDGES bins) to `pyramid_dir`."""
+    tmp_dir = pyramid_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    state_index = {state: i for i, state in enumerate(cube.states)}
+    index = dict(regions=[NATIONAL] + list(regions), measures=list(MEASURES), tile_years=TILE_YEARS,
+                 tile_percentiles=TILE_PERCENTILES, max_cells=MAX_CELLS, levels=[])
+    tiles = 0
+    for level, (year_step, percentile_step) in enumerate(levels):
+        years, lows, sums = level_sums(cube, year_step, percentile_step)
+        index['levels'].append(dict(year_step=year_step, percentile_step=percentile_step,
+                                    years=years.tolist(), percentiles=np.round(lows, 6).tolist()))
+        for region in index['regions']:
+            if region == NATIONAL:
+                region_sums = {name: values.sum(axis=2) for name, values in sums.items()}
+            else:
+                region_sums = {name: values[:, :, state_index[region]] for name, values in sums.items()}
+            # Percentiles as rows and years as columns, as heatmaps take them
+            values = {name: np.round(value.T, 2) for name, value in _cell_values(region_sums).items()}
+            region_dir = os.path.join(tmp_dir, str(level), region)
+            os.makedirs(region_dir)
+            for ty in range(0, len(years), TILE_YEARS):
+                for tp in range(0, len(lows), TILE_PERCENTILES):
+                    tile = {name: value[tp:tp + TILE_PERCENTILES, ty:ty + TILE_YEARS] for name, value in values.items()}
+                    _write_json(os.path.join(region_dir, f'{ty // TILE_YEARS}-{tp // TILE_PERCENTILES}.json'),
+                                to_json_plotly(tile))
+                    tiles += 1
+    _write_json(os.path.join(tmp_dir, PYRAMID_INDEX), json.dumps(index))
+    shutil.rmtree(pyramid_dir, ignore_errors=True)
+    os.replace(tmp_dir, pyramid_dir)
+    return tiles
+
+
+def load_index(pyramid_dir):
+    with open(os.path.join(pyramid_dir, PYRAMID_INDEX)) as f:
+        return json.load(f)
+
+
+def load_level(pyramid_dir, level, region=NATIONAL):
+    """A whole level for one region, as (years, percentiles, {measure: (percentiles, years) array})."""
+    index = load_index(pyramid_dir)
+    spec = index['levels'][level]
+    n_years, n_percentiles = len(spec['years']), len(spec['percentiles'])
+    values = {name: np.full((n_percentiles, n_years), np.nan) for name in index['measures']}
+    for ty in range(0, n_years, index['tile_years']):
+        for tp in range(0, n_percentiles, index['tile_percentiles']):
+            path = os.path.join(pyramid_dir, str(level), region,
+                                f"{ty // index['tile_years']}-{tp // index['tile_percentiles']}.json")
+            with open(path) as f:
+                tile = json.load(f)
+            for name in values:
+                block = np.array(tile[name], dtype=np.float64)
+                values[name][tp:tp + block.shape[0], ty:ty + block.shape[1]] = block
+    return np.array(spec['years']), np.array(spec['percentiles']), values
+
+
+# Browser client: expects PYRAMID_BASE (URL of the pyramid directory) and
+# the plot div id in '{plot_id}', as a plotly post_script
+CLIENT_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var base = PYRAMID_BASE;
+var cache = {};
+var index = null;
+var region = 'US';
+var pending = 0;
+
+function tile(level, ty, tp) {
+  var url = base + '/' + level + '/' + region + '/' + ty + '-' + tp + '.json';
+  if (!cache[url]) {
+    cache[url] = fetch(url).then(function (response) { return response.json(); });
+  }
+  return cache[url];
+}
+
+function cellRange(starts, step, low, high) {
+  var first = 0, last = starts.length - 1;
+  while (first < last && starts[first] + step <= low) first++;
+  while (last > first && starts[last] >= high) last--;
+  return [first, last];
+}
+
+function chooseLevel(x0, x1, y0, y1) {
+  for (var level = index.levels.length - 1; level > 0; level--) {
+    var spec = index.levels[level];
+    var years = cellRange(spec.years, spec.year_step, x0, x1);
+    var percentiles = cellRange(spec.percentiles, spec.percentile_step, y0, y1);
+    if ((years[1] - years[0] + 1) * (percentiles[1] - percentiles[0] + 1) <= index.max_cells) return level;
+  }
+  return 0;
+}
+
+function render() {
+  var x = gd.layout.xaxis.range, y = gd.layout.yaxis.range;
+  var level = chooseLevel(x[0], x[1], y[0], y[1]);
+  var spec = index.levels[level];
+  var years = cellRange(spec.years, spec.year_step, x[0], x[1]);
+  var percentiles = cellRange(spec.percentiles, spec.percentile_step, y[0], y[1]);
+  var ty0 = Math.floor(years[0] / index.tile_years), ty1 = Math.floor(years[1] / index.tile_years);
+  var tp0 = Math.floor(percentiles[0] / index.tile_percentiles), tp1 = Math.floor(percentiles[1] / index.tile_percentiles);
+  var requests = [], keys = [];
+  for (var ty = ty0; ty <= ty1; ty++) {
+    for (var tp = tp0; tp <= tp1; tp++) {
+      requests.push(tile(level, ty, tp));
+      keys.push([ty, tp]);
+    }
+  }
+  var request = ++pending;
+  Promise.all(requests).then(function (tiles) {
+    if (request !== pending) return;
+    var columns = (ty1 - ty0 + 1) * index.tile_years, rows = (tp1 - tp0 + 1) * index.tile_percentiles;
+    var z = [], income = [];
+    for (var r = 0; r < rows; r++) { z.push(new Array(columns).fill(null)); income.push(new Array(columns).fill(null)); }
+    tiles.forEach(function (values, k) {
+      var row0 = (keys[k][1] - tp0) * index.tile_percentiles, column0 = (keys[k][0] - ty0) * index.tile_years;
+      values.rate.forEach(function (row, r) {
+        row.forEach(function (value, c) {
+          z[row0 + r][column0 + c] = value;
+          income[row0 + r][column0 + c] = values.income[r][c];
+        });
+      });
+    });
+    var firstYear = ty0 * index.tile_years, firstPercentile = tp0 * index.tile_percentiles;
+    var xs = spec.years.slice(firstYear, firstYear + columns).map(function (start) { return start + (spec.year_step - 1) / 2; });
+    var ys = spec.percentiles.slice(firstPercentile, firstPercentile + rows).map(function (low) { return low + spec.percentile_step / 2; });
+    z = z.slice(0, ys.length).map(function (row) { return row.slice(0, xs.length); });
+    income = income.slice(0, ys.length).map(function (row) { return row.slice(0, xs.length); });
+    Plotly.restyle(gd, {x: [xs], y: [ys], z: [z], customdata: [income]}, [0]);
+    Plotly.relayout(gd, {'title.text': TITLE + ' (' + region + ', ' + spec.year_step + '-year x ' + spec.percentile_step + '% cells)'});
+  });
+}
+
+fetch(base + '/pyramid.json').then(function (response) { return response.json(); }).then(function (loaded) {
+  index = loaded;
+  var select = document.createElement('select');
+  index.regions.forEach(function (name) {
+    var option = document.createElement('option');
+    option.value = option.text = name;
+    select.appendChild(option);
+  });
+  select.onchange = function () { region = select.value; render(); };
+  gd.parentNode.insertBefore(select, gd);
+  gd.on('plotly_relayout', function (event) {
+    if (Object.keys(event).some(function (key) { return key.indexOf('axis') >= 0; })) render();
+  });
+  render();
+});
+"""
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=REPO_DIR, **kwargs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or serve the year x percentile x state tile pyramid")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Build the pyramid from a microdata store")
+    build.add_argument('store_dir')
+    build.add_argument('pyramid_dir')
+    serve = commands.add_parser('serve', help="Serve the charts and pyramid tiles over HTTP")
+    serve.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from microdata_store import MicrodataStore
+
+        cube = build_cube_from_microdata(MicrodataStore(args.store_dir), edges=FINE_EDGES)
+        tiles = build_pyramid(cube, args.pyramid_dir)
+        print(f"Wrote {tiles:,} tiles for {len(LEVELS)} levels to '{args.pyramid_dir}'")
+    else:
+        print(f"Serving on http://localhost:{args.port}/")
+        ThreadingHTTPServer(('localhost', args.port), _Handler).serve_forever()
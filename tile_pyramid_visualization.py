@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+
+import plotly.graph_objects as go
+
+from tile_pyramid import CLIENT_SCRIPT, load_index, load_level
+
+# Tile pyramid to explore (see tile_pyramid.py)
+pyramid_dir = sys.argv[1] if len(sys.argv) > 1 else 'microdata/pyramid'
+
+# The coarsest national level is drawn right away; the page then fetches
+# finer tiles for the zoom window from the server
+index = load_index(pyramid_dir)
+years, percentiles, values = load_level(pyramid_dir, 0)
+coarsest, finest = index['levels'][0], index['levels'][-1]
+title = "Effective Federal Income Tax Rates by Year and Percentile"
+
+# Create the figure
+fig = go.Figure(go.Heatmap(
+    x=years + (coarsest['year_step'] - 1) / 2,
+    y=percentiles + coarsest['percentile_step'] / 2,
+    z=values['rate'],
+    customdata=values['income'],
+    colorscale='Viridis',
+    zmin=0,
+    zmax=50,
+    colorbar=dict(title="Rate (%)"),
+    hovertemplate="Year: %{x}<br>" +
+                 "Percentile: %{y:.1f}<br>" +
+                 "Tax Rate: %{z:.1f}%<br>" +
+                 "Average Income: $%{customdata:,.0f}<br>" +
+                 "<extra></extra>"
+))
+
+# Update layout
+fig.update_layout(
+    title={
+        'text': title,
+        'y':0.95,
+        'x':0.5,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=20)
+    },
+    xaxis_title="Year",
+    yaxis_title="Percentile of Adjusted Gross Income",
+    template='plotly_white',
+    margin=dict(l=80, r=30, t=100, b=50),
+    xaxis=dict(
+        range=[min(finest['years']) - 0.5, max(finest['years']) + finest['year_step'] - 0.5],
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    yaxis=dict(
+        range=[0, 100],
+        tickformat='.1f',
+        gridcolor='lightgrey',
+        gridwidth=1
+    ),
+    plot_bgcolor='white',
+    paper_bgcolor='white'
+)
+
+# Save the figure as an HTML file; zooming fetches tiles relative to the page
+base = os.path.relpath(pyramid_dir).replace(os.sep, '/')
+fig.write_html("tile_pyramid_visualization.html",
+               post_script=f"var PYRAMID_BASE = {json.dumps(base)};\nvar TITLE = {json.dumps(title)};\n" + CLIENT_SCRIPT)
+
+print("Tile pyramid visualization has been created and saved as 'tile_pyramid_visualization.html'")
@@ -0,0 +1,36 @@
+# Bring the derived series up to date and re-emit the charts that use them
+#
+#   python update_derived.py                 # every derived series
+#   python update_derived.py --series state_rates_decadal_adjusted
+#   python update_derived.py --no-charts     # partitions only
+#
+# Only years that are new or whose source values changed are recomputed, and
+# only charts plotting a series with a rewritten partition are rebuilt.
+
+import argparse
+import os
+import subprocess
+import sys
+
+from derived_series import DERIVED_SERIES
+from derived_store import update_series
+
+parser = argparse.ArgumentParser(description="Update per-year derived series partitions")
+parser.add_argument('--series', action='append', choices=sorted(DERIVED_SERIES),
+                    help="Series to update (repeatable); defaults to all")
+parser.add_argument('--no-charts', action='store_true', help="Do not re-emit affected charts")
+args = parser.parse_args()
+
+charts = []
+for series in args.series or DERIVED_SERIES:
+    written = update_series(series)
+    if written:
+        print(f"{series}: computed {', '.join(str(year) for year in written)}")
+        charts.extend(chart for chart in DERIVED_SERIES[series]['charts'] if chart not in charts)
+    else:
+        print(f"{series}: up to date")
+
+if not args.no_charts:
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    for chart in charts:
+        subprocess.run([sys.executable, chart], cwd=repo_dir, check=True)
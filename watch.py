@@ -0,0 +1,320 @@
+# Watch mode: rebuild only the charts an edit affects and live-reload open pages
+#
+# A dependency graph maps every watched file to the charts that use it: the
+# chart script itself, the local modules it imports (transitively), the
+# datasets it names (data/<name>.parquet, including the source of a derived
+# series) and, for charts that take a store from the command line, the
+# microdata store's manifest. Files are polled for changes; each batch of
+# changes rebuilds the affected charts with runpy in this process, so
+# plotly, pandas and NumPy stay imported and a rebuild takes tens of
+# milliseconds. Local modules are re-imported only when Python files change.
+#
+# The charts are served over HTTP with a small script injected into each
+# page. After a rebuild the server pushes an event to open pages (Server-Sent
+# Events), and the page swaps in the new figure with Plotly.react, or reloads
+# when the figure could not be captured.
+#
+#   python watch.py                          # serve on http://localhost:8000
+#   python watch.py --store microdata/synthetic --port 8001
+
+import argparse
+import ast
+import contextlib
+import glob
+import io
+import json
+import os
+import queue
+import runpy
+import sys
+import threading
+import time
+import traceback
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Imported up front so rebuilds never pay for them
+import numpy  # noqa: F401
+import pandas  # noqa: F401
+import plotly.graph_objects as go
+import pyarrow  # noqa: F401
+
+from microdata_store import MANIFEST
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(REPO_DIR, 'data')
+CHART_PATTERN = '*_visualization*.py'
+DEFAULT_STORE = 'microdata/returns'
+
+# Seconds between polls, and of quiet after a change before rebuilding
+POLL_INTERVAL = 0.1
+DEBOUNCE = 0.05
+
+LIVE_RELOAD_SCRIPT = """
+<script>
+(function () {
+  var chart = location.pathname.split('/').pop().replace(/\\.html$/, '');
+  var events = new EventSource('/events');
+  events.onmessage = function (event) {
+    var message = JSON.parse(event.data);
+    if (message.chart !== chart) return;
+    if (!message.figure) { location.reload(); return; }
+    fetch('/figures/' + chart + '.json').then(function (response) {
+      if (!response.ok) throw new Error(response.status);
+      return response.json();
+    }).then(function (figure) {
+      Plotly.react(document.querySelector('.plotly-graph-div'), figure.data, figure.layout);
+    }).catch(function () { location.reload(); });
+  };
+})();
+</script>
+"""
+
+
+def chart_scripts(repo_dir=REPO_DIR):
+    return sorted(glob.glob(os.path.join(repo_dir, CHART_PATTERN)))
+
+
+def _module_path(name, repo_dir):
+    path = os.path.join(repo_dir, name.split('.')[0] + '.py')
+    return path if os.path.exists(path) else None
+
+
+def _parse(path):
+    with open(path) as f:
+        return ast.parse(f.read(), filename=path)
+
+
+def local_imports(tree, repo_dir=REPO_DIR):
+    """Paths of the repository modules a parsed module imports directly."""
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return {path for path in (_module_path(name, repo_dir) for name in names) if path}
+
+
+def _string_constants(tree):
+    return {node.value for node in ast.walk(tree) if isinstance(node, ast.Constant) and isinstance(node.value, str)}
+
+
+def _reads_argv(tree):
+    return any(isinstance(node, ast.Attribute) and node.attr == 'argv'
+               and isinstance(node.value, ast.Name) and node.value.id == 'sys' for node in ast.walk(tree))
+
+
+def dependency_graph(charts, store=None, repo_dir=REPO_DIR, data_dir=DATA_DIR):
+    """Map every file the charts depend on to the set of charts that depend on it."""
+    from derived_series import DERIVED_SERIES
+
+    imports = {}
+
+    def modules(path):
+        # The module and every repository module it imports, transitively
+        seen, stack = set(), [path]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            if current not in imports:
+                imports[current] = local_imports(_parse(current), repo_dir)
+            stack.extend(imports[current])
+        return seen
+
+    graph = {}
+    for chart in charts:
+        tree = _parse(chart)
+        files = modules(chart)
+        names = _string_constants(tree)
+        datasets = {name for name in names if os.path.exists(os.path.join(data_dir, f'{name}.parquet'))}
+        datasets |= {DERIVED_SERIES[name]['source'] for name in names if name in DERIVED_SERIES}
+        files |= {os.path.join(data_dir, f'{name}.parquet') for name in datasets}
+        if _reads_argv(tree):
+            files.add(os.path.join(repo_dir, store or DEFAULT_STORE, MANIFEST))
+        for path in files:
+            graph.setdefault(path, set()).add(chart)
+    return graph
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _purge_local_modules(repo_dir=REPO_DIR):
+    # Drop repository modules so the next build imports edited code
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if name != '__main__' and path and os.path.dirname(os.path.abspath(path)) == repo_dir:
+            del sys.modules[name]
+
+
+def build_chart(chart, store=None, write_page=True):
+    """Run a chart script in this process (its output silenced) and return its figure, or None.
+
+    With write_page=False the script's fig.write_html and fig.write_image
+    calls do nothing, so the committed pages are left as they are.
+    """
+    argv, sys.argv = sys.argv, [chart] + ([store] if store else [])
+    writers = go.Figure.write_html, go.Figure.write_image
+    if not write_page:
+        go.Figure.write_html = go.Figure.write_image = lambda self, *args, **kwargs: None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            namespace = runpy.run_path(chart, run_name='__main__')
+    finally:
+        sys.argv = argv
+        go.Figure.write_html, go.Figure.write_image = writers
+    figure = namespace.get('fig')
+    return figure if isinstance(figure, go.Figure) else None
+
+
+class LiveReload:
+    """Latest figures and the event queues of open pages."""
+
+    def __init__(self):
+        self.figures = {}
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    def publish(self, name, figure):
+        with self.lock:
+            if figure is not None:
+                self.figures[name] = figure.to_json()
+            else:
+                self.figures.pop(name, None)
+            message = json.dumps({'chart': name, 'figure': figure is not None})
+            for client in self.clients:
+                client.put(message)
+
+    def subscribe(self):
+        client = queue.Queue()
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+
+def make_handler(live, repo_dir=REPO_DIR):
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=repo_dir, **kwargs)
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, body, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/events':
+                return self._events()
+            if path.startswith('/figures/') and path.endswith('.json'):
+                figure = live.figures.get(path[len('/figures/'):-len('.json')])
+                return self._send(figure.encode('utf-8'), 'application/json') if figure else self.send_error(404)
+            if path.endswith('.html'):
+                file_path = self.translate_path(path)
+                if not os.path.isfile(file_path):
+                    return self.send_error(404)
+                with open(file_path, encoding='utf-8') as f:
+                    html = f.read()
+                html = html.replace('</body>', LIVE_RELOAD_SCRIPT + '</body>', 1)
+                return self._send(html.encode('utf-8'), 'text/html; charset=utf-8')
+            return super().do_GET()
+
+        def _events(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            client = live.subscribe()
+            try:
+                while True:
+                    try:
+                        self.wfile.write(f'data: {client.get(timeout=15)}\n\n'.encode('utf-8'))
+                    except queue.Empty:
+                        self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                live.unsubscribe(client)
+
+    return Handler
+
+
+def rebuild(charts, store, live):
+    for chart in charts:
+        name = os.path.splitext(os.path.basename(chart))[0]
+        start = time.perf_counter()
+        try:
+            figure = build_chart(chart, store)
+        except (Exception, SystemExit):
+            traceback.print_exc()
+            print(f"{name}: failed")
+            continue
+        live.publish(name, figure)
+        print(f"{name}: rebuilt in {time.perf_counter() - start:.2f}s")
+
+
+def watch(store=None, live=None, build_first=False):
+    """Poll the dependency graph's files and rebuild the charts affected by each change."""
+    live = live or LiveReload()
+    charts = chart_scripts()
+    graph = dependency_graph(charts, store)
+    mtimes = {path: _mtime(path) for path in graph}
+    if build_first:
+        rebuild(charts, store, live)
+    while True:
+        time.sleep(POLL_INTERVAL)
+        current_charts = chart_scripts()
+        changed = {path for path in graph if _mtime(path) != mtimes[path]}
+        changed |= set(current_charts) - set(charts)
+        if not changed:
+            continue
+        # Wait for the editor (or a data writer) to finish
+        time.sleep(DEBOUNCE)
+        affected = {chart for path in changed for chart in graph.get(path, {path})} & set(current_charts)
+        if any(path.endswith('.py') for path in changed):
+            # Edited code is re-imported, and imports may have changed
+            _purge_local_modules()
+            charts = current_charts
+            graph = dependency_graph(charts, store)
+        mtimes = {path: _mtime(path) for path in graph}
+        print(f"Changed: {', '.join(os.path.relpath(path, REPO_DIR) for path in sorted(changed))}")
+        rebuild(sorted(affected), store, live)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild affected charts on every edit and live-reload open pages")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--store', help=f"Microdata store passed to charts that take one (default {DEFAULT_STORE})")
+    parser.add_argument('--no-serve', action='store_true', help="Only rebuild, without the live-reload server")
+    parser.add_argument('--build', action='store_true', help="Build every chart before watching")
+    args = parser.parse_args()
+
+    os.chdir(REPO_DIR)
+    live = LiveReload()
+    if not args.no_serve:
+        server = ThreadingHTTPServer(('localhost', args.port), make_handler(live))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Serving charts on http://localhost:{args.port}/")
+    print(f"Watching {len(chart_scripts())} charts")
+    try:
+        watch(args.store, live, build_first=args.build)
+    except KeyboardInterrupt:
+        pass